@@ -3,7 +3,6 @@ from __future__ import annotations
 import asyncio
 import csv
 import random
-import struct
 import threading
 import time
 import os
@@ -13,8 +12,32 @@ from typing import Dict, Tuple, List
 
 import can
 
-
-BUS_CH = "can0"
+from batched_writer import BatchedRowWriter
+from can_daemon import open_bus
+from can_demux import CanDemux
+from odrive_can import (
+    encode_set_axis_state,
+    encode_set_controller_mode,
+    encode_set_input_pos,
+    encode_set_traj_accel_limits,
+    encode_set_traj_vel_limit,
+)
+from status_reporter import StatusReporter
+from slimevr_packets import (
+    HANDSHAKE_RESPONSE,
+    PACKET_BATTERY,
+    PACKET_HANDSHAKE,
+    PACKET_ROTATION,
+    SERVER_PORT,
+    PacketDispatcher,
+    decode_battery,
+    decode_handshake_mac,
+    decode_rotation,
+)
+from tracker_registry import TrackerRegistry
+
+
+BUS_CH = os.environ.get("CAN_CHANNEL", "can0")
 NODE_IDS = [1, 2, 3]
 ACCEL_FACTOR = 4.0
 ERR_TOL_DEG = 0.05
@@ -36,13 +59,6 @@ AXIS_CLOSED_LOOP = 8
 CTRL_MODE_POS = 3
 INPUT_MODE_TRAP = 5
 
-SERVER_PORT = 6969
-HANDSHAKE_RESPONSE = bytes([3]) + b"Hey OVR =D 5"
-HEADER_MAGIC = b"\x00\x00\x00"
-PACKET_HANDSHAKE = 3
-PACKET_BATTERY = 12
-PACKET_ROTATION = 17
-HEADER_SIZE = 12
 DISCONNECT_SECONDS = 5
 
 
@@ -79,54 +95,41 @@ class GimbalThread(threading.Thread):
         )
 
     def _set_axis_state(self, bus: can.Bus, nid: int, state: int) -> None:
-        self._send(bus, nid, CMD_SET_AXIS_STATE, struct.pack("<I", state))
+        self._send(bus, nid, CMD_SET_AXIS_STATE, encode_set_axis_state(state))
 
     def _set_controller_mode(self, bus: can.Bus, nid: int) -> None:
         self._send(
             bus,
             nid,
             CMD_SET_CTRL_MODE,
-            struct.pack("<II", CTRL_MODE_POS, INPUT_MODE_TRAP),
+            encode_set_controller_mode(CTRL_MODE_POS, INPUT_MODE_TRAP),
         )
 
     def _set_traj_limits(
         self, bus: can.Bus, nid: int, vel_rps: float, acc_rps2: float
     ) -> None:
-        self._send(bus, nid, CMD_TRAJ_VEL_LIM, struct.pack("<f", vel_rps))
+        self._send(bus, nid, CMD_TRAJ_VEL_LIM, encode_set_traj_vel_limit(vel_rps))
         self._send(
-            bus, nid, CMD_TRAJ_ACCEL_LIM, struct.pack("<ff", acc_rps2, acc_rps2)
+            bus, nid, CMD_TRAJ_ACCEL_LIM, encode_set_traj_accel_limits(acc_rps2, acc_rps2)
         )
 
     def _set_input_pos(self, bus: can.Bus, nid: int, turns: float) -> None:
-        self._send(bus, nid, CMD_SET_INPUT_POS, struct.pack("<fhh", turns, 0, 0))
-
-    def _wait_cl(self, bus: can.Bus) -> None:
-        pending = set(NODE_IDS)
-        deadline = time.time() + 2
-        while pending:
-            msg = bus.recv(timeout=0.1)
-            if not msg:
-                if time.time() > deadline:
-                    raise RuntimeError
-                continue
-            if msg.arbitration_id & 0x1F != CMD_HEARTBEAT:
-                continue
-            nid = msg.arbitration_id >> 5
-            state = struct.unpack("<IBBB", msg.data[:7])[1]
-            if nid in pending and state == AXIS_CLOSED_LOOP:
-                pending.remove(nid)
-
-    def _read_turns(self, bus: can.Bus, nid: int, timeout: float = 0.1) -> float:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            msg = bus.recv(timeout=deadline - time.time())
-            if (
-                msg
-                and msg.arbitration_id >> 5 == nid
-                and msg.arbitration_id & 0x1F == CMD_ENCODER_EST
-            ):
-                return struct.unpack("<ff", msg.data)[0]
-        raise RuntimeError
+        self._send(bus, nid, CMD_SET_INPUT_POS, encode_set_input_pos(turns))
+
+    def _wait_cl(self, demux: CanDemux) -> None:
+        closed = demux.wait_all(
+            NODE_IDS, CMD_HEARTBEAT, after={}, timeout=2,
+            predicate=lambda hb: hb.axis_state == AXIS_CLOSED_LOOP,
+        )
+        if len(closed) != len(NODE_IDS):
+            raise RuntimeError
+
+    def _read_all_turns(self, demux: CanDemux, timeout: float = 0.1) -> Dict[int, float]:
+        # next cyclic encoder estimate of every axis, waited on together
+        est = demux.wait_all(NODE_IDS, CMD_ENCODER_EST, demux.seqs(NODE_IDS, CMD_ENCODER_EST), timeout)
+        if len(est) != len(NODE_IDS):
+            raise RuntimeError
+        return {nid: e.pos_estimate for nid, e in est.items()}
 
     def _nearest_turns(self, cur_turns: float, target_deg: float) -> float:
         cur_deg = (cur_turns * 360.0) % 360.0
@@ -137,20 +140,23 @@ class GimbalThread(threading.Thread):
         self._stop_evt.set()
 
     def run(self) -> None:
-        with can.interface.Bus(channel=BUS_CH, interface="socketcan") as bus:
+        with open_bus(BUS_CH, interface="socketcan") as bus:
             self._flush(bus)
+            demux = CanDemux(bus)
+            demux.start()
             for nid in NODE_IDS:
                 self._send(bus, nid, CMD_CLR_ERR)
                 self._set_controller_mode(bus, nid)
                 self._set_axis_state(bus, nid, AXIS_CLOSED_LOOP)
-            self._wait_cl(bus)
+            self._wait_cl(demux)
             try:
                 while not self._stop_evt.is_set():
                     goal_deg = [random.uniform(0, 360) for _ in NODE_IDS]
                     spd_deg = random.uniform(SPEED_MIN_DEG, SPEED_MAX_DEG)
                     vel_rps = spd_deg / 360.0
                     acc_rps2 = vel_rps * ACCEL_FACTOR
-                    cur_turns = {nid: self._read_turns(bus, nid) for nid in NODE_IDS}
+                    hb_after = demux.seqs(NODE_IDS, CMD_HEARTBEAT)
+                    cur_turns = self._read_all_turns(demux)
                     for nid, tgt in zip(NODE_IDS, goal_deg):
                         tgt_turns = self._nearest_turns(cur_turns[nid], tgt)
                         self._set_traj_limits(bus, nid, vel_rps, acc_rps2)
@@ -158,20 +164,19 @@ class GimbalThread(threading.Thread):
                     with shared_lock:
                         shared_state["goal_deg"] = goal_deg
                     done = set()
-                    while done != set(NODE_IDS):
-                        msg = bus.recv(timeout=0.05)
-                        if (
-                            msg
-                            and msg.arbitration_id & 0x1F == CMD_HEARTBEAT
-                            and struct.unpack("<IBBB", msg.data[:7])[3]
-                        ):
-                            done.add(msg.arbitration_id >> 5)
+                    while done != set(NODE_IDS) and not self._stop_evt.is_set():
+                        pending = [nid for nid in NODE_IDS if nid not in done]
+                        done.update(demux.wait_all(
+                            pending, CMD_HEARTBEAT, hb_after, timeout=0.05,
+                            predicate=lambda hb: hb.trajectory_done_flag,
+                        ))
                     limit = time.time() + MAX_SETTLE_S
                     while True:
                         enc = []
                         err = []
+                        turns = self._read_all_turns(demux)
                         for nid, tgt in zip(NODE_IDS, goal_deg):
-                            tr = self._read_turns(bus, nid)
+                            tr = turns[nid]
                             deg = (tr * 360.0) % 360.0
                             enc.append(deg)
                             err.append(err_short(tgt, deg))
@@ -184,10 +189,12 @@ class GimbalThread(threading.Thread):
             finally:
                 for nid in NODE_IDS:
                     self._set_axis_state(bus, nid, AXIS_IDLE)
+                demux.stop()
+                demux.join(timeout=1.0)
 
 
 class CSVLogger:
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, batched: bool = False):
         self._f = path.open("w", newline="")
         self._w = csv.writer(self._f)
         self._w.writerow(
@@ -212,6 +219,24 @@ class CSVLogger:
             ]
         )
         self._lock = threading.Lock()
+        # batched: rows are queued raw and formatted/written on a writer thread
+        self._writer = BatchedRowWriter(self._f, self._format_row) if batched else None
+
+    @staticmethod
+    def _format_row(raw: tuple) -> List[str]:
+        ts, mac, battery_pct, battery_volt, quat, enc, err, cmd = raw
+        row: List[str] = [
+            f"{ts:.6f}",
+            mac,
+            f"{battery_pct:.2f}" if battery_pct is not None else "",
+            f"{battery_volt:.3f}" if battery_volt is not None else "",
+        ]
+        if quat:
+            row.extend(f"{q:.6f}" for q in quat)
+        else:
+            row.extend(["", "", "", ""])
+        row.extend(f"{v:.3f}" for v in enc + err + cmd)
+        return row
 
     def log(
         self,
@@ -224,23 +249,24 @@ class CSVLogger:
             enc = shared_state["enc_deg"][:]
             err = shared_state["err_deg"][:]
             cmd = shared_state["goal_deg"][:]
-        row: List[str] = [
-            f"{time.time():.6f}",
-            mac,
-            f"{battery_pct:.2f}" if battery_pct is not None else "",
-            f"{battery_volt:.3f}" if battery_volt is not None else "",
-        ]
-        if quat:
-            row.extend(f"{q:.6f}" for q in quat)
-        else:
-            row.extend(["", "", "", ""])
-        row.extend(f"{v:.3f}" for v in enc + err + cmd)
+        raw = (time.time(), mac, battery_pct, battery_volt, quat, enc, err, cmd)
+        if self._writer:
+            self._writer.push(raw)
+            return
+        row = self._format_row(raw)
         with self._lock:
             self._w.writerow(row)
             self._f.flush()
 
+    def close(self) -> None:
+        if self._writer:
+            self._writer.close()
+        else:
+            with self._lock:
+                self._f.close()
+
 
-logger = CSVLogger(Path("tracker_gimbal_log.csv"))
+logger = CSVLogger(Path("tracker_gimbal_log.csv"), batched=True)
 
 
 @dataclass
@@ -257,75 +283,58 @@ class Tracker:
 
 
 class SlimeVRProtocol(asyncio.DatagramProtocol):
-    def __init__(self, stop_cb) -> None:
+    def __init__(self, stop_cb, reporter: StatusReporter[Tracker]) -> None:
         self.transport: asyncio.DatagramTransport | None = None
-        self.trackers: Dict[str, Tracker] = {}
-        self.addr_to_mac: Dict[Tuple[str, int], str] = {}
+        self.trackers: TrackerRegistry[Tracker] = TrackerRegistry(DISCONNECT_SECONDS)
         self._stop_cb = stop_cb
+        self._reporter = reporter
+        self._dispatch = PacketDispatcher({
+            PACKET_HANDSHAKE: self._handshake,
+            PACKET_BATTERY: self._battery,
+            PACKET_ROTATION: self._rotation,
+        })
 
     def connection_made(self, transport) -> None:
         self.transport = transport
         asyncio.get_event_loop().create_task(self._gc())
 
     def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
-        if data.startswith(HEADER_MAGIC) and data[3] == PACKET_HANDSHAKE:
-            self._handshake(data, addr)
-            return
-        if data[:1] == bytes([PACKET_HANDSHAKE]):
-            return
-        if not data.startswith(HEADER_MAGIC) or len(data) < HEADER_SIZE + 1:
+        self._dispatch(data, addr)
+
+    def _handshake(self, data: memoryview, addr: Tuple[str, int]) -> None:
+        mac = decode_handshake_mac(data)
+        if mac is None:
             return
-        pkt_type = data[3]
-        if pkt_type == PACKET_BATTERY:
-            self._battery(data, addr)
-        elif pkt_type == PACKET_ROTATION:
-            self._rotation(data, addr)
-
-    def _handshake(self, data: bytes, addr: Tuple[str, int]) -> None:
-        off = HEADER_SIZE + 24
-        fw_len = data[off]
-        off += 1 + fw_len
-        mac_bytes = data[off : off + 6]
-        mac = ":".join(f"{b:02x}" for b in mac_bytes)
         tracker = self.trackers.get(mac) or Tracker(mac=mac, addr=addr)
-        tracker.addr = addr
         tracker.seen()
-        self.trackers[mac] = tracker
-        self.addr_to_mac[addr] = mac
+        self.trackers.bind(tracker, addr)
         self._send(HANDSHAKE_RESPONSE, addr)
-        print(f"Handshake {tracker.mac} from {addr[0]}:{addr[1]}")
+        self._reporter.event(f"Handshake {tracker.mac} from {addr[0]}:{addr[1]}")
 
-    def _battery(self, data: bytes, addr: Tuple[str, int]) -> None:
+    def _battery(self, data: memoryview, addr: Tuple[str, int]) -> None:
         tracker = self._get(addr)
-        if not tracker or len(data) < HEADER_SIZE + 8:
+        batt = decode_battery(data) if tracker else None
+        if not batt:
             return
-        vol, pct = struct.unpack_from(">ff", data, HEADER_SIZE)
-        pct = pct * 100.0 if pct <= 1.0 else pct
+        vol, pct = batt
         tracker.battery = pct
         tracker.battery_volt = vol
         tracker.seen()
-        print(f"Battery {tracker.mac} {pct:.2f}% {vol:.3f}V")
+        self._reporter.update(tracker.mac, tracker)
         logger.log(tracker.mac, tracker.battery, tracker.battery_volt, tracker.quat)
 
-    def _rotation(self, data: bytes, addr: Tuple[str, int]) -> None:
+    def _rotation(self, data: memoryview, addr: Tuple[str, int]) -> None:
         tracker = self._get(addr)
-        if not tracker or len(data) < HEADER_SIZE + 2 + 16 + 1:
+        quat = decode_rotation(data) if tracker else None
+        if not quat:
             return
-        offset = HEADER_SIZE + 2
-        tracker.quat = struct.unpack_from(">ffff", data, offset)
+        tracker.quat = quat
         tracker.seen()
-        qx, qy, qz, qw = tracker.quat
-        bv = tracker.battery_volt
-        bp = tracker.battery
-        if bp is not None and bv is not None:
-            print(f"Rotation {tracker.mac} {qx:.6f} {qy:.6f} {qz:.6f} {qw:.6f} {bp:.2f}% {bv:.3f}V")
-        else:
-            print(f"Rotation {tracker.mac} {qx:.6f} {qy:.6f} {qz:.6f} {qw:.6f}")
+        self._reporter.update(tracker.mac, tracker)
         logger.log(tracker.mac, tracker.battery, tracker.battery_volt, tracker.quat)
 
     def _get(self, addr: Tuple[str, int]) -> Tracker | None:
-        mac = self.addr_to_mac.get(addr)
-        return self.trackers.get(mac) if mac else None
+        return self.trackers.get_by_addr(addr)
 
     def _send(self, payload: bytes, addr: Tuple[str, int]) -> None:
         if self.transport:
@@ -334,27 +343,33 @@ class SlimeVRProtocol(asyncio.DatagramProtocol):
     async def _gc(self) -> None:
         while True:
             await asyncio.sleep(1)
-            now = time.time()
-            to_remove = [
-                mac
-                for mac, trk in self.trackers.items()
-                if now - trk.last_seen > DISCONNECT_SECONDS
-            ]
-            for mac in to_remove:
-                tracker = self.trackers.pop(mac)
-                self.addr_to_mac.pop(tracker.addr, None)
+            for tracker in self.trackers.expire(time.time()):
+                self._reporter.remove(tracker.mac)
+                self._reporter.event(f"Disconnected {tracker.mac}")
                 if tracker.battery is not None and tracker.battery == 0:
                     self._stop_cb()
 
 
+def format_tracker(tracker: Tracker) -> str:
+    line = f"{tracker.mac}"
+    if tracker.quat is not None:
+        qx, qy, qz, qw = tracker.quat
+        line += f" {qx:.6f} {qy:.6f} {qz:.6f} {qw:.6f}"
+    if tracker.battery is not None and tracker.battery_volt is not None:
+        line += f" {tracker.battery:.2f}% {tracker.battery_volt:.3f}V"
+    return line
+
+
 def main() -> None:
     gimbal = GimbalThread()
     gimbal.start()
+    reporter: StatusReporter[Tracker] = StatusReporter(format_tracker)
+    reporter.start()
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     transport, _ = loop.run_until_complete(
         loop.create_datagram_endpoint(
-            lambda: SlimeVRProtocol(lambda: loop.call_soon_threadsafe(loop.stop)),
+            lambda: SlimeVRProtocol(lambda: loop.call_soon_threadsafe(loop.stop), reporter),
             local_addr=("0.0.0.0", SERVER_PORT),
         )
     )
@@ -364,6 +379,9 @@ def main() -> None:
         transport.close()
         gimbal.stop()
         gimbal.join()
+        reporter.stop()
+        reporter.join(timeout=1.0)
+        logger.close()
         loop.stop()
         loop.close()
         os._exit(0)
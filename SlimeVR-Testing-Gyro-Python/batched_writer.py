@@ -0,0 +1,146 @@
+"""Background CSV writer used by the CSVLogger classes in alllogs.py and integrated_all2.py.
+
+Producers only append a raw tuple to a bounded buffer. A dedicated thread
+formats the rows, writes them in batches and flushes by size or interval,
+so the UDP hot path never touches the file.
+
+Errors never stop the thread: a row format_row raises on is dropped, a
+write error marks the writer failed (error), after which rows are
+counted as dropped. Both are reported once with a [LOG] line.
+"""
+from __future__ import annotations
+
+import csv
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, IO, Iterable, List, Optional
+
+LOG_QUEUE_CAPACITY = 65536  # rows buffered before we start dropping (~9 min of 1 tracker @ 120 Hz)
+LOG_FLUSH_ROWS = 2048  # wake the writer early once this many rows are queued
+LOG_FLUSH_INTERVAL = 0.5  # seconds, upper bound on how stale the file can get
+
+
+class BatchedRowWriter:
+    def __init__(
+        self,
+        f: IO[str],
+        format_row: Callable[[tuple], Iterable[str]],
+        capacity: int = LOG_QUEUE_CAPACITY,
+        flush_rows: int = LOG_FLUSH_ROWS,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+    ) -> None:
+        self._f = f
+        self._w = csv.writer(f)
+        self._format_row = format_row
+        self._capacity = capacity
+        self._flush_rows = flush_rows
+        self._flush_interval = flush_interval
+        # deque append/popleft are atomic, so producers never take a lock
+        self._buf: Deque[tuple] = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.bad_rows = 0  # rows format_row raised on, dropped (and counted in dropped)
+        self.error: Optional[OSError] = None  # set once writing failed, later rows are dropped
+        self._thread = threading.Thread(target=self._run, name="csv-writer", daemon=True)
+        self._thread.start()
+
+    def push(self, row: tuple) -> bool:
+        """Queue one raw row, returns False (and counts a drop) if the buffer is full or the file failed."""
+        buf = self._buf
+        n = len(buf)
+        if n >= self._capacity or self._closed or self.error is not None:
+            self.dropped += 1
+            return False
+        buf.append(row)
+        if n + 1 == self._flush_rows:
+            self._wake.set()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._buf),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "bad_rows": self.bad_rows,
+            "failed": int(self.error is not None),
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting rows, the writer thread writes out everything still queued and closes the file.
+
+        Returns once it has, or after timeout; a slow disk then leaves the
+        last rows and the close to the writer thread, never to two threads.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+        if self.error is not None:
+            print(f"[LOG] CSV writer failed ({self.error}), {self.dropped} rows dropped")
+
+    def _format_batch(self, rows: List[tuple]) -> List[Iterable[str]]:
+        fmt = self._format_row
+        try:
+            return [fmt(row) for row in rows]
+        except Exception:
+            pass
+        # some row is bad: keep the others
+        out = []
+        for row in rows:
+            try:
+                out.append(fmt(row))
+            except Exception as e:
+                if not self.bad_rows:
+                    print(f"[LOG] CSV writer dropped a row it could not format: {e!r} (reported once)")
+                self.bad_rows += 1
+                self.dropped += 1
+        return out
+
+    def _drain(self) -> None:
+        buf = self._buf
+        n = len(buf)
+        if not n:
+            return
+        pop = buf.popleft
+        rows = [pop() for _ in range(n)]
+        if self.error is not None:
+            self.dropped += n
+            return
+        lines = self._format_batch(rows)
+        try:
+            self._w.writerows(lines)
+            self._f.flush()
+        except OSError as e:
+            # the file is dead (ENOSPC, EIO...), everything from here on is dropped
+            self.error = e
+            self.dropped += len(lines)
+            print(f"[LOG] CSV writer failed, logging stopped: {e}")
+            return
+        except Exception as e:
+            # csv.Error or the like from one batch, the file is still fine
+            self.dropped += len(lines)
+            print(f"[LOG] CSV writer dropped a batch of {len(lines)} rows: {e!r}")
+            return
+        self.written += len(lines)
+        self.batches += 1
+
+    def _run(self) -> None:
+        try:
+            while not self._closed:
+                self._wake.wait(self._flush_interval)
+                self._wake.clear()
+                self._drain()
+            self._drain()
+        finally:
+            try:
+                self._f.close()
+            except OSError as e:
+                if self.error is None:
+                    self.error = e
+                    print(f"[LOG] CSV writer failed on close: {e}")
+
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+#benchmark for BVH -> gimbal angles: the per-frame quaternion loop BVHSource.load used to run
+#vs. bvh_motion.joint_euler (whole chain as NumPy arrays). reports frames/s and the largest difference.
+#then every joint of the chain: one bvh_stream load per joint vs. bvh_multi.extract_joints in one pass.
+#without a file it writes a synthetic capture (5-joint chain, ZXY rotations, random walk).
+#usage: python bench_bvh.py [frames] [file.bvh JOINT [JOINT ...]]
+
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from bvh import Bvh
+
+from bvh_motion import joint_euler, joint_euler_reference
+from bvh_multi import extract_joints
+from bvh_stream import load_joint_euler
+
+CHAIN = ("Hips", "Spine", "Spine1", "Chest", "Neck")
+REFERENCE_FRAMES = 2000  # the reference loop is slow, it only runs on this many frames
+TO_GIMBAL_Q = (math.cos(0.3), math.sin(0.3), 0.0, 0.0)  # non-identity so that step is covered too
+
+
+def write_synthetic(path: str, frames: int) -> None:
+    rnd = random.Random(1)
+    with open(path, "w") as f:
+        f.write("HIERARCHY\n")
+        for depth, name in enumerate(CHAIN):
+            pad = "  " * depth
+            f.write(f"{pad}{'ROOT' if depth == 0 else 'JOINT'} {name}\n{pad}{{\n")
+            f.write(f"{pad}  OFFSET 0.0 {10.0 if depth else 0.0} 0.0\n")
+            if depth == 0:
+                f.write(f"{pad}  CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation\n")
+            else:
+                f.write(f"{pad}  CHANNELS 3 Zrotation Xrotation Yrotation\n")
+        pad = "  " * len(CHAIN)
+        f.write(f"{pad}End Site\n{pad}{{\n{pad}  OFFSET 0.0 5.0 0.0\n{pad}}}\n")
+        for depth in reversed(range(len(CHAIN))):
+            f.write("  " * depth + "}\n")
+        f.write(f"MOTION\nFrames: {frames}\nFrame Time: 0.008333\n")
+        angles = [0.0] * (3 * len(CHAIN))
+        for _ in range(frames):
+            angles = [a + rnd.gauss(0.0, 2.0) for a in angles]
+            f.write("0.0 90.0 0.0 " + " ".join(f"{(a + 180.0) % 360.0 - 180.0:.4f}" for a in angles) + "\n")
+
+
+def run(path: str, joint: str) -> None:
+    t0 = time.perf_counter()
+    with open(path) as f:
+        mocap = Bvh(f.read())
+    parse = time.perf_counter() - t0
+    n = len(mocap.frames)
+    print(f"{n} frames, joint {joint}, bvh parse {parse:.2f} s")
+
+    t0 = time.perf_counter()
+    vec = joint_euler(mocap, joint, TO_GIMBAL_Q)
+    t_vec = time.perf_counter() - t0
+
+    m = min(n, REFERENCE_FRAMES)
+    t0 = time.perf_counter()
+    ref = np.asarray(joint_euler_reference(mocap, joint, TO_GIMBAL_Q, m))
+    t_ref = time.perf_counter() - t0
+
+    # angles near +-180 may land on either side, compare on the circle
+    diff = np.abs((vec[:m] - ref + 180.0) % 360.0 - 180.0).max() if m else 0.0
+    print(f"{'reference':>10}: {m / t_ref:>12,.0f} frames/s ({m} frames)")
+    print(f"{'numpy':>10}: {n / t_vec:>12,.0f} frames/s ({n} frames, {t_vec * 1e3:.0f} ms) "
+          f"{(n / t_vec) / (m / t_ref):.0f}x, max diff {diff:.2e} deg")
+
+
+def run_multi(path: str, joints: list, workers: int) -> None:
+    t0 = time.perf_counter()
+    single = {j: load_joint_euler(path, j, TO_GIMBAL_Q)[0] for j in joints}
+    t_single = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    multi, _ = extract_joints(path, joints, TO_GIMBAL_Q, workers)
+    t_multi = time.perf_counter() - t0
+    n = len(multi[joints[0]])
+    diff = max(float(np.abs(multi[j] - single[j]).max()) for j in joints) if n else 0.0
+    print(f"{len(joints)} joints: per joint {n / t_single:>10,.0f} frames/s, one pass ({workers} workers) "
+          f"{n / t_multi:>10,.0f} frames/s {t_single / t_multi:.1f}x, max diff {diff:.2e} deg")
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    workers = os.cpu_count() or 1
+    if len(sys.argv) > 3:
+        run(sys.argv[2], sys.argv[3])
+        run_multi(sys.argv[2], sys.argv[3:], workers)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "synthetic.bvh")
+            write_synthetic(path, frames)
+            run(path, CHAIN[-2])
+            run_multi(path, list(CHAIN), workers)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+#microbenchmark for odrive_can (generated by dbc_codegen.py) against the ad-hoc parsing it replaces:
+#per-call format strings, bytes() copies and an if/elif chain on the command id.
+#named: DECODERS[cmd](data) -> NamedTuple, raw: STRUCTS[cmd].unpack_from(data) -> tuple.
+#usage: python bench_can.py [frames_per_type]
+
+import struct
+import sys
+import time
+
+import can
+
+from odrive_can import (
+    CMD_GET_ENCODER_ESTIMATES,
+    CMD_HEARTBEAT,
+    CMD_SET_INPUT_POS,
+    CMD_TX_SDO,
+    DECODERS,
+    STRUCTS,
+    encode_get_encoder_estimates,
+    encode_heartbeat,
+    encode_set_input_pos,
+    encode_tx_sdo,
+)
+
+NODE = 1
+
+FRAMES = {
+    "heartbeat": can.Message(arbitration_id=(NODE << 5) | CMD_HEARTBEAT,
+                             data=encode_heartbeat(0, 8, 0, 1) + b"\x00", is_extended_id=False),
+    "encoder": can.Message(arbitration_id=(NODE << 5) | CMD_GET_ENCODER_ESTIMATES,
+                           data=encode_get_encoder_estimates(1.25, -0.5), is_extended_id=False),
+    "input_pos": can.Message(arbitration_id=(NODE << 5) | CMD_SET_INPUT_POS,
+                             data=encode_set_input_pos(0.75, 0.25, 0.01), is_extended_id=False),
+    "tx_sdo": can.Message(arbitration_id=(NODE << 5) | CMD_TX_SDO,
+                          data=encode_tx_sdo(0, 232, 0, 10), is_extended_id=False),
+}
+
+
+def adhoc_decode(msg: can.Message):
+    # the pattern from heatbeatfinder.py / calibrator.py / odrive_sim.py before odrive_can
+    cmd = msg.arbitration_id & 0x1F
+    if cmd == 0x01:
+        return struct.unpack('<IBBB', bytes(msg.data[:7]))
+    elif cmd == 0x09:
+        return struct.unpack('<ff', bytes(msg.data[:8]))
+    elif cmd == 0x0C:
+        pos, vel_ff, torque_ff = struct.unpack('<fhh', bytes(msg.data[:8]))
+        return pos, vel_ff * 0.001, torque_ff * 0.001
+    elif cmd == 0x05:
+        return struct.unpack('<BHBI', bytes(msg.data[:8]))
+    return None
+
+
+def table_decode(msg: can.Message):
+    return DECODERS[msg.arbitration_id & 0x1F](msg.data)
+
+
+def raw_decode(msg: can.Message):
+    # same table, plain tuple of unscaled values (what the ad-hoc code returns for most frames)
+    return STRUCTS[msg.arbitration_id & 0x1F].unpack_from(msg.data)
+
+
+def _time(fn, msg: can.Message, n: int) -> float:
+    for _ in range(1000):
+        fn(msg)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(msg)
+    return time.perf_counter() - t0
+
+
+def _time_encode(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(0.75, 0.25, 0.01)
+    return time.perf_counter() - t0
+
+
+def run(n: int) -> None:
+    print(f"{'frame':>10} {'adhoc ns':>10} {'named ns':>10} {'raw ns':>10} {'named':>7} {'raw':>7}")
+    for name, msg in FRAMES.items():
+        assert tuple(table_decode(msg)) == adhoc_decode(msg) or name == "input_pos"
+        old = _time(adhoc_decode, msg, n)
+        named = _time(table_decode, msg, n)
+        raw = _time(raw_decode, msg, n)
+        print(f"{name:>10} {old / n * 1e9:>10.0f} {named / n * 1e9:>10.0f} {raw / n * 1e9:>10.0f} "
+              f"{old / named:>6.2f}x {old / raw:>6.2f}x")
+
+    def adhoc_input_pos(pos, vel_ff, torque_ff):
+        vel_i = max(-32768, min(32767, int(round(vel_ff * 1000.0))))
+        torque_i = max(-32768, min(32767, int(round(torque_ff * 1000.0))))
+        return struct.pack("<fhh", pos, vel_i, torque_i)
+
+    assert adhoc_input_pos(0.75, 0.25, 0.01) == encode_set_input_pos(0.75, 0.25, 0.01)
+    old = _time_encode(adhoc_input_pos, n)
+    new = _time_encode(encode_set_input_pos, n)
+    print(f"\n{'encode':>10} {'adhoc ns':>10} {'table ns':>10}")
+    print(f"{'input_pos':>10} {old / n * 1e9:>10.0f} {new / n * 1e9:>10.0f} {old / new:>6.2f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
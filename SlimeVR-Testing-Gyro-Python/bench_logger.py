@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+#benchmark for CSV logging: per-packet write+flush vs. BatchedRowWriter.
+#reports rows/s as seen by the producer and p50/p99/max enqueue latency.
+#usage: python bench_logger.py [rows]
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from batched_writer import BatchedRowWriter
+
+#same row shape as integrated_all2.CSVLogger
+RAW = (
+    0.0, "a1:b2:c3:d4:e5:f6", 87.5, 3.95,
+    (0.1, 0.2, 0.3, 0.927), (0.0, 0.0, 9.81),
+    (12.5, 45.0, 270.25), (0.0, 0.0, 0.0), (12.0, 45.5, 270.0),
+)
+
+
+def format_row(raw: tuple) -> List[str]:
+    ts, mac, battery_pct, battery_volt, quat, accel, enc_deg, err_deg, goal_deg = raw
+    row = [f"{ts:.6f}", mac, f"{battery_pct:.2f}", f"{battery_volt:.3f}"]
+    row.extend(f"{q:.6f}" for q in quat)
+    row.extend(f"{a:.6f}" for a in accel)
+    row.extend(f"{v:.3f}" for v in list(enc_deg) + list(err_deg) + list(goal_deg))
+    return row
+
+
+def _report(name: str, lat: List[float], total: float, extra: str = "") -> None:
+    lat.sort()
+    n = len(lat)
+    p50 = lat[n // 2] * 1e6
+    p99 = lat[int(n * 0.99)] * 1e6
+    print(f"{name:>8}: {n / total:>12,.0f} rows/s  p50 {p50:6.2f} us  p99 {p99:6.2f} us  max {lat[-1] * 1e6:8.1f} us {extra}")
+
+
+def bench_sync(path: str, n: int) -> None:
+    lat = []
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        clock = time.perf_counter
+        t_start = clock()
+        for i in range(n):
+            t0 = clock()
+            w.writerow(format_row((time.time(),) + RAW[1:]))
+            f.flush()
+            lat.append(clock() - t0)
+        total = clock() - t_start
+    _report("sync", lat, total)
+
+
+def bench_batched(path: str, n: int) -> None:
+    lat = []
+    f = open(path, "w", newline="")
+    writer = BatchedRowWriter(f, format_row)
+    clock = time.perf_counter
+    t_start = clock()
+    for i in range(n):
+        t0 = clock()
+        writer.push((time.time(),) + RAW[1:])
+        lat.append(clock() - t0)
+    total = clock() - t_start
+    t0 = clock()
+    writer.close()
+    drain = clock() - t0
+    stats = writer.stats()
+    _report("batched", lat, total, f"(close {drain * 1e3:.0f} ms, written {stats['written']}, dropped {stats['dropped']}, batches {stats['batches']})")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_sync(os.path.join(tmp, "sync.csv"), rows)
+        bench_batched(os.path.join(tmp, "batched.csv"), rows)
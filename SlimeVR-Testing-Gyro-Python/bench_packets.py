@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+#microbenchmark for slimevr_packets: packets/s through dispatch + decode, per packet type.
+#usage: python bench_packets.py [packets_per_type]
+
+import sys
+import time
+
+from slimevr_packets import (
+    PACKET_ACCELERATION,
+    PACKET_BATTERY,
+    PACKET_HANDSHAKE,
+    PACKET_ROTATION,
+    PACKET_ROTATION_AND_ACCELERATION,
+    PacketDispatcher,
+    build_acceleration,
+    build_battery,
+    build_handshake,
+    build_rotation,
+    build_rotation_and_accel,
+    decode_acceleration,
+    decode_battery,
+    decode_handshake_mac,
+    decode_rotation,
+    decode_rotation_and_accel,
+)
+
+ADDR = ("192.168.1.50", 50000)
+
+SAMPLES = {
+    PACKET_ROTATION: build_rotation((0.1, 0.2, 0.3, 0.927), counter=1),
+    PACKET_ROTATION_AND_ACCELERATION: build_rotation_and_accel((0.1, 0.2, 0.3, 0.927), (0.0, 0.0, 9.81), counter=2),
+    PACKET_ACCELERATION: build_acceleration((0.0, 0.0, 9.81), counter=3),
+    PACKET_BATTERY: build_battery(3.95, 0.87, counter=4),
+    PACKET_HANDSHAKE: build_handshake(bytes.fromhex("a1b2c3d4e5f6")),
+}
+
+
+def _sink(decode):
+    def handler(data, addr):
+        decode(data)
+    return handler
+
+
+def run(n: int) -> None:
+    dispatch = PacketDispatcher({
+        PACKET_ROTATION: _sink(decode_rotation),
+        PACKET_ROTATION_AND_ACCELERATION: _sink(decode_rotation_and_accel),
+        PACKET_ACCELERATION: _sink(decode_acceleration),
+        PACKET_BATTERY: _sink(decode_battery),
+        PACKET_HANDSHAKE: _sink(decode_handshake_mac),
+    })
+    print(f"{'type':>5} {'bytes':>6} {'packets/s':>12} {'ns/packet':>10}")
+    for pkt_type, pkt in SAMPLES.items():
+        for _ in range(1000):
+            dispatch(pkt, ADDR)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            dispatch(pkt, ADDR)
+        dt = time.perf_counter() - t0
+        print(f"{pkt_type:>5} {len(pkt):>6} {n / dt:>12,.0f} {dt / n * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
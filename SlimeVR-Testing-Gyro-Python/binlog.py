@@ -0,0 +1,195 @@
+"""Fixed-width binary tracker log, a compact alternative to integrated_tracker_log.csv.
+
+File layout: a 16-byte header (magic, record size) followed by packed
+little-endian records, so the whole file can be opened with numpy.memmap.
+Tracker MACs are interned to a uint16 id, the id -> MAC table lives in a
+side file "<log>.macs" with one MAC per line. Missing values are NaN.
+
+    python binlog.py integrated_tracker_log.bin                 # -> integrated_tracker_log.csv
+    python binlog.py integrated_tracker_log.bin -o run1.csv
+    python binlog.py integrated_tracker_log.bin --head 20       # print as a DataFrame
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+MAGIC = b"SVRBLOG1"
+FILE_HEADER = struct.Struct("<8sII")  # magic, record size, reserved
+
+FIELDS = (
+    "battery_pct", "battery_volt",
+    "qx", "qy", "qz", "qw",
+    "acc_x", "acc_y", "acc_z",
+    "enc_A", "enc_B", "enc_C",
+    "err_A", "err_B", "err_C",
+    "cmd_A", "cmd_B", "cmd_C",
+)
+# same columns (and order) as integrated_all2.CSVLogger
+CSV_COLUMNS = ("ts", "mac") + FIELDS
+# printf specs CSVLogger uses, so a converted file reads back identically
+_CSV_SPECS = (".2f", ".3f") + (".6f",) * 7 + (".3f",) * 9
+
+RECORD = struct.Struct("<dH2x%df" % len(FIELDS))  # ts, tracker id, pad, float32 fields
+
+FLUSH_INTERVAL = 0.5  # seconds
+
+_NAN = float("nan")
+_NAN3 = (_NAN, _NAN, _NAN)
+_NAN4 = (_NAN, _NAN, _NAN, _NAN)
+
+
+def record_dtype():
+    import numpy as np
+    return np.dtype(
+        [("ts", "<f8"), ("tracker", "<u2"), ("_pad", "V2")] + [(name, "<f4") for name in FIELDS]
+    )
+
+
+def macs_path(path: Path) -> Path:
+    return path.with_name(path.name + ".macs")
+
+
+def _read_macs(path: Path) -> List[str]:
+    p = macs_path(path)
+    if not p.exists():
+        return []
+    return [line.strip() for line in p.read_text().splitlines() if line.strip()]
+
+
+class BinaryLogger:
+    """Drop-in for integrated_all2.CSVLogger that appends packed records instead of text rows."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        size = path.stat().st_size if path.exists() else 0
+        if size >= FILE_HEADER.size:
+            with path.open("rb") as f:
+                magic, rec_size, _ = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != MAGIC or rec_size != RECORD.size:
+                raise RuntimeError(f"{path} is not a compatible binary log")
+            # drop a partial record left by a crash so appends stay aligned
+            whole = FILE_HEADER.size + (size - FILE_HEADER.size) // RECORD.size * RECORD.size
+            self._f = path.open("r+b")
+            self._f.truncate(whole)
+            self._f.seek(whole)
+        else:
+            self._f = path.open("wb")
+            self._f.write(FILE_HEADER.pack(MAGIC, RECORD.size, 0))
+        self._ids: Dict[str, int] = {mac: i for i, mac in enumerate(_read_macs(path))}
+        self._macs_f = macs_path(path).open("a")
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+        self.written = 0
+
+    def _tracker_id(self, mac: str) -> int:
+        tid = self._ids.get(mac)
+        if tid is None:
+            tid = len(self._ids)
+            self._ids[mac] = tid
+            self._macs_f.write(mac + "\n")
+            self._macs_f.flush()
+        return tid
+
+    def log(
+        self,
+        mac: str,
+        battery_pct: float | None,
+        battery_volt: float | None,
+        quat: Tuple[float, float, float, float] | None,
+        accel: Tuple[float, float, float] | None = None,
+        enc_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        err_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        goal_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+    ) -> None:
+        ts = time.time()
+        with self._lock:
+            rec = RECORD.pack(
+                ts, self._tracker_id(mac),
+                _NAN if battery_pct is None else battery_pct,
+                _NAN if battery_volt is None else battery_volt,
+                *(quat or _NAN4), *(accel or _NAN3),
+                *enc_deg, *err_deg, *goal_deg,
+            )
+            self._f.write(rec)
+            self.written += 1
+            if ts - self._last_flush > FLUSH_INTERVAL:
+                self._f.flush()
+                self._last_flush = ts
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "trackers": len(self._ids)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
+            self._macs_f.close()
+
+
+def load(path: Path):
+    """(records, macs): a read-only numpy.memmap over all whole records plus the id -> MAC table."""
+    import numpy as np
+    path = Path(path)
+    with path.open("rb") as f:
+        magic, rec_size, _ = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC or rec_size != RECORD.size:
+        raise RuntimeError(f"{path} is not a compatible binary log")
+    n = (path.stat().st_size - FILE_HEADER.size) // RECORD.size
+    dtype = record_dtype()
+    if n == 0:
+        return np.zeros(0, dtype=dtype), _read_macs(path)
+    records = np.memmap(path, dtype=dtype, mode="r", offset=FILE_HEADER.size, shape=(n,))
+    return records, _read_macs(path)
+
+
+def to_dataframe(path: Path):
+    """Same columns as the CSV log, mac as a categorical."""
+    import pandas as pd
+    records, macs = load(path)
+    cols = {"ts": records["ts"], "mac": pd.Categorical.from_codes(records["tracker"], macs)}
+    for name in FIELDS:
+        cols[name] = records[name]
+    return pd.DataFrame(cols)
+
+
+def to_csv(path: Path, out: Path, chunk: int = 65536) -> int:
+    """Write the CSVLogger text format, returns the number of rows."""
+    records, macs = load(path)
+    specs = _CSV_SPECS
+    n = len(records)
+    with Path(out).open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(CSV_COLUMNS)
+        for start in range(0, n, chunk):
+            rows = []
+            for rec in records[start:start + chunk].tolist():
+                row = [f"{rec[0]:.6f}", macs[rec[1]]]
+                row.extend("" if math.isnan(v) else format(v, spec) for v, spec in zip(rec[3:], specs))
+                rows.append(row)
+            w.writerows(rows)
+    return n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Convert a binary tracker log to CSV or inspect it with pandas")
+    ap.add_argument("log", type=Path)
+    ap.add_argument("-o", "--out", type=Path, help="CSV output path (default: <log>.csv)")
+    ap.add_argument("--head", type=int, metavar="N", help="print the first N rows as a DataFrame instead")
+    args = ap.parse_args()
+
+    if args.head is not None:
+        print(to_dataframe(args.log).head(args.head).to_string())
+        return
+    out = args.out or args.log.with_suffix(".csv")
+    n = to_csv(args.log, out)
+    print(f"wrote {n} rows to {out}")
+
+
+if __name__ == "__main__":
+    main()
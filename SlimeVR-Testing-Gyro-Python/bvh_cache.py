@@ -0,0 +1,143 @@
+"""On-disk cache of converted BVH trajectories (integrated_all2.BVHSource.load).
+
+The key hashes a fingerprint of the BVH file together with every
+parameter that shapes the result (joint, gimbal rotation, axis remap and
+signs), so editing the file or the config is a miss without any
+invalidation logic. The fingerprint is the file's size, mtime and a hash
+of its first and last FINGERPRINT_BYTES (the header and first motion
+rows, the end of the capture), not of the whole file: a multi-GB capture
+must not be read end to end before playback can start. An entry is two
+files:
+
+    <key>.npy   per-frame gimbal angles, loaded with mmap_mode="r"
+    <key>.json  frame_time plus what it was made from, for humans
+
+A warm start maps the .npy and never imports or runs the bvh parser.
+put() evicts least recently used entries (mtime, refreshed on every hit)
+until the directory is under max_bytes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+FINGERPRINT_BYTES = 1 << 20  # hashed at each end of the file
+CACHE_VERSION = 2  # bump when the stored angles or the key change meaning
+
+
+def file_fingerprint(path: str) -> str:
+    """Size, mtime and a hash of both ends of the file, reads at most 2 * FINGERPRINT_BYTES."""
+    st = os.stat(path)
+    h = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(FINGERPRINT_BYTES))
+        if st.st_size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, st.st_size - FINGERPRINT_BYTES))
+            h.update(f.read(FINGERPRINT_BYTES))
+    return h.hexdigest()
+
+
+def cache_key(fingerprint: str, **params: Any) -> str:
+    """Hash of a file_fingerprint() and params (JSON-serializable, order doesn't matter).
+
+    Take the fingerprint once per file, every joint's key derives from it.
+    """
+    doc = json.dumps({"v": CACHE_VERSION, "file": fingerprint, **params}, sort_keys=True)
+    return hashlib.sha256(doc.encode()).hexdigest()[:32]
+
+
+class TrajectoryCache:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, float]]:
+        """(memory-mapped angles, frame_time) or None."""
+        npy, meta = self._paths(key)
+        try:
+            with open(meta) as f:
+                frame_time = float(json.load(f)["frame_time"])
+            angles = np.load(npy, mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        now = time.time()
+        for p in (npy, meta):
+            try:
+                os.utime(p, (now, now))
+            except OSError:
+                pass
+        self.hits += 1
+        return angles, frame_time
+
+    def put(self, key: str, angles: np.ndarray, frame_time: float, info: Optional[Dict[str, Any]] = None) -> None:
+        """Store an entry (atomically, a crash never leaves half a file under the key), then evict."""
+        os.makedirs(self.directory, exist_ok=True)
+        npy, meta = self._paths(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(angles, dtype=np.float64))
+            os.replace(tmp, npy)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"frame_time": frame_time, "frames": len(angles), **(info or {})}, f, indent=2)
+            os.replace(tmp, meta)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=key)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """(last use, bytes, key) of every entry, oldest first."""
+        out: Dict[str, List[float]] = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        for name in names:
+            key, ext = os.path.splitext(name)
+            if ext not in (".npy", ".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            slot = out.setdefault(key, [0.0, 0])
+            slot[0] = max(slot[0], st.st_mtime)
+            slot[1] += st.st_size
+        return sorted((used, int(size), key) for key, (used, size) in out.items())
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Drop least recently used entries until the total is under max_bytes, returns how many went."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        dropped = 0
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for p in self._paths(key):
+                try:
+                    os.unlink(p)
+                except OSError:
+                    pass
+            total -= size
+            dropped += 1
+        return dropped
@@ -0,0 +1,288 @@
+"""BVH joint orientation -> per-frame gimbal Euler angles (integrated_all2.BVHSource), vectorized with NumPy.
+
+All rotation channels of the root->joint chain are pulled out of the
+motion data as one (frames x channels) float array. Every chain joint's
+local rotation is then the product of its per-channel axis quaternions,
+composed for all frames at once, and the global orientation is converted
+to Euler angles in one pass. Normalization happens at the same steps as
+joint_euler_reference(), the per-frame loop this replaces, so both agree
+to float rounding (bench_bvh.py checks it).
+
+Quaternions are (w, x, y, z) along the last axis.
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from bvh import Bvh
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0)
+DEFAULT_FRAME_TIME = 1.0 / 60.0
+
+
+# joint chain
+
+def _get_parent_name(mocap: Bvh, joint: str) -> Optional[str]:
+    try:
+        node = mocap.get_joint(joint)
+        if getattr(node, "parent", None):
+            return node.parent.name
+    except Exception:
+        pass
+    try:
+        return mocap.joint_parent(joint)
+    except Exception:
+        return None
+
+
+def chain_root_to_joint(mocap: Bvh, joint: str) -> List[str]:
+    chain = []
+    cur = joint
+    seen = set()
+    while cur and cur not in seen:
+        seen.add(cur)
+        chain.append(cur)
+        cur = _get_parent_name(mocap, cur)
+    chain.reverse()
+    return chain
+
+
+def joint_rot_channels(mocap: Bvh, joint: str) -> List[str]:
+    return [c for c in mocap.joint_channels(joint) if c.endswith("rotation")]
+
+
+def rot_columns(mocap: Bvh, joint: str) -> List[Tuple[int, str]]:
+    """(column in a motion row, axis letter) of every rotation channel of joint, in channel order."""
+    base = mocap.get_joint_channels_index(joint)
+    chans = mocap.joint_channels(joint)
+    return [(base + chans.index(c), c[0].upper()) for c in joint_rot_channels(mocap, joint)]
+
+
+def sane_frame_time(ft: float) -> float:
+    return ft if 1e-4 < ft < 1.0 else DEFAULT_FRAME_TIME
+
+
+def frame_time_of(mocap: Bvh) -> float:
+    return sane_frame_time(float(getattr(mocap, "frame_time", DEFAULT_FRAME_TIME)))
+
+
+def motion_array(mocap: Bvh, columns: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Motion rows as a (frames x channels) float64 array, only the given columns if any."""
+    rows = mocap.frames
+    if columns is not None:
+        rows = [[row[c] for c in columns] for row in rows]
+    if not rows:
+        return np.zeros((0, 0 if columns is None else len(columns)))
+    return np.array(rows, dtype=np.float64)
+
+
+# batched quaternion math
+
+def q_mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    aw, ax, ay, az = np.moveaxis(np.asarray(a, dtype=np.float64), -1, 0)
+    bw, bx, by, bz = np.moveaxis(np.asarray(b, dtype=np.float64), -1, 0)
+    return np.stack((
+        aw*bw - ax*bx - ay*by - az*bz,
+        aw*bx + ax*bw + ay*bz - az*by,
+        aw*by - ax*bz + ay*bw + az*bx,
+        aw*bz + ax*by - ay*bx + az*bw,
+    ), axis=-1)
+
+
+def q_normalize(q: np.ndarray) -> np.ndarray:
+    n = np.sqrt(np.sum(q * q, axis=-1, keepdims=True))
+    zero = n[..., 0] == 0
+    out = q / np.where(n == 0, 1.0, n)
+    if zero.any():
+        out[zero] = IDENTITY
+    return out
+
+
+def q_axis(axis: str, deg: np.ndarray) -> np.ndarray:
+    r = np.radians(deg) * 0.5
+    q = np.zeros(np.shape(deg) + (4,))
+    q[..., 0] = np.cos(r)
+    q[..., "XYZ".index(axis) + 1] = np.sin(r)
+    return q
+
+
+def q_to_euler_xyz_deg(q: np.ndarray) -> np.ndarray:
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    roll = np.degrees(np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y)))
+    # |sinp| >= 1 is gimbal lock, asin of the clipped value is the +-90 the scalar version returns
+    pitch = np.degrees(np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0)))
+    yaw = np.degrees(np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z)))
+    return np.stack((roll, pitch, yaw), axis=-1)
+
+
+def euler_xyz_deg_to_q(euler: np.ndarray) -> np.ndarray:
+    """Inverse of q_to_euler_xyz_deg (roll about x, pitch about y, yaw about z, applied z-y-x)."""
+    half = np.radians(euler) * 0.5
+    cr, cp, cy = np.moveaxis(np.cos(half), -1, 0)
+    sr, sp, sy = np.moveaxis(np.sin(half), -1, 0)
+    return np.stack((
+        cr*cp*cy + sr*sp*sy,
+        sr*cp*cy - cr*sp*sy,
+        cr*sp*cy + sr*cp*sy,
+        cr*cp*sy - sr*sp*cy,
+    ), axis=-1)
+
+
+def q_slerp(q0: np.ndarray, q1: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Row-wise slerp from q0 to q1 at fractions u, along the shorter arc."""
+    dot = np.sum(q0 * q1, axis=-1)
+    q1 = np.where((dot < 0)[..., None], -q1, q1)
+    dot = np.abs(dot)
+    u = np.asarray(u, dtype=np.float64)[..., None]
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))[..., None]
+    sin_theta = np.sin(theta)
+    # nearly parallel: sin(theta) ~ 0, plain lerp is exact enough there
+    near = sin_theta < 1e-6
+    safe = np.where(near, 1.0, sin_theta)
+    w0 = np.where(near, 1.0 - u, np.sin((1.0 - u) * theta) / safe)
+    w1 = np.where(near, u, np.sin(u * theta) / safe)
+    return q_normalize(w0 * q0 + w1 * q1)
+
+
+def local_quats(values: np.ndarray, axes: Sequence[str]) -> np.ndarray:
+    """(frames x 4) local rotation of a joint from its (frames x channels) rotation values."""
+    q = np.empty((len(values), 4))
+    q[:] = IDENTITY
+    if not axes:
+        return q
+    for k, axis in enumerate(axes):
+        q = q_mul(q, q_axis(axis, values[:, k]))
+    return q_normalize(q)
+
+
+def chain_euler(values: np.ndarray, joint_axes: Sequence[Sequence[str]], to_gimbal_q=IDENTITY) -> np.ndarray:
+    """Global orientation of the last joint as (frames x 3) Euler degrees.
+
+    values holds the rotation channels of every chain joint side by side,
+    joint_axes the axis letters per joint, root first.
+    """
+    qg = np.empty((len(values), 4))
+    qg[:] = IDENTITY
+    col = 0
+    for axes in joint_axes:
+        qg = q_mul(qg, local_quats(values[:, col:col + len(axes)], axes))
+        col += len(axes)
+    qg = q_normalize(qg)
+    qg = q_normalize(q_mul(np.asarray(to_gimbal_q, dtype=np.float64), qg))
+    return q_to_euler_xyz_deg(qg)
+
+
+def tree_euler(
+    values: np.ndarray,
+    nodes: Sequence[Tuple[str, Optional[str], Sequence[str]]],
+    targets: Sequence[str],
+    to_gimbal_q=IDENTITY,
+) -> Dict[str, np.ndarray]:
+    """chain_euler for several joints at once, every shared ancestor's product is computed once.
+
+    nodes is (joint, parent, axes) for the union of the target chains,
+    parents before children, values holds their rotation channels side by
+    side in that order. Gives the same numbers as chain_euler per target.
+    """
+    ident = np.empty((len(values), 4))
+    ident[:] = IDENTITY
+    glob: Dict[str, np.ndarray] = {}
+    col = 0
+    for name, parent, axes in nodes:
+        local = local_quats(values[:, col:col + len(axes)], axes)
+        glob[name] = q_mul(glob[parent] if parent is not None else ident, local)
+        col += len(axes)
+    gimbal = np.asarray(to_gimbal_q, dtype=np.float64)
+    return {t: q_to_euler_xyz_deg(q_normalize(q_mul(gimbal, q_normalize(glob[t])))) for t in targets}
+
+
+def joint_euler(mocap: Bvh, joint: str, to_gimbal_q=IDENTITY) -> np.ndarray:
+    """(frames x 3) gimbal Euler degrees of joint for every frame."""
+    chain = chain_root_to_joint(mocap, joint)
+    if not chain:
+        raise RuntimeError(f"Joint '{joint}' not found in BVH")
+    cols = [rot_columns(mocap, jn) for jn in chain]
+    values = motion_array(mocap, [c for jc in cols for c, _ in jc])
+    return chain_euler(values, [[a for _, a in jc] for jc in cols], to_gimbal_q)
+
+
+# the per-frame loop joint_euler() replaces, kept as the reference for bench_bvh.py
+
+def _q_mul(a, b):
+    aw, ax, ay, az = a
+    bw, bx, by, bz = b
+    return (
+        aw*bw - ax*bx - ay*by - az*bz,
+        aw*bx + ax*bw + ay*bz - az*by,
+        aw*by - ax*bz + ay*bw + az*bx,
+        aw*bz + ax*by - ay*bx + az*bw,
+    )
+
+
+def _q_normalize(q):
+    w, x, y, z = q
+    n = math.sqrt(w*w + x*x + y*y + z*z)
+    if n == 0:
+        return IDENTITY
+    return (w/n, x/n, y/n, z/n)
+
+
+def _q_to_euler_xyz_deg(q):
+    w, x, y, z = q
+    sinr_cosp = 2 * (w * x + y * z)
+    cosr_cosp = 1 - 2 * (x * x + y * y)
+    roll = math.degrees(math.atan2(sinr_cosp, cosr_cosp))
+    sinp = 2 * (w * y - z * x)
+    if abs(sinp) >= 1:
+        pitch = math.degrees(math.copysign(math.pi / 2, sinp))
+    else:
+        pitch = math.degrees(math.asin(sinp))
+    siny_cosp = 2 * (w * z + x * y)
+    cosy_cosp = 1 - 2 * (y * y + z * z)
+    yaw = math.degrees(math.atan2(siny_cosp, cosy_cosp))
+    return (roll, pitch, yaw)
+
+
+def _q_axis(axis: str, deg: float):
+    r = math.radians(deg) * 0.5
+    s, c = math.sin(r), math.cos(r)
+    if axis == "X":
+        return (c, s, 0.0, 0.0)
+    if axis == "Y":
+        return (c, 0.0, s, 0.0)
+    return (c, 0.0, 0.0, s)
+
+
+def _local_quat_from_channels(mocap: Bvh, frame_idx: int, joint: str) -> Tuple[float, float, float, float]:
+    chans = joint_rot_channels(mocap, joint)
+    q = IDENTITY
+    if not chans:
+        return q
+    vals = mocap.frame_joint_channels(frame_idx, joint, chans)
+    if len(vals) != len(chans):
+        raise RuntimeError(f"Channel/value mismatch for {joint}")
+    for ch_name, val in zip(chans, vals):
+        axis = ch_name[0].upper()
+        q = _q_mul(q, _q_axis(axis, float(val)))
+    return _q_normalize(q)
+
+
+def joint_euler_reference(
+    mocap: Bvh, joint: str, to_gimbal_q=IDENTITY, n_frames: Optional[int] = None,
+) -> List[Tuple[float, float, float]]:
+    chain = chain_root_to_joint(mocap, joint)
+    if not chain:
+        raise RuntimeError(f"Joint '{joint}' not found in BVH")
+    seq: List[Tuple[float, float, float]] = []
+    for i in range(len(mocap.frames) if n_frames is None else n_frames):
+        qg = IDENTITY
+        for jn in chain:
+            qg = _q_mul(qg, _local_quat_from_channels(mocap, i, jn))
+        qg = _q_normalize(qg)
+        qg = _q_normalize(_q_mul(to_gimbal_q, qg))
+        seq.append(_q_to_euler_xyz_deg(qg))
+    return seq
@@ -0,0 +1,131 @@
+"""Several joints of one BVH capture in one pass, frame ranges spread over a process pool.
+
+For a multi-gimbal run every gimbal follows a different joint (CHEST,
+HIPS, limbs) of the same capture. extract_joints() reads the motion data
+once for all of them. It keeps the rotation columns of the union of
+their root->joint chains and composes each ancestor's global rotation a
+single time (bvh_motion.tree_euler), however many chains share it.
+
+Files over PARALLEL_MIN_BYTES are split into byte ranges on line
+boundaries. The ranges are converted in worker processes and the results
+are concatenated in frame order. The output is the same as converting
+each joint on its own with bvh_stream.
+
+    python bvh_multi.py capture.bvh CHEST HIPS LeftForeArm --workers 4 -o joints.npz
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bvh_motion import IDENTITY, tree_euler
+from bvh_stream import CHUNK_BYTES, BvhHeader, parse_block, read_header
+
+PARALLEL_MIN_BYTES = 32 << 20  # smaller files are converted in the calling process
+RANGES_PER_WORKER = 4  # more ranges than workers evens out uneven line lengths
+
+Plan = List[Tuple[str, Optional[str], List[str]]]  # (joint, parent, axes) as tree_euler wants them
+
+
+def plan_joints(header: BvhHeader, joints: Sequence[str]) -> Tuple[Plan, List[int]]:
+    """tree_euler nodes for the union of the joints' chains (file order) and the motion columns they read."""
+    needed = set()
+    for joint in joints:
+        needed.update(header.chain(joint))
+    plan: Plan = []
+    columns: List[int] = []
+    for name, j in header.joints.items():
+        if name not in needed:
+            continue
+        rot = header.rot_columns(name)
+        plan.append((name, j.parent, [a for _, a in rot]))
+        columns.extend(c for c, _ in rot)
+    return plan, columns
+
+
+def line_ranges(path: str, start: int, parts: int) -> List[Tuple[int, int]]:
+    """[start, file end) cut into about `parts` byte ranges that each begin at a line start."""
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, "rb") as f:
+        for k in range(1, parts):
+            f.seek(start + (size - start) * k // parts - 1)
+            f.readline()
+            bounds.append(max(bounds[-1], min(f.tell(), size)))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _extract_range(
+    path: str, begin: int, end: int, width: int, columns: List[int], plan: Plan, targets: List[str], to_gimbal_q,
+) -> Dict[str, np.ndarray]:
+    cols = np.asarray(columns, dtype=np.intp)
+    parts: Dict[str, List[np.ndarray]] = {t: [] for t in targets}
+    with open(path, "rb") as f:
+        f.seek(begin)
+        left = end - begin
+        tail = b""
+        while left > 0:
+            buf = f.read(min(CHUNK_BYTES, left))
+            if not buf:
+                break
+            left -= len(buf)
+            # ranges end on a line boundary, only a block inside one is cut after its last full row
+            buf = tail + buf
+            cut = buf.rfind(b"\n") + 1 if left > 0 else len(buf)
+            buf, tail = buf[:cut], buf[cut:]
+            block = parse_block(buf, width, cols)
+            if len(block):
+                for t, euler in tree_euler(block, plan, targets, to_gimbal_q).items():
+                    parts[t].append(euler)
+    return {t: np.concatenate(p) if p else np.zeros((0, 3)) for t, p in parts.items()}
+
+
+def extract_joints(
+    path: str, joints: Sequence[str], to_gimbal_q=IDENTITY, workers: Optional[int] = None,
+) -> Tuple[Dict[str, np.ndarray], float]:
+    """({joint: (frames x 3) gimbal Euler degrees}, frame_time), workers=None uses every CPU."""
+    with open(path, "rb") as f:
+        header = read_header(f)
+    plan, columns = plan_joints(header, joints)
+    targets = list(dict.fromkeys(joints))
+    workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+    if workers == 1 or os.path.getsize(path) - header.motion_offset < PARALLEL_MIN_BYTES:
+        ranges = line_ranges(path, header.motion_offset, 1)
+        results = [_extract_range(path, a, b, header.channels, columns, plan, targets, to_gimbal_q) for a, b in ranges]
+    else:
+        ranges = line_ranges(path, header.motion_offset, workers * RANGES_PER_WORKER)
+        # spawn, not fork: a caller may have CAN or UI threads whose locks fork would copy held
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = [pool.submit(_extract_range, path, a, b, header.channels, columns, plan, targets, to_gimbal_q)
+                       for a, b in ranges]
+            results = [fut.result() for fut in futures]
+    out = {t: np.concatenate([r[t] for r in results]) if results else np.zeros((0, 3)) for t in targets}
+    return out, header.frame_time
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Convert several BVH joints to gimbal angles in one pass")
+    ap.add_argument("bvh")
+    ap.add_argument("joints", nargs="+")
+    ap.add_argument("--workers", type=int, default=None, help="processes, default every CPU")
+    ap.add_argument("-o", "--out", default=None, help=".npz with one (frames x 3) array per joint and frame_time")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    angles, frame_time = extract_joints(args.bvh, args.joints, workers=args.workers)
+    dt = time.perf_counter() - t0
+    n = len(next(iter(angles.values())))
+    print(f"[BVH] {len(angles)} joints x {n} frames in {dt:.2f} s ({n / dt:,.0f} frames/s)")
+    if args.out:
+        np.savez(args.out, frame_time=frame_time, **angles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""BVH angles resampled onto the gimbal's output tick grid (integrated_all2.BVHGimbalThread).
+
+Tick k shows the capture at BVH time k * period * speed. Between the two
+frames around that instant the orientation is slerped, not interpolated
+per Euler angle, so fast motion and wraps through +-180 take the short
+way at the right time. The result is converted to the gimbal axes
+(remap, sign), unwrapped across +-180 so consecutive ticks never differ
+by a whole turn, and stored per tick together with the speed limit the
+trapezoidal move towards it needs. The control loop only indexes arrays.
+
+Frames may arrive in blocks (bvh_stream.ProgressiveLoad): extend() adds
+the ticks the loaded frames cover and `ready` says how many are valid.
+"""
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+from bvh_motion import euler_xyz_deg_to_q, q_slerp, q_to_euler_xyz_deg
+
+
+class GimbalTrajectory:
+    def __init__(
+        self,
+        frame_time: float,
+        period: float,
+        speed: float,
+        remap: Sequence[int],
+        sign: Sequence[float],
+        speed_min_deg: float,
+        speed_max_deg: float,
+    ) -> None:
+        self.frame_time = frame_time
+        self.period = period  # wall-clock seconds per tick
+        self.step = period * speed  # BVH seconds per tick
+        self._remap = list(remap)
+        self._sign = np.asarray(sign, dtype=np.float64)
+        self._speed_min = speed_min_deg
+        self._speed_max = speed_max_deg
+        self.goal_deg = np.zeros((0, 3))  # unwrapped gimbal angles per tick
+        self.speed_deg = np.zeros(0)  # trapezoid speed limit per tick, deg/s
+        self.ready = 0  # ticks computed so far
+        self.n_ticks = 0  # ticks the whole capture spans
+        self.frames_seen = 0
+        self.complete = False
+
+    def ticks_for(self, n_frames: int) -> int:
+        return max(1, int(math.ceil(n_frames * self.frame_time / self.step)))
+
+    def extend(self, frames: np.ndarray, loaded: int, complete: bool) -> int:
+        """Add the ticks frames[:loaded] cover (all of them once complete), returns how many were added."""
+        n = len(frames)
+        if not loaded or (loaded == self.frames_seen and complete == self.complete):
+            return 0
+        self.n_ticks = self.ticks_for(n)
+        if len(self.goal_deg) < self.n_ticks:
+            self.goal_deg = np.resize(self.goal_deg, (self.n_ticks, 3))
+            self.speed_deg = np.resize(self.speed_deg, self.n_ticks)
+        self.frames_seen = loaded
+        self.complete = complete
+        self.ready = min(self.ready, self.n_ticks)  # the file held fewer frames than it declared
+        if complete:
+            end = self.n_ticks
+        else:
+            # ticks whose later frame is loaded, the last loaded frame only ends a span
+            end = min(self.n_ticks, int((loaded - 1) * self.frame_time / self.step) + 1)
+        start = self.ready
+        if end > start:
+            f = np.arange(start, end) * (self.step / self.frame_time)
+            i0 = np.minimum(np.floor(f).astype(np.intp), loaded - 1)
+            i1 = np.minimum(i0 + 1, loaded - 1)
+            u = np.clip(f - i0, 0.0, 1.0)
+            euler = np.asarray(frames[:loaded], dtype=np.float64)
+            lo = int(i0[0])
+            q = euler_xyz_deg_to_q(euler[lo:int(i1[-1]) + 1])
+            qt = q_slerp(q[i0 - lo], q[i1 - lo], u)
+            goal = q_to_euler_xyz_deg(qt)[:, self._remap] * self._sign
+            if start:
+                # continue the unwrap from the last tick already stored
+                goal = np.unwrap(np.vstack((self.goal_deg[start - 1], goal)), period=360.0, axis=0)[1:]
+                prev = np.vstack((self.goal_deg[start - 1], goal[:-1]))
+            else:
+                goal = np.unwrap(goal, period=360.0, axis=0)
+                prev = np.vstack((goal[:1], goal[:-1]))
+            self.goal_deg[start:end] = goal
+            self.speed_deg[start:end] = self._speed(goal - prev)
+            self.ready = end
+        if complete:
+            self.goal_deg = self.goal_deg[:self.n_ticks]
+            self.speed_deg = self.speed_deg[:self.n_ticks]
+            # tick 0 follows the last one when looping
+            wrap = (self.goal_deg[0] - self.goal_deg[-1] + 180.0) % 360.0 - 180.0
+            self.speed_deg[0] = self._speed(wrap[None, :])[0]
+        return max(0, end - start)
+
+    def _speed(self, step_deg: np.ndarray) -> np.ndarray:
+        return np.clip(np.abs(step_deg).max(axis=1) / self.period, self._speed_min, self._speed_max)
@@ -0,0 +1,184 @@
+"""Streaming BVH reader for motion files too big to parse whole (integrated_all2.BVHSource.load).
+
+The bvh library tokenizes the entire file into a tree of strings before
+the first frame is usable. Here the HIERARCHY is parsed once into joint
+names, parents and channel columns, then the MOTION lines are read in
+blocks of CHUNK_BYTES. Each block becomes one float array, only the
+columns of the wanted joint chain are kept, and it is converted with
+bvh_motion.chain_euler straight away. Memory is the (frames x 3) result
+plus one block.
+
+ProgressiveLoad runs that in a thread and fills a preallocated array,
+`loaded` says how many rows are valid so far, so playback can start as
+soon as the first block is in.
+"""
+from __future__ import annotations
+
+import threading
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bvh_motion import IDENTITY, chain_euler, sane_frame_time
+
+CHUNK_BYTES = 256 << 10  # motion text per block, small blocks keep GIL pauses for the control loop short
+
+
+class Joint(NamedTuple):
+    name: str
+    parent: Optional[str]
+    channels: List[str]
+    column: int  # first channel's column in a motion row
+
+
+class BvhHeader(NamedTuple):
+    joints: Dict[str, Joint]  # file order
+    channels: int  # values per motion row
+    frames: int  # as declared by "Frames:"
+    frame_time: float
+    motion_offset: int  # byte offset of the first motion row
+
+    def chain(self, joint: str) -> List[str]:
+        """joint and its ancestors, root first."""
+        if joint not in self.joints:
+            raise RuntimeError(f"Joint '{joint}' not found in BVH")
+        chain = []
+        cur: Optional[str] = joint
+        while cur is not None:
+            chain.append(cur)
+            cur = self.joints[cur].parent
+        chain.reverse()
+        return chain
+
+    def rot_columns(self, joint: str) -> List[Tuple[int, str]]:
+        """(column, axis letter) of joint's rotation channels, in channel order (see bvh_motion.rot_columns)."""
+        j = self.joints[joint]
+        return [(j.column + k, c[0].upper()) for k, c in enumerate(j.channels) if c.endswith("rotation")]
+
+
+def read_header(f: BinaryIO) -> BvhHeader:
+    """Parse up to and including the "Frame Time:" line, f is left at the first motion row."""
+    joints: Dict[str, Joint] = {}
+    stack: List[Optional[str]] = []  # open blocks, None for End Site
+    pending: Optional[str] = None  # joint whose "{" comes next
+    column = 0
+    frames = 0
+    while True:
+        raw = f.readline()
+        if not raw:
+            raise RuntimeError("BVH ends before the motion data")
+        tok = raw.decode("ascii", "replace").split()
+        if not tok:
+            continue
+        word = tok[0]
+        if word in ("ROOT", "JOINT"):
+            pending = tok[1]
+            parent = next((s for s in reversed(stack) if s is not None), None)
+            joints[pending] = Joint(pending, parent, [], column)
+        elif word == "End":
+            pending = None
+        elif word == "{":
+            stack.append(pending)
+            pending = None
+        elif word == "}":
+            stack.pop()
+        elif word == "CHANNELS":
+            name = stack[-1]
+            chans = tok[2:2 + int(tok[1])]
+            joints[name] = joints[name]._replace(channels=chans, column=column)
+            column += len(chans)
+        elif word == "Frames:":
+            frames = int(tok[1])
+        elif word == "Frame" and len(tok) > 2:
+            return BvhHeader(joints, column, frames, sane_frame_time(float(tok[2])), f.tell())
+
+
+def iter_motion(
+    f: BinaryIO, header: BvhHeader, columns: Sequence[int], chunk_bytes: int = CHUNK_BYTES,
+) -> Iterator[np.ndarray]:
+    """(rows x len(columns)) float64 blocks of the motion data, f positioned at header.motion_offset."""
+    cols = np.asarray(columns, dtype=np.intp)
+    while True:
+        lines = f.readlines(chunk_bytes)
+        if not lines:
+            return
+        block = parse_block(b" ".join(lines), header.channels, cols)
+        if len(block):
+            yield block
+
+
+def parse_block(text: bytes, width: int, cols: np.ndarray) -> np.ndarray:
+    """Whole motion rows of text as (rows x len(cols)) float64."""
+    values = np.array(text.split(), dtype=np.float64)
+    if len(values) % width:
+        raise RuntimeError(f"BVH motion block has {len(values)} values, not a multiple of {width} channels")
+    return values.reshape(-1, width)[:, cols]
+
+
+class ProgressiveLoad(threading.Thread):
+    """Converts one joint of a BVH file in the background into angles[:loaded]."""
+
+    def __init__(
+        self,
+        path: str,
+        joint: str,
+        to_gimbal_q=IDENTITY,
+        on_done: Optional[Callable[["ProgressiveLoad"], None]] = None,
+    ) -> None:
+        super().__init__(daemon=True, name="bvh-load")
+        self._f = open(path, "rb")
+        try:
+            self.header = read_header(self._f)
+            chain = self.header.chain(joint)
+        except BaseException:
+            self._f.close()
+            raise
+        cols = [self.header.rot_columns(jn) for jn in chain]
+        self._columns = [c for jc in cols for c, _ in jc]
+        self._axes = [[a for _, a in jc] for jc in cols]
+        self._to_gimbal_q = to_gimbal_q
+        self._on_done = on_done
+        self.angles = np.zeros((self.header.frames, 3))
+        self.loaded = 0  # rows of angles that are valid, only grows
+        self.error: Optional[BaseException] = None
+        self.first = threading.Event()  # the first block is in (or the load ended)
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        try:
+            with self._f:
+                for block in iter_motion(self._f, self.header, self._columns):
+                    euler = chain_euler(block, self._axes, self._to_gimbal_q)
+                    end = self.loaded + len(euler)
+                    if end > len(self.angles):
+                        # more rows than "Frames:" declared, readers keep the old array until they look again
+                        grown = np.zeros((max(end, 2 * len(self.angles)), 3))
+                        grown[:self.loaded] = self.angles[:self.loaded]
+                        self.angles = grown
+                    self.angles[self.loaded:end] = euler
+                    self.loaded = end
+                    self.first.set()
+            if self.loaded != len(self.angles):
+                self.angles = self.angles[:self.loaded]
+            if self._on_done is not None:
+                self._on_done(self)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.first.set()
+            self.done.set()
+
+    def result(self, timeout: Optional[float] = None) -> np.ndarray:
+        """All angles once the load has finished, raises what the loader thread raised."""
+        if not self.done.wait(timeout):
+            raise TimeoutError("BVH still loading")
+        if self.error is not None:
+            raise self.error
+        return self.angles
+
+
+def load_joint_euler(path: str, joint: str, to_gimbal_q=IDENTITY) -> Tuple[np.ndarray, float]:
+    """(frames x 3) angles and frame_time, read in the calling thread."""
+    load = ProgressiveLoad(path, joint, to_gimbal_q)
+    load.run()
+    return load.result(), load.header.frame_time
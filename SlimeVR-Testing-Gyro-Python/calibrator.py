@@ -1,13 +1,18 @@
-import can, struct, time
+import can, os, time
+
+from can_daemon import open_bus
+from odrive_can import CMD_HEARTBEAT, CMD_RX_SDO, CMD_SET_AXIS_STATE, decode_heartbeat, encode_rx_sdo, encode_set_axis_state
+from odrive_sdo import SDO_WRITE, load_endpoints
 
 NODE = 1
-bus = can.interface.Bus("can0", interface="socketcan")
+SAVE_CONFIGURATION = load_endpoints()["save_configuration"].id
+bus = open_bus(os.environ.get("CAN_CHANNEL", "can0"), interface="socketcan")
 
 while bus.recv(timeout=0): pass
 
 bus.send(can.Message(
-    arbitration_id=(NODE << 5) | 0x07, # Set_Axis_State
-    data=struct.pack('<I', 3), # 3 = FULL_CALIBRATION_SEQUENCE
+    arbitration_id=(NODE << 5) | CMD_SET_AXIS_STATE,
+    data=encode_set_axis_state(3), # 3 = FULL_CALIBRATION_SEQUENCE
     is_extended_id=False
 ))
 
@@ -16,9 +21,12 @@ while True:
     msg = bus.recv(timeout=5)
     if not msg:
         raise RuntimeError("Timeout while waiting for heartbeat")
-    if msg.arbitration_id != ((NODE << 5) | 0x01): # Heartbeat?
+    if msg.arbitration_id != ((NODE << 5) | CMD_HEARTBEAT):
+        continue
+    hb = decode_heartbeat(msg.data)
+    if hb is None:
         continue
-    error, state, _, _ = struct.unpack('<IBBB', bytes(msg.data[:7]))
+    error, state = hb.axis_error, hb.axis_state
     if error:
         raise RuntimeError(f"Calibration failed, error 0x{error:08X}")
     if state == 1: # back in IDLE
@@ -26,8 +34,8 @@ while True:
 
 print("Calibration succeeded, saving …")
 bus.send(can.Message(
-    arbitration_id=(NODE << 5) | 0x04, # RxSdo
-    data=struct.pack('<BHB', 0x01, 0x0253, 0), # OPCODE_WRITE, endpoint 'save_configuration'
+    arbitration_id=(NODE << 5) | CMD_RX_SDO,
+    data=encode_rx_sdo(SDO_WRITE, SAVE_CONFIGURATION),
     is_extended_id=False
 ))
 print("Saved, you can now switch to CLOSED_LOOP_CONTROL.")
@@ -0,0 +1,491 @@
+"""Single owner of a CAN interface, shared with any number of local scripts over a Unix socket.
+
+    python can_daemon.py --channel can0
+    python heatbeatfinder.py        # answers from the daemon's cache
+    python integrated_all2.py       # and get_encoder_pos.py etc. at the same time
+
+The daemon opens the bus once, reads every frame and keeps the latest
+heartbeat and encoder estimate per node. Clients connect to
+socket_path(channel) and speak JSON lines:
+
+    -> {"op": "tx", "id": 39, "data": "08000000"}            # rtr: true + dlc for remote frames
+    -> {"op": "tx", ..., "timeout": 0, "ack": true}          # answered {"op": "tx_ok"} or tx_error
+    -> {"op": "subscribe", "nodes": [1, 2], "cmds": null}     # null = all, answered {"op": "ok"}
+    -> {"op": "state", "max_age": 2.0}                        # answered {"op": "state", "nodes": {...}},
+                                                              # entries older than max_age (s) left out
+    <- {"op": "rx", "t": 1234.5678, "id": 41, "data": "..."}  # subscribed frames, bus or other clients' tx,
+                                                              # t is time.monotonic()
+    <- {"op": "tx_error", "msg": "..."}                       # a tx the bus refused TX_RETRIES times
+                                                              # (or within its timeout), "ack": true if asked
+
+Scripts use open_bus(), which returns a DaemonBus (a python-can bus
+backed by the socket) when a daemon serves the channel and opens the
+interface directly otherwise, so CanDemux, CanTxScheduler and plain
+bus.send()/recv() work the same either way. A frame one client sends is
+delivered to the other subscribed clients once it is on the bus, but not
+back to the sender, same as separate sockets on one socketcan interface.
+The cache only holds what nodes sent and keeps it until it is replaced,
+so a node that went silent keeps its last entry: check the *_age fields
+or ask state with max_age. send() with a timeout
+waits for the daemon's answer and raises CanOperationError when the bus
+refused the frame for that long, timeout=0 is a single attempt, like a
+non-blocking socketcan send; without one it returns straight away.
+
+The socket is created owner-only (SOCKET_MODE): whoever can connect can
+drive the motors. A second daemon for the same path refuses to start.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import can
+
+from can_demux import CMD_ENCODER_EST, CMD_HEARTBEAT, DECODERS, EncoderEstimate, Heartbeat
+
+SOCKET_DIR = os.environ.get("CAN_DAEMON_DIR", "/tmp")
+CLIENT_QUEUE = 4096  # outgoing messages per client, rx frames beyond this are dropped for that client
+TX_RETRIES = 10  # attempts for a tx without a timeout
+TX_BACKOFF_S = 0.0005  # first wait between attempts, doubles up to 10 ms
+SOCKET_MODE = 0o600
+REQUEST_TIMEOUT_S = 1.0
+RECV_POLL_S = 0.1
+
+_CACHED = (CMD_HEARTBEAT, CMD_ENCODER_EST)
+
+
+def socket_path(channel: str) -> str:
+    return os.path.join(SOCKET_DIR, f"can-daemon-{channel}.sock")
+
+
+class NodeState(NamedTuple):
+    heartbeat: Optional[Heartbeat]
+    heartbeat_age: Optional[float]  # seconds since it arrived
+    encoder: Optional[EncoderEstimate]
+    encoder_age: Optional[float]
+
+
+def _encode(obj: Dict[str, Any]) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode() + b"\n"
+
+
+# daemon side
+
+class _Client:
+    def __init__(self, conn: socket.socket, name: str) -> None:
+        self.conn = conn
+        self.name = name
+        self.nodes: Optional[frozenset] = frozenset()  # subscribed node ids, None = all, empty = none
+        self.cmds: Optional[frozenset] = None
+        self.out: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=CLIENT_QUEUE)
+        self.dropped = 0
+
+    def wants(self, nid: int, cmd: int) -> bool:
+        return ((self.nodes is None or nid in self.nodes)
+                and (self.cmds is None or cmd in self.cmds))
+
+    def push(self, data: bytes) -> None:
+        try:
+            self.out.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def writer(self) -> None:
+        while True:
+            data = self.out.get()
+            if data is None:
+                return
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                return
+
+
+class CanBusDaemon:
+    def __init__(self, bus: can.BusABC, path: str) -> None:
+        self._bus = bus
+        self._path = path
+        self._clients: List[_Client] = []
+        self._clients_lock = threading.Lock()
+        self._cache: Dict[Tuple[int, int], Tuple[Any, float]] = {}  # (nid, cmd) -> (decoded, monotonic stamp)
+        self._next_client = 0
+        self.rx_frames = 0
+        self.tx_frames = 0
+        self.tx_errors = 0
+
+    # bus -> cache and subscribers
+
+    def _reader(self, stop_evt: threading.Event) -> None:
+        while not stop_evt.is_set():
+            try:
+                msg = self._bus.recv(timeout=RECV_POLL_S)
+            except can.CanError:
+                time.sleep(RECV_POLL_S)
+                continue
+            if msg is None or msg.is_error_frame:
+                continue
+            stamp = time.monotonic()
+            self.rx_frames += 1
+            arb = msg.arbitration_id
+            nid, cmd = arb >> 5, arb & 0x1F
+            if cmd in _CACHED and not msg.is_remote_frame:
+                value = DECODERS[cmd](msg.data)
+                if value is not None:
+                    self._cache[(nid, cmd)] = (value, stamp)
+            self._fanout(msg, stamp)
+
+    def _fanout(self, msg: can.Message, stamp: float, sender: Optional[_Client] = None) -> None:
+        arb = msg.arbitration_id
+        nid, cmd = arb >> 5, arb & 0x1F
+        frame = {"op": "rx", "t": round(stamp, 6), "id": arb, "data": bytes(msg.data or b"").hex()}
+        if msg.is_remote_frame:
+            frame["rtr"] = True
+            frame["dlc"] = msg.dlc
+        data = None
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            if client is not sender and client.wants(nid, cmd):
+                if data is None:
+                    data = _encode(frame)
+                client.push(data)
+
+    # clients -> bus
+
+    def _send(self, client: _Client, req: Dict[str, Any]) -> Optional[str]:
+        rtr = bool(req.get("rtr"))
+        data = bytes.fromhex(req.get("data", ""))
+        msg = can.Message(
+            arbitration_id=int(req["id"]),
+            data=None if rtr else data,
+            dlc=int(req.get("dlc", len(data))),
+            is_remote_frame=rtr,
+            is_extended_id=False,
+        )
+        timeout = req.get("timeout")
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        delay = TX_BACKOFF_S
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self._bus.send(msg)
+                self.tx_frames += 1
+                self._fanout(msg, time.monotonic(), sender=client)
+                return None
+            except can.CanOperationError as e:
+                err = str(e)
+            if deadline is None:
+                if attempt >= TX_RETRIES:
+                    break
+            else:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                delay = min(delay, left)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.01)
+        self.tx_errors += 1
+        return err
+
+    def _state(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic()
+        nodes: Dict[str, Dict[str, Any]] = {}
+        for (nid, cmd), (value, stamp) in list(self._cache.items()):
+            if max_age is not None and now - stamp > max_age:
+                continue
+            node = nodes.setdefault(str(nid), {})
+            name = "heartbeat" if cmd == CMD_HEARTBEAT else "encoder"
+            node[name] = list(value)
+            node[name + "_age"] = round(now - stamp, 6)
+        return {"op": "state", "nodes": nodes}
+
+    def _handle(self, client: _Client, req: Dict[str, Any]) -> None:
+        op = req.get("op")
+        if op == "tx":
+            err = self._send(client, req)
+            ack = bool(req.get("ack"))
+            if err is not None:
+                reply: Dict[str, Any] = {"op": "tx_error", "msg": f"tx 0x{int(req['id']):03X}: {err}"}
+                if ack:
+                    reply["ack"] = True
+                    client.out.put(_encode(reply))
+                else:
+                    client.push(_encode(reply))
+            elif ack:
+                client.out.put(_encode({"op": "tx_ok"}))
+        elif op == "subscribe":
+            nodes, cmds = req.get("nodes"), req.get("cmds")
+            client.nodes = None if nodes is None else frozenset(nodes)
+            client.cmds = None if cmds is None else frozenset(cmds)
+            client.out.put(_encode({"op": "ok"}))
+        elif op == "state":
+            max_age = req.get("max_age")
+            client.out.put(_encode(self._state(None if max_age is None else float(max_age))))
+        else:
+            client.out.put(_encode({"op": "error", "msg": f"unknown op {op!r}"}))
+
+    def _serve_client(self, client: _Client) -> None:
+        writer = threading.Thread(target=client.writer, daemon=True, name=f"{client.name}-tx")
+        writer.start()
+        try:
+            with client.conn.makefile("rb") as rfile:
+                for line in rfile:
+                    try:
+                        req = json.loads(line)
+                    except ValueError:
+                        client.out.put(_encode({"op": "error", "msg": "bad request"}))
+                        continue
+                    try:
+                        self._handle(client, req)
+                    except (KeyError, TypeError, ValueError) as e:
+                        client.out.put(_encode({"op": "error", "msg": f"bad {req.get('op')} request: {e}"}))
+        except OSError:
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.remove(client)
+            client.out.put(None)
+            writer.join(timeout=1.0)
+            client.conn.close()
+            print(f"[daemon] {client.name} disconnected" + (f", {client.dropped} frames dropped" if client.dropped else ""))
+
+    def _claim_path(self) -> None:
+        """Remove a socket left over by a daemon that died, refuse to start if one still answers there."""
+        if not os.path.exists(self._path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self._path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self._path)
+        except OSError as e:
+            raise RuntimeError(f"{self._path} exists and can't be probed: {e}") from e
+        else:
+            raise RuntimeError(f"another CAN daemon is serving {self._path}")
+        finally:
+            probe.close()
+
+    def serve(self, stop_evt: threading.Event, report_s: float = 0.0) -> None:
+        self._claim_path()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # created with SOCKET_MODE, never briefly world-connectable
+        umask = os.umask(0o777 & ~SOCKET_MODE)
+        try:
+            server.bind(self._path)
+        finally:
+            os.umask(umask)
+        st = os.stat(self._path)
+        ours = (st.st_dev, st.st_ino)
+        server.listen()
+        server.settimeout(RECV_POLL_S)
+        reader = threading.Thread(target=self._reader, args=(stop_evt,), daemon=True, name="can-daemon-rx")
+        reader.start()
+        next_report = time.monotonic() + report_s
+        try:
+            while not stop_evt.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    pass
+                else:
+                    self._next_client += 1
+                    client = _Client(conn, f"client{self._next_client}")
+                    with self._clients_lock:
+                        self._clients.append(client)
+                    print(f"[daemon] {client.name} connected")
+                    threading.Thread(target=self._serve_client, args=(client,), daemon=True, name=client.name).start()
+                if report_s and time.monotonic() >= next_report:
+                    print(f"[daemon] {len(self._clients)} clients, rx {self.rx_frames} tx {self.tx_frames} "
+                          f"tx errors {self.tx_errors}")
+                    next_report = time.monotonic() + report_s
+        finally:
+            stop_evt.set()
+            server.close()
+            try:
+                st = os.stat(self._path)
+                if (st.st_dev, st.st_ino) == ours:
+                    os.unlink(self._path)  # not if another daemon has taken the path over since
+            except FileNotFoundError:
+                pass
+            with self._clients_lock:
+                for client in self._clients:
+                    try:
+                        client.conn.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+            reader.join(timeout=1.0)
+
+
+# client side
+
+class DaemonBus(can.BusABC):
+    """python-can bus whose frames go through a CanBusDaemon instead of a CAN interface."""
+
+    def __init__(self, channel: str, subscribe: bool = True, **kwargs: object) -> None:
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(channel)
+        except OSError as e:
+            self._sock.close()
+            raise can.CanInitializationError(f"no CAN daemon on {channel}: {e}") from e
+        self.channel_info = f"can_daemon {channel}"
+        self._rx: "queue.Queue[can.Message]" = queue.Queue()
+        self._replies: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._tx_acks: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._send_lock = threading.Lock()
+        self._request_lock = threading.Lock()
+        self._tx_lock = threading.Lock()  # one acknowledged tx in flight, answers come back in order
+        self._reader = threading.Thread(target=self._read, daemon=True, name="can-daemon-client")
+        self._reader.start()
+        super().__init__(channel=channel, **kwargs)
+        if subscribe:
+            self.subscribe()
+
+    def _read(self) -> None:
+        with self._sock.makefile("rb") as rfile:
+            try:
+                for line in rfile:
+                    obj = json.loads(line)
+                    op = obj.get("op")
+                    if op == "rx":
+                        rtr = obj.get("rtr", False)
+                        data = bytes.fromhex(obj["data"])
+                        self._rx.put(can.Message(
+                            timestamp=obj["t"],
+                            arbitration_id=obj["id"],
+                            data=None if rtr else data,
+                            dlc=obj.get("dlc", len(data)),
+                            is_remote_frame=rtr,
+                            is_extended_id=False,
+                        ))
+                    elif op == "tx_ok" or obj.get("ack"):
+                        self._tx_acks.put(obj)
+                    elif op == "tx_error":
+                        print(f"[CAN] daemon: {obj['msg']}")
+                    else:
+                        self._replies.put(obj)
+            except (OSError, ValueError):
+                pass
+
+    def _write(self, obj: Dict[str, Any]) -> None:
+        with self._send_lock:
+            try:
+                self._sock.sendall(_encode(obj))
+            except OSError as e:
+                raise can.CanOperationError(f"CAN daemon connection lost: {e}") from e
+
+    def _request(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        with self._request_lock:
+            self._write(obj)
+            try:
+                reply = self._replies.get(timeout=REQUEST_TIMEOUT_S)
+            except queue.Empty:
+                raise can.CanOperationError(f"CAN daemon did not answer {obj['op']}") from None
+        if reply.get("op") == "error":
+            raise can.CanOperationError(reply.get("msg", "CAN daemon error"))
+        return reply
+
+    def send(self, msg: can.Message, timeout: Optional[float] = None) -> None:
+        """Without a timeout the frame is queued at the daemon, which retries TX_RETRIES times and
+        reports a failure asynchronously. With one, waits for the daemon's attempts within timeout
+        (0 = one attempt) and raises CanOperationError if the bus refused the frame."""
+        req: Dict[str, Any] = {"op": "tx", "id": msg.arbitration_id, "data": bytes(msg.data or b"").hex()}
+        if msg.is_remote_frame:
+            req["rtr"] = True
+            req["dlc"] = msg.dlc
+        if timeout is None:
+            self._write(req)
+            return
+        req["timeout"] = timeout
+        req["ack"] = True
+        with self._tx_lock:
+            self._write(req)
+            try:
+                reply = self._tx_acks.get(timeout=timeout + REQUEST_TIMEOUT_S)
+            except queue.Empty:
+                raise can.CanOperationError("CAN daemon did not answer tx") from None
+        if reply.get("op") != "tx_ok":
+            raise can.CanOperationError(reply.get("msg", "CAN daemon tx failed"))
+
+    def _recv_internal(self, timeout: Optional[float]) -> Tuple[Optional[can.Message], bool]:
+        try:
+            if timeout == 0:
+                return self._rx.get_nowait(), False
+            return self._rx.get(timeout=timeout), False
+        except queue.Empty:
+            return None, False
+
+    def subscribe(self, nodes: Optional[List[int]] = None, cmds: Optional[List[int]] = None) -> None:
+        """Receive frames from these nodes/commands (None = all), replaces the previous subscription."""
+        self._request({"op": "subscribe", "nodes": nodes, "cmds": cmds})
+
+    def state(self, max_age: Optional[float] = None) -> Dict[int, NodeState]:
+        """Latest heartbeat and encoder estimate the daemon has seen from every node, without touching the bus.
+
+        Entries stay cached after a node goes silent. With max_age, those older than max_age seconds
+        are left out (None when the other one is fresh, no entry at all when both are stale).
+        """
+        req: Dict[str, Any] = {"op": "state"}
+        if max_age is not None:
+            req["max_age"] = max_age
+        out: Dict[int, NodeState] = {}
+        for nid, node in self._request(req)["nodes"].items():
+            hb = node.get("heartbeat")
+            enc = node.get("encoder")
+            out[int(nid)] = NodeState(
+                Heartbeat._make(hb) if hb else None, node.get("heartbeat_age"),
+                EncoderEstimate._make(enc) if enc else None, node.get("encoder_age"),
+            )
+        return out
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+def open_bus(channel: str, interface: str = "socketcan", **kwargs: object) -> can.BusABC:
+    """The daemon's bus when a CanBusDaemon serves channel, otherwise the interface itself."""
+    path = socket_path(channel)
+    if os.path.exists(path):
+        try:
+            return DaemonBus(path, **kwargs)
+        except can.CanInitializationError:
+            pass
+    return can.Bus(channel=channel, interface=interface, **kwargs)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Own a CAN interface and share it over a Unix socket")
+    ap.add_argument("--channel", default=os.environ.get("CAN_CHANNEL", "can0"))
+    ap.add_argument("--interface", default="socketcan")
+    ap.add_argument("--socket", default=None, help="socket path, default from the channel name")
+    ap.add_argument("--report", type=float, default=0.0, help="print counters every N seconds, 0 = never")
+    args = ap.parse_args()
+
+    path = args.socket or socket_path(args.channel)
+    stop_evt = threading.Event()
+    with can.Bus(channel=args.channel, interface=args.interface) as bus:
+        daemon = CanBusDaemon(bus, path)
+        print(f"[daemon] {args.channel} on {path}")
+        try:
+            daemon.serve(stop_evt, args.report)
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            raise SystemExit(f"[daemon] {e}")
+    print(f"[daemon] rx {daemon.rx_frames} frames, tx {daemon.tx_frames} frames, tx errors {daemon.tx_errors}")
+
+
+if __name__ == "__main__":
+    main()
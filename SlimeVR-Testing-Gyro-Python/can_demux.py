@@ -0,0 +1,200 @@
+"""Single CAN reader for the ODrive scripts (get_encoder_pos.py, alllogs.py, integrated_all2.py).
+
+One thread owns bus.recv(), decodes every frame once and publishes it into
+a mailbox keyed by (node_id, cmd). A mailbox only keeps the latest value,
+its receive time (time.monotonic) and a sequence number, callers wait on
+the mailbox instead of reading the bus themselves, so a heartbeat arriving
+during an encoder read is no longer thrown away and all axes can be
+waited on at once.
+
+    demux = CanDemux(bus)
+    demux.start()
+    after = demux.seqs(NODE_IDS, CMD_ENCODER_EST)
+    ...send the RTRs...
+    est = demux.wait_all(NODE_IDS, CMD_ENCODER_EST, after, timeout=0.03)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import can
+
+import odrive_can
+from odrive_can import CMD_HEARTBEAT, HEARTBEAT, Heartbeat
+
+CMD_ENCODER_EST = odrive_can.CMD_GET_ENCODER_ESTIMATES
+ENCODER_EST = odrive_can.GET_ENCODER_ESTIMATES
+EncoderEstimate = odrive_can.GetEncoderEstimates
+
+RECV_POLL_S = 0.1  # how often the reader checks for stop()
+
+
+def frame_bits(dlc: int) -> int:
+    """Bits a standard-id data frame occupies on the wire, worst-case bit stuffing included (for bus load)."""
+    payload = 8 * dlc
+    return 47 + payload + (34 + payload - 1) // 4
+
+
+# cmd -> decoder (generated from the DBC, see dbc_codegen.py), commands without one are published as raw bytes
+DECODERS: Dict[int, Callable[[Any], Any]] = odrive_can.DECODERS
+
+
+class Mailbox:
+    __slots__ = ("value", "stamp", "seq", "cond")
+
+    def __init__(self) -> None:
+        self.value: Any = None
+        self.stamp = 0.0
+        self.seq = 0  # frames published so far, 0 = nothing yet
+        self.cond = threading.Condition(threading.Lock())
+
+
+class CanDemux(threading.Thread):
+    """Reads the bus and fans frames out to (node_id, cmd) mailboxes."""
+
+    def __init__(
+        self,
+        bus: can.BusABC,
+        decoders: Optional[Dict[int, Callable[[Any], Any]]] = None,
+        observer=None,
+    ) -> None:
+        super().__init__(daemon=True, name="can-demux")
+        self._bus = bus
+        self._decoders = DECODERS if decoders is None else decoders
+        self._observer = observer  # e.g. can_stats.CanStats, gets on_rx(nid, cmd, dlc, stamp) per frame
+        self._boxes: Dict[Tuple[int, int], Mailbox] = {}
+        self._taps: Dict[int, List[Callable[[int, Any, float], None]]] = {}
+        self._lock = threading.Lock()
+        self._stop_evt = threading.Event()
+        self.frames = 0
+        self.rx_bits = 0  # wire bits of every frame received, see frame_bits()
+        self.bad_frames = 0  # frames a decoder rejected (short payload)
+
+    def mailbox(self, nid: int, cmd: int) -> Mailbox:
+        key = (nid, cmd)
+        box = self._boxes.get(key)
+        if box is None:
+            with self._lock:
+                box = self._boxes.setdefault(key, Mailbox())
+        return box
+
+    def tap(self, cmd: int, callback: Callable[[int, Any, float], None]) -> None:
+        """Call callback(nid, value, stamp) from the reader thread for every frame of cmd.
+
+        For replies that must not be collapsed into a mailbox, e.g. TxSdo
+        answers to several pipelined requests (odrive_sdo.py).
+        """
+        with self._lock:
+            self._taps[cmd] = self._taps.get(cmd, []) + [callback]
+
+    def untap(self, cmd: int, callback: Callable[[int, Any, float], None]) -> None:
+        with self._lock:
+            self._taps[cmd] = [cb for cb in self._taps.get(cmd, []) if cb is not callback]
+
+    # reader thread
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+
+    def run(self) -> None:
+        decoders = self._decoders
+        observer = self._observer
+        while not self._stop_evt.is_set():
+            try:
+                msg = self._bus.recv(timeout=RECV_POLL_S)
+            except can.CanError:
+                if self._stop_evt.is_set():
+                    break
+                time.sleep(RECV_POLL_S)
+                continue
+            if msg is None or msg.is_remote_frame or msg.is_error_frame:
+                continue
+            stamp = time.monotonic()
+            self.frames += 1
+            self.rx_bits += frame_bits(msg.dlc)
+            arb = msg.arbitration_id
+            cmd = arb & 0x1F
+            if observer is not None:
+                observer.on_rx(arb >> 5, cmd, msg.dlc, stamp)
+            decoder = decoders.get(cmd)
+            value = decoder(msg.data) if decoder else bytes(msg.data)
+            if value is None:
+                self.bad_frames += 1
+                continue
+            taps = self._taps.get(cmd)
+            if taps:
+                for cb in taps:
+                    cb(arb >> 5, value, stamp)
+            box = self.mailbox(arb >> 5, cmd)
+            with box.cond:
+                box.value = value
+                box.stamp = stamp
+                box.seq += 1
+                box.cond.notify_all()
+
+    # callers
+
+    def latest(self, nid: int, cmd: int) -> Optional[Tuple[Any, float]]:
+        """(value, monotonic receive time) of the newest frame, None if none arrived yet."""
+        box = self.mailbox(nid, cmd)
+        with box.cond:
+            return (box.value, box.stamp) if box.seq else None
+
+    def seq(self, nid: int, cmd: int) -> int:
+        return self.mailbox(nid, cmd).seq
+
+    def seqs(self, nids: Iterable[int], cmd: int) -> Dict[int, int]:
+        return {nid: self.mailbox(nid, cmd).seq for nid in nids}
+
+    def wait(self, nid: int, cmd: int, after: Optional[int] = None, timeout: float = 0.1) -> Optional[Any]:
+        """First value published after sequence number after (default: the next frame), None on timeout."""
+        return self.wait_for(nid, cmd, None, timeout, after)
+
+    def wait_for(
+        self,
+        nid: int,
+        cmd: int,
+        predicate: Optional[Callable[[Any], bool]],
+        timeout: float,
+        after: Optional[int] = None,
+    ) -> Optional[Any]:
+        """Newest value past after that satisfies predicate, None on timeout.
+
+        Frames published while this thread was not looking are skipped,
+        only the latest one is ever tested.
+        """
+        box = self.mailbox(nid, cmd)
+        deadline = time.monotonic() + timeout
+        with box.cond:
+            seen = box.seq if after is None else after
+            while True:
+                if box.seq > seen:
+                    seen = box.seq
+                    if predicate is None or predicate(box.value):
+                        return box.value
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                box.cond.wait(remaining)
+
+    def wait_all(
+        self,
+        nids: Iterable[int],
+        cmd: int,
+        after: Optional[Dict[int, int]] = None,
+        timeout: float = 0.1,
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> Dict[int, Any]:
+        """wait_for on several nodes against one shared deadline, nodes that timed out are missing from the result."""
+        deadline = time.monotonic() + timeout
+        out: Dict[int, Any] = {}
+        for nid in nids:
+            value = self.wait_for(
+                nid, cmd, predicate, max(0.0, deadline - time.monotonic()),
+                None if after is None else after.get(nid, 0),
+            )
+            if value is not None:
+                out[nid] = value
+        return out
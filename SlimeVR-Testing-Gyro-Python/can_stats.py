@@ -0,0 +1,181 @@
+"""CAN timing instrumentation for GimbalThread (integrated_all2.py).
+
+CanStats is handed to CanDemux and CanTxScheduler as their observer and
+records, per node: RTR -> encoder reply latency, heartbeat and encoder
+broadcast inter-arrival times, plus TX retries/drops, frames/s and bus
+utilisation at the configured bitrate. summary() gives a one-line report
+for the interval since the previous call. With a trace path every event
+also goes to a CSV through a BatchedRowWriter:
+
+    t,event,nid,cmd,dlc,value
+    12.034567,rtr,1,9,8,
+    12.035012,rx,1,9,8,0.000445      # value: RTR round trip in seconds
+    12.100003,rx,1,1,8,0.099987      # value: heartbeat inter-arrival
+
+t is time.monotonic(), events are rx, tx, rtr, retry and drop.
+
+An encoder reply to an RTR has the same CAN id as a cyclic encoder
+broadcast, so RTR round trips are only measured with rtr_rtt=True
+(ENCODER_MODE=rtr). With broadcasts on, every encoder frame counts as
+inter-arrival and an RTR that happens to go out is only counted as TX.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from batched_writer import BatchedRowWriter
+from can_demux import CMD_ENCODER_EST, CMD_HEARTBEAT, frame_bits
+from histogram import Histogram
+
+TRACE_COLUMNS = ("t", "event", "nid", "cmd", "dlc", "value")
+
+
+class _NodeStats:
+    __slots__ = ("rtt", "hb_gap", "enc_gap", "last_hb", "last_enc")
+
+    def __init__(self) -> None:
+        self.rtt = Histogram()
+        self.hb_gap = Histogram()
+        self.enc_gap = Histogram()
+        self.last_hb = 0.0
+        self.last_enc = 0.0
+
+
+class CanStats:
+    def __init__(self, bitrate: int = 1_000_000, trace_path: Optional[Path] = None, rtr_rtt: bool = True) -> None:
+        self.bitrate = bitrate
+        self.rtr_rtt = rtr_rtt  # False while the encoder broadcasts, see module docstring
+        self._nodes: Dict[int, _NodeStats] = {}
+        self._rtr_sent: Dict[int, float] = {}  # nid -> time of the outstanding encoder RTR
+        # the hooks run on the demux, TX and gimbal threads, snapshot() swaps the interval state under the same lock
+        self._lock = threading.Lock()
+        self.rx_frames = 0
+        self.tx_frames = 0
+        self.bits = 0
+        self.retries = 0
+        self.drops = 0
+        self._mark: Tuple[float, int, int, int] = (time.monotonic(), 0, 0, 0)
+        self._trace: Optional[BatchedRowWriter] = None
+        if trace_path is not None:
+            f = Path(trace_path).open("w", newline="")
+            f.write(",".join(TRACE_COLUMNS) + "\n")
+            self._trace = BatchedRowWriter(f, self._format_trace)
+
+    @staticmethod
+    def _format_trace(row: tuple) -> List[str]:
+        t, event, nid, cmd, dlc, value = row
+        return [f"{t:.6f}", event, str(nid), str(cmd), str(dlc), "" if value is None else f"{value:.6f}"]
+
+    def _node(self, nid: int) -> _NodeStats:
+        node = self._nodes.get(nid)
+        if node is None:
+            node = self._nodes.setdefault(nid, _NodeStats())
+        return node
+
+    # observer hooks, called from the demux, TX and gimbal threads
+
+    def on_rx(self, nid: int, cmd: int, dlc: int, stamp: float) -> None:
+        value = None
+        with self._lock:
+            self.rx_frames += 1
+            self.bits += frame_bits(dlc)
+            if cmd == CMD_ENCODER_EST:
+                node = self._node(nid)
+                sent = self._rtr_sent.pop(nid, None)
+                if sent is not None:
+                    value = stamp - sent
+                    node.rtt.add(value)
+                else:
+                    if node.last_enc:
+                        value = stamp - node.last_enc
+                        node.enc_gap.add(value)
+                    node.last_enc = stamp
+            elif cmd == CMD_HEARTBEAT:
+                node = self._node(nid)
+                if node.last_hb:
+                    value = stamp - node.last_hb
+                    node.hb_gap.add(value)
+                node.last_hb = stamp
+        if self._trace:
+            self._trace.push((stamp, "rx", nid, cmd, dlc, value))
+
+    def on_tx(self, nid: int, cmd: int, dlc: int, stamp: float) -> None:
+        with self._lock:
+            self.tx_frames += 1
+            self.bits += frame_bits(dlc)
+        if self._trace:
+            self._trace.push((stamp, "tx", nid, cmd, dlc, None))
+
+    def on_rtr(self, nid: int, cmd: int, stamp: float) -> None:
+        with self._lock:
+            self.tx_frames += 1
+            self.bits += frame_bits(0)
+            if cmd == CMD_ENCODER_EST and self.rtr_rtt:
+                self._rtr_sent[nid] = stamp
+        if self._trace:
+            self._trace.push((stamp, "rtr", nid, cmd, 8, None))
+
+    def on_retry(self, nid: int, cmd: int) -> None:
+        with self._lock:
+            self.retries += 1
+        if self._trace:
+            self._trace.push((time.monotonic(), "retry", nid, cmd, 0, None))
+
+    def on_drop(self, nid: int, cmd: int) -> None:
+        with self._lock:
+            self.drops += 1
+        if self._trace:
+            self._trace.push((time.monotonic(), "drop", nid, cmd, 0, None))
+
+    # reporting
+
+    def snapshot(self) -> Dict[str, object]:
+        """Rates and utilisation since the previous snapshot()/summary() plus per-node histograms, which are reset."""
+        now = time.monotonic()
+        with self._lock:
+            t0, rx0, tx0, bits0 = self._mark
+            rx, tx, bits, retries, drops = self.rx_frames, self.tx_frames, self.bits, self.retries, self.drops
+            self._mark = (now, rx, tx, bits)
+            nodes, self._nodes = self._nodes, {}
+            # keep inter-arrival continuity across the reset
+            for nid, old in nodes.items():
+                fresh = self._node(nid)
+                fresh.last_hb = old.last_hb
+                fresh.last_enc = old.last_enc
+        dt = max(now - t0, 1e-9)
+        return {
+            "interval_s": dt,
+            "rx_fps": (rx - rx0) / dt,
+            "tx_fps": (tx - tx0) / dt,
+            "bus_load_pct": 100.0 * (bits - bits0) / (self.bitrate * dt),
+            "retries": retries,
+            "drops": drops,
+            "nodes": {
+                nid: {"rtt": n.rtt.as_dict(), "hb_gap": n.hb_gap.as_dict(), "enc_gap": n.enc_gap.as_dict()}
+                for nid, n in sorted(nodes.items())
+            },
+        }
+
+    def summary(self) -> str:
+        snap = self.snapshot()
+        parts = [
+            f"rx {snap['rx_fps']:.0f}/s tx {snap['tx_fps']:.0f}/s load {snap['bus_load_pct']:.1f}% "
+            f"retries {snap['retries']} drops {snap['drops']}"
+        ]
+        for nid, n in snap["nodes"].items():
+            item = f"n{nid}"
+            for name in ("rtt", "enc_gap", "hb_gap"):
+                h = n[name]
+                if h["n"]:
+                    item += (f" {name} p50 {h['p50'] * 1e3:.2f} p99 {h['p99'] * 1e3:.2f} "
+                             f"max {h['max'] * 1e3:.2f} ms")
+            parts.append(item)
+        return " | ".join(parts)
+
+    def close(self) -> None:
+        if self._trace:
+            self._trace.close()
+            self._trace = None
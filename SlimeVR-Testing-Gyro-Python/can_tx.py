@@ -0,0 +1,196 @@
+"""Burst CAN transmitter for GimbalThread (integrated_all2.py).
+
+The control loop submit()s frames and calls flush() once per tick, it never
+touches the bus and never sleeps. A TX thread sends everything pending back
+to back. Frames of a coalescing command (SET_INPUT_POS, trajectory limits)
+replace the still-unsent frame for the same (node, cmd) in place, so a
+full socketcan TX buffer delays the newest setpoint instead of queueing
+stale ones behind it. Frames the kernel refuses are retried by the TX
+thread after TX_BACKOFF_S. Remote (RTR) requests go through the same queue
+via submit_rtr(), so polling the encoders never blocks the control loop
+either.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import can
+
+from can_demux import CanDemux, frame_bits
+
+TX_QUEUE_CAPACITY = 64  # pending frames, submit() drops beyond this
+TX_BACKOFF_S = 0.0005  # wait after ENOBUFS before retrying the rest of a burst
+TX_DRAIN_S = 0.5  # stop() keeps sending this long so shutdown commands get out
+
+Key = Tuple[int, int]
+
+
+class _Frame:
+    __slots__ = ("nid", "cmd", "data", "rtr_dlc")
+
+    def __init__(self, nid: int, cmd: int, data: bytes, rtr_dlc: Optional[int] = None) -> None:
+        self.nid = nid
+        self.cmd = cmd
+        self.data = data
+        self.rtr_dlc = rtr_dlc  # set for a remote frame, which carries no data
+
+
+class CanTxScheduler(threading.Thread):
+    """Per-node TX queue with superseded-frame merging, burst sends and load/drop stats."""
+
+    def __init__(
+        self,
+        bus: can.BusABC,
+        coalesce: Iterable[int] = (),
+        bitrate: int = 1_000_000,
+        demux: Optional[CanDemux] = None,
+        observer=None,
+    ) -> None:
+        super().__init__(daemon=True, name="can-tx")
+        self._bus = bus
+        self._coalesce = frozenset(coalesce)
+        self._bitrate = bitrate
+        self._demux = demux  # received bits count towards bus load too
+        self._observer = observer  # e.g. can_stats.CanStats: on_tx / on_rtr / on_retry / on_drop
+        self._pending: List[_Frame] = []
+        self._latest: Dict[Key, _Frame] = {}  # unsent coalescing frames by (nid, cmd)
+        self._cond = threading.Condition(threading.Lock())
+        self._kick = False
+        self._stopping = False
+        self.sent = 0
+        self.merged = 0  # frames replaced by a newer one before they went out
+        self.dropped = 0  # submit() found the queue full
+        self.retries = 0  # bursts cut short by a full TX buffer
+        self.tx_bits = 0
+        self._load_mark = (time.monotonic(), 0)
+
+    # control loop side
+
+    def submit(self, nid: int, cmd: int, data: bytes) -> bool:
+        """Queue a frame for the next flush(), False if it had to be dropped."""
+        return self._submit(_Frame(nid, cmd, data))
+
+    def submit_rtr(self, nid: int, cmd: int, dlc: int = 8) -> bool:
+        """Queue a remote frame requesting cmd from nid, reported to the observer's on_rtr once it is sent."""
+        return self._submit(_Frame(nid, cmd, b"", rtr_dlc=dlc))
+
+    def _submit(self, frame: _Frame) -> bool:
+        nid, cmd, data = frame.nid, frame.cmd, frame.data
+        with self._cond:
+            if cmd in self._coalesce and frame.rtr_dlc is None:
+                unsent = self._latest.get((nid, cmd))
+                if unsent is not None:
+                    unsent.data = data
+                    self.merged += 1
+                    return True
+            if len(self._pending) >= TX_QUEUE_CAPACITY:
+                self.dropped += 1
+                if self._observer is not None:
+                    self._observer.on_drop(nid, cmd)
+                return False
+            self._pending.append(frame)
+            if cmd in self._coalesce and frame.rtr_dlc is None:
+                self._latest[(nid, cmd)] = frame
+            return True
+
+    def flush(self) -> None:
+        """Send everything submitted so far as one burst, returns immediately."""
+        with self._cond:
+            self._kick = True
+            self._cond.notify()
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus bus_load_pct, the share of the bitrate used (TX and, with a demux, RX) since the last call."""
+        now = time.monotonic()
+        bits = self.tx_bits + (self._demux.rx_bits if self._demux else 0)
+        t0, bits0 = self._load_mark
+        self._load_mark = (now, bits)
+        dt = now - t0
+        load = 100.0 * (bits - bits0) / (self._bitrate * dt) if dt > 0 else 0.0
+        return {
+            "depth": self.depth(),
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "bus_load_pct": load,
+        }
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+    # TX thread
+
+    def _take(self) -> List[_Frame]:
+        with self._cond:
+            frames = self._pending
+            self._pending = []
+            self._latest.clear()
+            self._kick = False
+            return frames
+
+    def _requeue(self, unsent: List[_Frame]) -> None:
+        # unsent frames go back in front, unless something newer for the same key was submitted meanwhile
+        with self._cond:
+            keep: List[_Frame] = []
+            for frame in unsent:
+                key = (frame.nid, frame.cmd)
+                if frame.cmd in self._coalesce and frame.rtr_dlc is None:
+                    if key in self._latest:
+                        self.merged += 1
+                        continue
+                    self._latest[key] = frame
+                keep.append(frame)
+            self._pending[:0] = keep
+
+    def _burst(self, frames: List[_Frame]) -> bool:
+        bus = self._bus
+        observer = self._observer
+        for i, frame in enumerate(frames):
+            arbitration_id = (frame.nid << 5) | frame.cmd
+            if frame.rtr_dlc is None:
+                msg = can.Message(arbitration_id=arbitration_id, data=frame.data, is_extended_id=False)
+            else:
+                msg = can.Message(
+                    arbitration_id=arbitration_id, is_extended_id=False, is_remote_frame=True, dlc=frame.rtr_dlc,
+                )
+            try:
+                bus.send(msg, timeout=0)
+            except can.CanOperationError:
+                self.retries += 1
+                if observer is not None:
+                    observer.on_retry(frame.nid, frame.cmd)
+                self._requeue(frames[i:])
+                return False
+            self.sent += 1
+            self.tx_bits += frame_bits(len(frame.data))
+            if observer is None:
+                continue
+            if frame.rtr_dlc is None:
+                observer.on_tx(frame.nid, frame.cmd, len(frame.data), time.monotonic())
+            else:
+                observer.on_rtr(frame.nid, frame.cmd, time.monotonic())
+        return True
+
+    def run(self) -> None:
+        drain_until = None
+        while True:
+            with self._cond:
+                while not self._kick and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and drain_until is None:
+                    drain_until = time.monotonic() + TX_DRAIN_S
+            frames = self._take()
+            if frames and not self._burst(frames):
+                with self._cond:
+                    self._kick = True  # retry what's left
+                time.sleep(TX_BACKOFF_S)
+            if drain_until is not None and (not self._pending or time.monotonic() > drain_until):
+                return
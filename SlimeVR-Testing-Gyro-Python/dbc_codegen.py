@@ -0,0 +1,307 @@
+"""Compile the ODrive CAN DBC into a module of precompiled struct codecs (odrive_can.py).
+
+    python dbc_codegen.py ../apps/gyro-server/odrive-protocol.dbc -o odrive_can.py
+
+The DBC lists every message once per axis (CAN id = axis << 5 | cmd). All
+axes share one layout, so only axis 0 is compiled and the output is keyed
+by command id. Every message becomes:
+
+    CMD_SET_INPUT_POS = 0x0C
+    SET_INPUT_POS = struct.Struct("<fhh")
+    class SetInputPos(NamedTuple): input_pos, vel_ff, torque_ff
+    decode_set_input_pos(data) -> SetInputPos | None (short payload)
+    encode_set_input_pos(input_pos=0.0, vel_ff=0.0, torque_ff=0.0) -> bytes
+
+plus DECODERS / ENCODERS / MESSAGES / STRUCTS tables keyed by command id. Fields
+come out in wire order, scaled signals (factor/offset other than 1/0) are
+converted both ways. Only byte-aligned little-endian signals of 8/16/32/64
+bits are supported, a signal narrower than a byte is read as its whole
+byte when it has that byte to itself. Messages that don't fit are listed
+in the output and left out.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_BO = re.compile(r"^BO_ (\d+) (\w+)\s*:\s*(\d+) (\w+)")
+_SG = re.compile(
+    r"^\s*SG_ (\w+)\s*(?:M|m\d+)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*\(([^,]+),([^)]+)\)\s*\[[^\]]*\]\s*\"([^\"]*)\""
+)
+_VALTYPE = re.compile(r"^SIG_VALTYPE_ (\d+) (\w+)\s*:\s*(\d)\s*;")
+_VERSION = re.compile(r'^VERSION "([^"]*)"')
+_UNIT_REF = re.compile(r"\s*\[#[^\]]*\]_")  # reST footnote refs in units, "Nm (default) [#torque-ff-scale]_"
+
+_INT_CODES = {8: "B", 16: "H", 32: "I", 64: "Q"}
+_INT_RANGE = {8: 0xFF, 16: 0xFFFF, 32: 0xFFFFFFFF, 64: 0xFFFFFFFFFFFFFFFF}
+
+
+@dataclass
+class Signal:
+    name: str
+    start: int
+    size: int
+    little_endian: bool
+    signed: bool
+    factor: float
+    offset: float
+    unit: str
+    float_type: int = 0  # SIG_VALTYPE_: 1 = float32, 2 = float64
+
+    @property
+    def field(self) -> str:
+        return self.name.lower()
+
+    @property
+    def scaled(self) -> bool:
+        return self.factor != 1.0 or self.offset != 0.0
+
+    @property
+    def is_float(self) -> bool:
+        return self.float_type != 0 or self.scaled
+
+
+@dataclass
+class Message:
+    can_id: int
+    name: str
+    dlc: int
+    sender: str
+    signals: List[Signal] = field(default_factory=list)
+
+    @property
+    def cmd(self) -> int:
+        return self.can_id & 0x1F
+
+    @property
+    def base_name(self) -> str:
+        # Axis0_Set_Input_Pos -> Set_Input_Pos, Axis0_RxSdo -> Rx_Sdo
+        return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", re.sub(r"^Axis\d+_", "", self.name))
+
+    def layout(self) -> Tuple[List[Signal], str]:
+        """Signals in wire order and the struct format covering them, ValueError if it has none."""
+        fmt = "<"
+        pos = 0  # bit
+        ordered = sorted(self.signals, key=lambda s: s.start)
+        for sig in ordered:
+            if not sig.little_endian:
+                raise ValueError(f"{sig.name} is big-endian")
+            if sig.start % 8:
+                raise ValueError(f"{sig.name} is not byte aligned")
+            if sig.start < pos:
+                raise ValueError(f"{sig.name} shares a byte with another signal")
+            if sig.start > pos:
+                fmt += f"{(sig.start - pos) // 8}x"
+            if sig.float_type:
+                code, width = ("f", 32) if sig.float_type == 1 else ("d", 64)
+                if sig.size != width:
+                    raise ValueError(f"{sig.name} is float{width} but {sig.size} bits")
+            elif sig.size < 8:
+                code, width = "B", 8
+            elif sig.size in _INT_CODES:
+                code, width = _INT_CODES[sig.size], sig.size
+            else:
+                raise ValueError(f"{sig.name} is {sig.size} bits wide")
+            if sig.signed and not sig.float_type:
+                code = code.lower()
+            fmt += code
+            pos = sig.start + width
+        if pos > self.dlc * 8:
+            raise ValueError(f"signals end at byte {pos // 8}, DLC is {self.dlc}")
+        return ordered, fmt
+
+
+def parse_dbc(text: str) -> Tuple[str, Dict[int, Message]]:
+    version = ""
+    messages: Dict[int, Message] = {}
+    current: Optional[Message] = None
+    valtypes: List[Tuple[int, str, int]] = []
+    for line in text.splitlines():
+        m = _VERSION.match(line)
+        if m:
+            version = m.group(1)
+            continue
+        m = _BO.match(line)
+        if m:
+            can_id, name, dlc, sender = m.groups()
+            current = messages[int(can_id)] = Message(int(can_id), name, int(dlc), sender)
+            continue
+        if current is not None:
+            m = _SG.match(line)
+            if m:
+                name, start, size, order, sign, factor, offset, unit = m.groups()
+                current.signals.append(Signal(
+                    name, int(start), int(size), order == "1", sign == "-",
+                    float(factor), float(offset), _UNIT_REF.sub("", unit).strip(),
+                ))
+                continue
+            if not line.strip():
+                current = None
+                continue
+        m = _VALTYPE.match(line)
+        if m:
+            valtypes.append((int(m.group(1)), m.group(2), int(m.group(3))))
+    for can_id, name, kind in valtypes:
+        msg = messages.get(can_id)
+        for sig in msg.signals if msg else ():
+            if sig.name == name:
+                sig.float_type = kind
+    return version, messages
+
+
+def _layout_key(msg: Message) -> tuple:
+    return tuple(sorted((s.name, s.start, s.size, s.little_endian, s.signed, s.factor, s.offset, s.float_type)
+                        for s in msg.signals))
+
+
+def axis0_messages(messages: Dict[int, Message]) -> List[Message]:
+    """Axis 0 messages by command id, after checking every other axis uses the same layouts."""
+    base = {m.cmd: m for m in messages.values() if m.can_id < 32}
+    for msg in messages.values():
+        ref = base.get(msg.cmd)
+        if ref is None or _layout_key(ref) != _layout_key(msg):
+            raise ValueError(f"{msg.name} (0x{msg.can_id:03X}) differs from the axis 0 message")
+    return [base[cmd] for cmd in sorted(base)]
+
+
+def _camel(name: str) -> str:
+    return "".join(part[:1].upper() + part[1:] for part in name.split("_"))
+
+
+def _num(x: float) -> str:
+    return repr(int(x)) if x == int(x) else repr(x)
+
+
+def _decode_expr(sig: Signal, var: str) -> str:
+    expr = var
+    if sig.factor != 1.0:
+        inv = 1.0 / sig.factor
+        expr = f"{expr} / {_num(round(inv))}" if abs(inv - round(inv)) < 1e-9 else f"{expr} * {_num(sig.factor)}"
+    if sig.offset:
+        expr = f"{expr} + {_num(sig.offset)}"
+    return expr
+
+
+def _encode_expr(sig: Signal) -> str:
+    if not sig.scaled:
+        return sig.field
+    expr = sig.field
+    if sig.offset:
+        expr = f"({expr} - {_num(sig.offset)})"
+    inv = 1.0 / sig.factor
+    expr = f"{expr} * {_num(round(inv))}" if abs(inv - round(inv)) < 1e-9 else f"{expr} / {_num(sig.factor)}"
+    bits = sig.size
+    if sig.signed:
+        lo, hi = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+    else:
+        lo, hi = 0, _INT_RANGE[bits]
+    return f"_clamp(round({expr}), {lo}, {hi})"
+
+
+def _wrap(head: str, items: List[str], tail: str) -> List[str]:
+    """head(items)tail on one line, or one item per line when that gets long."""
+    line = f"{head}({', '.join(items)}){tail}"
+    if len(line) <= 110 or not items:
+        return [line]
+    indent = " " * (len(head) - len(head.lstrip()) + 4)
+    return [f"{head}("] + [f"{indent}{item}," for item in items] + [f"{indent[:-4]}){tail}"]
+
+
+def generate(version: str, messages: List[Message], source: str) -> str:
+    out: List[str] = [
+        '"""ODrive CAN Simple message codecs, generated by dbc_codegen.py.',
+        "",
+        f"Source: {source}, DBC version {version}. Do not edit, regenerate with:",
+        f"    python dbc_codegen.py {source} -o odrive_can.py",
+        "",
+        "One struct.Struct, NamedTuple, decode_<msg>() and encode_<msg>() per",
+        "command, decoders return None for a short payload. DECODERS and",
+        "ENCODERS map command id -> function, MESSAGES command id -> NamedTuple",
+        "and STRUCTS command id -> struct.Struct for raw unscaled tuples.",
+        '"""',
+        "from __future__ import annotations",
+        "",
+        "import struct",
+        "from typing import Any, Callable, Dict, NamedTuple, Optional, Type",
+        "",
+        "",
+        "_new = tuple.__new__",
+        "",
+        "",
+        "def _clamp(v: int, lo: int, hi: int) -> int:",
+        "    return lo if v < lo else hi if v > hi else v",
+        "",
+    ]
+    skipped: List[str] = []
+    compiled: List[Tuple[Message, str, str, str]] = []
+    for msg in messages:
+        try:
+            signals, fmt = msg.layout()
+        except ValueError as e:
+            skipped.append(f"# {msg.base_name} (0x{msg.cmd:02X}) not generated: {e}")
+            continue
+        base = msg.base_name
+        const = base.upper()
+        cls = _camel(base)
+        snake = base.lower()
+        compiled.append((msg, const, cls, snake))
+        out += ["", f"# {base}, sent by {msg.sender}", f"CMD_{const} = 0x{msg.cmd:02X}",
+                f'{const} = struct.Struct("{fmt}")', "", ""]
+        out.append(f"class {cls}(NamedTuple):")
+        if not signals:
+            out.append("    pass")
+        for sig in signals:
+            kind = "float" if sig.is_float else "int"
+            unit = f"  # {sig.unit}" if sig.unit else ""
+            out.append(f"    {sig.field}: {kind}{unit}")
+        out += ["", ""]
+        # unpack_from bound as a default and tuple.__new__ instead of the NamedTuple's Python-level
+        # constructor: this runs for every frame the demux sees
+        out += [f"def decode_{snake}(data, _unpack={const}.unpack_from) -> Optional[{cls}]:", "    try:"]
+        if any(s.scaled for s in signals):
+            names = ", ".join(s.field for s in signals)
+            out.append(f"        {names}{',' if len(signals) == 1 else ''} = _unpack(data)")
+            values = ", ".join(_decode_expr(s, s.field) for s in signals) + ("," if len(signals) == 1 else "")
+            out.append(f"        return _new({cls}, ({values}))")
+        else:
+            out.append(f"        return _new({cls}, _unpack(data))")
+        out += ["    except struct.error:", "        return None", "", ""]
+        params = [f"{s.field}: {'float' if s.is_float else 'int'} = {'0.0' if s.is_float else '0'}" for s in signals]
+        out += _wrap(f"def encode_{snake}", params, " -> bytes:")
+        out += _wrap(f"    return {const}.pack", [_encode_expr(s) for s in signals], "")
+        out.append("")
+    out.append("")
+    out += skipped
+    if skipped:
+        out.append("")
+    out.append("DECODERS: Dict[int, Callable[[Any], Any]] = {")
+    out += [f"    CMD_{const}: decode_{snake}," for _, const, _, snake in compiled]
+    out += ["}", "", "ENCODERS: Dict[int, Callable[..., bytes]] = {"]
+    out += [f"    CMD_{const}: encode_{snake}," for _, const, _, snake in compiled]
+    out += ["}", "", "MESSAGES: Dict[int, Type[tuple]] = {"]
+    out += [f"    CMD_{const}: {cls}," for _, const, cls, _ in compiled]
+    out += ["}", "", "STRUCTS: Dict[int, struct.Struct] = {"]
+    out += [f"    CMD_{const}: {const}," for _, const, _, _ in compiled]
+    out += ["}", ""]
+    return "\n".join(out)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Generate struct codecs for the ODrive CAN messages in a DBC file")
+    ap.add_argument("dbc", type=Path)
+    ap.add_argument("-o", "--output", type=Path, default=Path("odrive_can.py"))
+    args = ap.parse_args()
+
+    text = args.dbc.read_text(encoding="utf-8", errors="replace")
+    version, messages = parse_dbc(text)
+    axis0 = axis0_messages(messages)
+    source = args.dbc.as_posix()
+    args.output.write_text(generate(version, axis0, source))
+    print(f"{len(axis0)} messages from {args.dbc} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 from __future__ import annotations
-import struct, can, math, time
+import can, os
 
-BUS_CH        = "can0"
+from can_daemon import open_bus
+from can_demux import CanDemux
+from odrive_can import (encode_set_axis_state, encode_set_controller_mode, encode_set_input_pos,
+                        encode_set_traj_accel_limits, encode_set_traj_vel_limit)
+
+BUS_CH        = os.environ.get("CAN_CHANNEL", "can0")
 NODE_IDS      = [1, 2, 3] # X, Y, Z
 ACCEL_FACTOR  = 4.0 # accel = decel = speed * this
 ERR_TOL_DEG   = 1.0 
@@ -41,47 +46,38 @@ def clear_errors(bus: can.Bus, nid: int) -> None:
 
 
 def set_axis_state(bus: can.Bus, nid: int, state: int) -> None:
-    send(bus, nid, CMD_SET_AXIS_STATE, struct.pack('<I', state))
+    send(bus, nid, CMD_SET_AXIS_STATE, encode_set_axis_state(state))
 
 def set_controller_mode(bus: can.Bus, nid: int) -> None:
     send(bus, nid, CMD_SET_CTRL_MODE,
-         struct.pack('<II', CTRL_MODE_POS, INPUT_MODE_TRAP))
+         encode_set_controller_mode(CTRL_MODE_POS, INPUT_MODE_TRAP))
 
 def set_traj_limits(bus: can.Bus, nid: int,
                     vel_rps: float, acc_rps2: float) -> None:
-    send(bus, nid, CMD_TRAJ_VEL_LIM,  struct.pack('<f', vel_rps))
-    send(bus, nid, CMD_TRAJ_ACCEL_LIM,struct.pack('<ff', acc_rps2, acc_rps2))
+    send(bus, nid, CMD_TRAJ_VEL_LIM,  encode_set_traj_vel_limit(vel_rps))
+    send(bus, nid, CMD_TRAJ_ACCEL_LIM,encode_set_traj_accel_limits(acc_rps2, acc_rps2))
 
 def set_input_pos(bus: can.Bus, nid: int, turns: float) -> None:
-    send(bus, nid, CMD_SET_INPUT_POS, struct.pack('<fhh', turns, 0, 0))
-
-def wait_closed_loop(bus: can.Bus) -> None:
-    pending = set(NODE_IDS)
-    deadline = time.time() + 2
-    while pending:
-        msg = bus.recv(timeout=0.1)
-        if msg is None:
-            if time.time() > deadline:
-                raise RuntimeError(f"No heartbeat from {pending}")
-            continue
-        if msg.arbitration_id & 0x1F != CMD_HEARTBEAT:
-            continue
-        nid = msg.arbitration_id >> 5
-        if nid in pending:
-            _, state, *_ = struct.unpack('<IBBB', msg.data[:7])
-            if state == AXIS_CLOSED_LOOP:
-                print(f"node {nid} in CLOSED_LOOP_CONTROL")
-                pending.remove(nid)
-
-def read_turns(bus: can.Bus, nid: int, timeout: float = 0.2) -> float:
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        msg = bus.recv(timeout=deadline - time.time())
-        if msg and (msg.arbitration_id >> 5) == nid \
-           and (msg.arbitration_id & 0x1F) == CMD_ENCODER_EST:
-            pos, _ = struct.unpack('<ff', msg.data)
-            return pos
-    raise RuntimeError(f"No encoder frame from node {nid}")
+    send(bus, nid, CMD_SET_INPUT_POS, encode_set_input_pos(turns))
+
+def wait_closed_loop(demux: CanDemux) -> None:
+    # heartbeats are collected by the demux thread, all axes are waited on together
+    closed = demux.wait_all(NODE_IDS, CMD_HEARTBEAT, after={}, timeout=2,
+                            predicate=lambda hb: hb.axis_state == AXIS_CLOSED_LOOP)
+    for nid in closed:
+        print(f"node {nid} in CLOSED_LOOP_CONTROL")
+    pending = set(NODE_IDS) - set(closed)
+    if pending:
+        raise RuntimeError(f"No heartbeat from {pending}")
+
+def read_all_turns(demux: CanDemux, timeout: float = 0.2) -> dict:
+    # next encoder estimate of every axis, one shared deadline
+    est = demux.wait_all(NODE_IDS, CMD_ENCODER_EST,
+                         demux.seqs(NODE_IDS, CMD_ENCODER_EST), timeout)
+    missing = set(NODE_IDS) - set(est)
+    if missing:
+        raise RuntimeError(f"No encoder frame from node {sorted(missing)}")
+    return {nid: e.pos_estimate for nid, e in est.items()}
 
 #wrapping maths
 def nearest_turns(cur_turns: float, target_deg: float) -> float:
@@ -95,14 +91,16 @@ def wrap_deg(deg: float) -> float: return deg % 360.0
 def err_short(goal: float, cur: float) -> float:
     return ((goal - cur + 540) % 360) - 180
 
-with can.interface.Bus(channel=BUS_CH, interface="socketcan") as bus:
+with open_bus(BUS_CH, interface="socketcan") as bus:
     flush(bus)
+    demux = CanDemux(bus)
+    demux.start()
 
     for nid in NODE_IDS:
         clear_errors(bus, nid)
         set_controller_mode(bus, nid)
         set_axis_state(bus, nid, AXIS_CLOSED_LOOP)
-    wait_closed_loop(bus)
+    wait_closed_loop(demux)
 
     print("\nEnter   X  Y  Z  speed_deg/s   (q to quit)")
     while True:
@@ -122,7 +120,8 @@ with can.interface.Bus(channel=BUS_CH, interface="socketcan") as bus:
         acc_rps2 = vel_rps * ACCEL_FACTOR
 
         # read present position of every axis once
-        cur_turns = {nid: read_turns(bus, nid) for nid in NODE_IDS}
+        hb_after = demux.seqs(NODE_IDS, CMD_HEARTBEAT)
+        cur_turns = read_all_turns(demux)
 
         # send new trajectory limits and target
         for nid, goal_deg in zip(NODE_IDS, (x_deg, y_deg, z_deg)):
@@ -133,22 +132,15 @@ with can.interface.Bus(channel=BUS_CH, interface="socketcan") as bus:
         # wait for trajectory_done bit
         done = set()
         while done != set(NODE_IDS):
-            msg = bus.recv(timeout=0.1)
-            if msg is None:
-                continue
-            if msg.arbitration_id & 0x1F != CMD_HEARTBEAT:
-                continue
-            nid = msg.arbitration_id >> 5
-            if nid not in NODE_IDS:
-                continue
-            _, _, _, traj_done = struct.unpack('<IBBB', msg.data[:7])
-            if traj_done:
-                done.add(nid)
+            pending = [nid for nid in NODE_IDS if nid not in done]
+            done.update(demux.wait_all(pending, CMD_HEARTBEAT, hb_after, timeout=0.1,
+                                       predicate=lambda hb: hb.trajectory_done_flag))
         print("move completed")
 
         #final error report
+        final_turns = read_all_turns(demux)
         for nid in NODE_IDS:
-            pos_t = read_turns(bus, nid)
+            pos_t = final_turns[nid]
             cur_d = wrap_deg(pos_t * 360.0)
             goal_d = [x_deg, y_deg, z_deg][NODE_IDS.index(nid)]
             e = err_short(goal_d, cur_d)
@@ -157,4 +149,6 @@ with can.interface.Bus(channel=BUS_CH, interface="socketcan") as bus:
     # idle on exit
     for nid in NODE_IDS:
         set_axis_state(bus, nid, AXIS_IDLE)
+    demux.stop()
+    demux.join(timeout=1.0)
 print("Axes idled – bye.")
@@ -1,23 +1,42 @@
-import can, struct, time
+import can, os, time
+
+from can_daemon import DaemonBus, socket_path
+from odrive_can import CMD_HEARTBEAT, decode_heartbeat
 
 NODE_IDS = [0, 1, 2, 3, 4]
 TIMEOUT  = 2.0
 
-bus = can.interface.Bus("can0", bustype="socketcan")
+CHANNEL = os.environ.get("CAN_CHANNEL", "can0")
 seen = {}
-deadline = time.time() + TIMEOUT
-while time.time() < deadline and len(seen) < len(NODE_IDS):
-    msg = bus.recv(timeout=0.1)
-    if not msg:
-        continue
-    nid = msg.arbitration_id >> 5
-    cmd = msg.arbitration_id & 0x1F
-    if cmd == 0x01 and nid in NODE_IDS: # Heartbeat
-        error, state, result, traj = struct.unpack('<IBBB', bytes(msg.data[:7]))
-        seen[nid] = (error, state)
+last_seen = {}  # nid -> age of a cached heartbeat too old to count
+try:
+    # a running can_daemon.py already has every node's latest heartbeat, however old
+    with DaemonBus(socket_path(CHANNEL), subscribe=False) as bus:
+        for nid, node in bus.state().items():
+            if nid not in NODE_IDS or not node.heartbeat:
+                continue
+            if node.heartbeat_age <= TIMEOUT:
+                seen[nid] = (node.heartbeat.axis_error, node.heartbeat.axis_state)
+            else:
+                last_seen[nid] = node.heartbeat_age
+except can.CanInitializationError:
+    bus = can.interface.Bus(CHANNEL, bustype="socketcan")
+    deadline = time.time() + TIMEOUT
+    while time.time() < deadline and len(seen) < len(NODE_IDS):
+        msg = bus.recv(timeout=0.1)
+        if not msg:
+            continue
+        nid = msg.arbitration_id >> 5
+        cmd = msg.arbitration_id & 0x1F
+        if cmd == CMD_HEARTBEAT and nid in NODE_IDS:
+            hb = decode_heartbeat(msg.data)
+            if hb:
+                seen[nid] = (hb.axis_error, hb.axis_state)
 for nid in NODE_IDS:
     if nid in seen:
         err, st = seen[nid]
         print(f"Node {nid:2d}: state={st}  error=0x{err:08X}")
+    elif nid in last_seen:
+        print(f"Node {nid:2d}: **no heartbeat (last seen {last_seen[nid]:.1f}s ago)**")
     else:
         print(f"Node {nid:2d}: **no heartbeat received**")
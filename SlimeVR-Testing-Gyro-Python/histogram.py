@@ -0,0 +1,47 @@
+"""Log-bucket duration histogram shared by can_stats.CanStats and rt_sched.DeadlineScheduler."""
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Dict
+
+# log-spaced latency buckets, 10 per decade from 10 us to 10 s
+_EDGES = [10.0 ** (e / 10.0) for e in range(-50, 11)]
+
+
+class Histogram:
+    """Fixed log-bucket histogram of durations in seconds, percentiles are bucket upper edges (capped at max)."""
+
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_EDGES) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(_EDGES, seconds)] += 1
+        self.n += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        if not self.n:
+            return math.nan
+        rank = p / 100.0 * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(_EDGES[i], self.max) if i < len(_EDGES) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else math.nan
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"n": self.n, "mean": self.mean, "p50": self.percentile(50),
+                "p99": self.percentile(99), "max": self.max}
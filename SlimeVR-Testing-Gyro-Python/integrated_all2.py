@@ -10,11 +10,55 @@ import struct
 import sys
 import threading
 import time
-from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Tuple, List, Optional, Deque
+from typing import Dict, Tuple, List, Optional
+
+import numpy as np
+
+from batched_writer import BatchedRowWriter
+from can_daemon import open_bus
+from can_demux import CanDemux
+from can_stats import CanStats
+from can_tx import CanTxScheduler
+from odrive_can import (
+    encode_rx_sdo,
+    encode_set_axis_state,
+    encode_set_controller_mode,
+    encode_set_input_pos,
+    encode_set_traj_accel_limits,
+    encode_set_traj_vel_limit,
+)
+from rt_sched import DeadlineScheduler, try_sched_fifo
+from binlog import BinaryLogger
+from bvh_cache import TrajectoryCache, cache_key, file_fingerprint
+from bvh_resample import GimbalTrajectory
+from bvh_stream import ProgressiveLoad
+from ringbuffer import RingBuffer
+from tracker_registry import TrackerRegistry
+from udp_ingest import IngestPool
+from slimevr_packets import (
+    HANDSHAKE_RESPONSE,
+    HEADER_SIZE,
+    PACKET_ACCELERATION,
+    PACKET_BATTERY,
+    PACKET_HANDSHAKE,
+    PACKET_ROTATION,
+    PACKET_ROTATION_AND_ACCELERATION,
+    SERVER_PORT,
+    PacketDispatcher,
+    decode_acceleration,
+    decode_battery,
+    decode_handshake_mac,
+    decode_rotation,
+    decode_rotation_and_accel,
+    accel_in_range,
+    q_to_euler_xyz_deg,
+    tracker_key,
+    validate_quaternion,
+)
+
 
 def setup_error_logging():
     log_dir = Path(__file__).parent / "logs"
@@ -70,13 +114,6 @@ except ImportError:
     DPG_AVAILABLE = False
     print("[WARN] DearPyGui not installed. Run: pip install dearpygui")
 
-try:
-    from bvh import Bvh
-    BVH_AVAILABLE = True
-except ImportError:
-    BVH_AVAILABLE = False
-    print("[WARN] bvh library not installed. Run: pip install bvh")
-
 try:
     import hid
     HID_AVAILABLE = True
@@ -86,8 +123,12 @@ except ImportError:
 
 
 # CAN Bus Configuration
-BUS_CH = "can0"
+BUS_CH = os.environ.get("CAN_CHANNEL", "can0")  # e.g. vcan0 with odrive_sim.py, goes through can_daemon.py when one serves it
 CAN_INTERFACE = "socketcan"
+CAN_BITRATE = 1_000_000  # only used for the bus load figure
+CAN_STATS_PERIOD_S = 10.0  # print the CAN timing summary this often
+CAN_STATS = os.environ.get("CAN_STATS", "0") == "1"  # print it (always on with VERBOSE)
+CAN_TRACE = os.environ.get("CAN_TRACE", "")  # path for a raw CSV trace of every CAN event, see can_stats.py
 NODE_IDS = [1, 2, 3]
 
 # Gimbal Parameters
@@ -104,23 +145,22 @@ CMD_TRAJ_VEL_LIM = 0x11
 CMD_TRAJ_ACCEL_LIM = 0x12
 CMD_SET_INPUT_POS = 0x0C
 CMD_ENCODER_EST = 0x09
+CMD_RX_SDO = 0x04
+
+# RxSdo opcode, frames are built by odrive_can.py (generated from the DBC)
+SDO_OPCODE_WRITE = 1
+# axis0.config.can.encoder_msg_rate_ms, id from apps/gyro-server/flat_endpoints.json
+ENDPOINT_ENCODER_MSG_RATE_MS = 232
 
 # Axis States
 AXIS_IDLE = 1
 AXIS_CLOSED_LOOP = 8
 CTRL_MODE_POS = 3
+INPUT_MODE_PASSTHROUGH = 1
+INPUT_MODE_POS_FILTER = 3
 INPUT_MODE_TRAP = 5
 
-# SlimeVR Protocol
-SERVER_PORT = 6969
-HANDSHAKE_RESPONSE = bytes([3]) + b"Hey OVR =D 5"
-HEADER_MAGIC = b"\x00\x00\x00"
-PACKET_HANDSHAKE = 3
-PACKET_BATTERY = 12
-PACKET_ROTATION = 17
-PACKET_ROTATION_AND_ACCELERATION = 23
-PACKET_ACCELERATION = 4
-HEADER_SIZE = 12
+# SlimeVR Protocol (packet layouts live in slimevr_packets.py)
 DISCONNECT_SECONDS = 5
 
 # HID Configuration
@@ -135,13 +175,30 @@ BVH_TO_GIMBAL_Q = (1.0, 0.0, 0.0, 0.0)
 AXIS_REMAP = (0, 1, 2)
 AXIS_SIGN = (1.0, 1.0, 1.0)
 LOOP_BVH = True
+# converted trajectories are cached here keyed by file hash + the settings above, "" = off (see bvh_cache.py)
+BVH_CACHE_DIR = os.environ.get("BVH_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bvh_cache"))
+BVH_CACHE_MAX_MB = 512
 DO_STEP_TEST = False
 
 # Timing
-OUTPUT_HZ = 10.0
+OUTPUT_HZ = float(os.environ.get("OUTPUT_HZ", "10"))  # setpoint rate, 100-250 wants ENCODER_MODE=cyclic
 OUTPUT_PERIOD = 1.0 / OUTPUT_HZ
-FRAME_DECIMATE = 10
+BVH_PLAYBACK_SPEED = 1.0  # BVH seconds per wall-clock second
+SCHED_SPIN_S = 0.0005  # busy-wait the last bit of every tick for low jitter
+# "trap": a trapezoidal move per tick, "stream": precomputed setpoints with velocity/torque feed-forward
+GIMBAL_MODE = os.environ.get("GIMBAL_MODE", "trap")
+STREAM_INPUT_MODE = INPUT_MODE_PASSTHROUGH  # INPUT_MODE_POS_FILTER lets the ODrive smooth the stream
+GIMBAL_INERTIA = 0.0  # Nm per turn/s^2, torque feed-forward = inertia * acceleration, 0 = off
+STREAM_APPROACH_VEL = 0.25  # turns/s for the move to the first setpoint
+STREAM_APPROACH_TIMEOUT_S = 10.0
+GIMBAL_RT_PRIORITY = int(os.environ.get("GIMBAL_RT_PRIORITY", "0"))  # >0: try SCHED_FIFO (needs CAP_SYS_NICE)
 ENCODER_POLL_EVERY = 1
+# "cyclic": ODrives broadcast encoder estimates every ENCODER_RATE_MS and the loop reads the latest one,
+# "rtr": request each estimate with an RTR frame and wait for the reply
+ENCODER_MODE = os.environ.get("ENCODER_MODE", "cyclic")
+ENCODER_RATE_MS = 10
+ENCODER_STALE_S = 0.1  # older broadcast estimates are stale, that axis holds its setpoint
+ENCODER_RECONFIG_S = 1.0  # re-send the rate after this long stale (node rebooted?)
 POS_EPS_DEG = 0.25
 VEL_EPS = 1e-3
 ACC_EPS = 1e-3
@@ -149,14 +206,25 @@ TX_RETRIES = 10
 
 VERBOSE = False
 
+# CSV logging: queue rows to a writer thread instead of write+flush per packet
+CSV_BATCHED = True
+# "csv" or "bin" (fixed-width records, convert with: python binlog.py integrated_tracker_log.bin)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "csv")
+# >0: receive UDP in this many SO_REUSEPORT worker processes (udp_ingest.py) instead of the asyncio endpoint
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "0"))
+
 # Graph Configuration
 GRAPH_WINDOW_SECONDS = 60  # how many seconds to show on the graph
 GRAPH_SAMPLE_HZ = 120.0 # data rate of trackers
 GRAPH_BUFFER_MARGIN = 1.2  # extra pad amount for data 
 HISTORY_MAXLEN = int(GRAPH_WINDOW_SECONDS * GRAPH_SAMPLE_HZ * GRAPH_BUFFER_MARGIN)
+BATTERY_HISTORY_MAXLEN = 24 * 3600  # a day of 1 Hz battery reports
+VIZ_MAX_TRACKERS = 64  # per-tracker histories kept, least recently updated tracker is dropped beyond this
 
 @dataclass
-class VisualizerState:
+class TrackerTelemetry:
+    mac: str
+
     # Tracker data
     quat: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 1.0)  # x, y, z, w
     euler: Tuple[float, float, float] = (0.0, 0.0, 0.0)  # roll, pitch, yaw
@@ -166,6 +234,23 @@ class VisualizerState:
     battery_pct: float = 100.0
     battery_volt: float = 4.2
 
+    samples: int = 0
+    last_update: float = 0.0
+
+    # time axis stays float64, values are float32: ~3 MB per tracker, mostly the day of battery history
+    # (np.zeros pages are only resident once written, a short session costs far less)
+    time_history: RingBuffer = field(default_factory=lambda: RingBuffer(HISTORY_MAXLEN))
+    roll_history: RingBuffer = field(default_factory=lambda: RingBuffer(HISTORY_MAXLEN, np.float32))
+    pitch_history: RingBuffer = field(default_factory=lambda: RingBuffer(HISTORY_MAXLEN, np.float32))
+    yaw_history: RingBuffer = field(default_factory=lambda: RingBuffer(HISTORY_MAXLEN, np.float32))
+
+    # whole session batt hist (fixed size too, see BATTERY_HISTORY_MAXLEN)
+    battery_time_history: RingBuffer = field(default_factory=lambda: RingBuffer(BATTERY_HISTORY_MAXLEN))
+    battery_history: RingBuffer = field(default_factory=lambda: RingBuffer(BATTERY_HISTORY_MAXLEN, np.float32))
+    voltage_history: RingBuffer = field(default_factory=lambda: RingBuffer(BATTERY_HISTORY_MAXLEN, np.float32))
+
+@dataclass
+class VisualizerState:
     # Gimbal state
     goal_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0)
     enc_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0)
@@ -176,22 +261,35 @@ class VisualizerState:
 
     # maxlen the graphs keep before discard is calculated from GRAPH_WINDOW_SECONDS * GRAPH_SAMPLE_HZ * margin
     history_len: int = HISTORY_MAXLEN
-    time_history: Deque[float] = field(default_factory=lambda: deque(maxlen=HISTORY_MAXLEN))
-    roll_history: Deque[float] = field(default_factory=lambda: deque(maxlen=HISTORY_MAXLEN))
-    pitch_history: Deque[float] = field(default_factory=lambda: deque(maxlen=HISTORY_MAXLEN))
-    yaw_history: Deque[float] = field(default_factory=lambda: deque(maxlen=HISTORY_MAXLEN))
-    err_history: Deque[float] = field(default_factory=lambda: deque(maxlen=HISTORY_MAXLEN))
+    err_history: RingBuffer = field(default_factory=lambda: RingBuffer(HISTORY_MAXLEN))
 
-    # entire session batt hist
-    battery_time_history: List[float] = field(default_factory=list)
-    battery_history: List[float] = field(default_factory=list)
-    voltage_history: List[float] = field(default_factory=list)
+    # Tracker data, keyed by MAC
+    trackers: Dict[str, TrackerTelemetry] = field(default_factory=dict)
 
 # Global state
 viz_state = VisualizerState()
 _viz_lock = threading.Lock()
 
+# Current (enc_deg, goal_deg), republished as one immutable tuple on every gimbal update.
+# Swapping the reference is atomic, so the ingest path reads it without _viz_lock.
+_gimbal_snapshot: Tuple[Tuple[float, float, float], Tuple[float, float, float]] = (
+    (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)
+)
+
+def _viz_tracker(mac: str, now: float) -> TrackerTelemetry:
+    """Per-tracker telemetry, allocated once on first sight. Call with _viz_lock held."""
+    trk = viz_state.trackers.get(mac)
+    if trk is None:
+        if len(viz_state.trackers) >= VIZ_MAX_TRACKERS:
+            stale = min(viz_state.trackers.values(), key=lambda t: t.last_update)
+            del viz_state.trackers[stale.mac]
+        trk = TrackerTelemetry(mac=mac)
+        viz_state.trackers[mac] = trk
+    trk.last_update = now
+    return trk
+
 def update_viz_state(
+    mac: Optional[str] = None,
     quat: Optional[Tuple[float, float, float, float]] = None,
     euler: Optional[Tuple[float, float, float]] = None,
     accel: Optional[Tuple[float, float, float]] = None,
@@ -200,39 +298,50 @@ def update_viz_state(
     goal_deg: Optional[Tuple[float, float, float]] = None,
     enc_deg: Optional[Tuple[float, float, float]] = None,
 ):
+    """Tracker fields go to the telemetry of `mac`, gimbal fields are shared by all trackers."""
+    global _gimbal_snapshot
     with _viz_lock:
+        now = time.time()
         if viz_state.start_time is None:
-            viz_state.start_time = time.time()
+            viz_state.start_time = now
+
+        elapsed = now - viz_state.start_time
+
+        if mac is not None:
+            trk = _viz_tracker(mac, now)
+
+            # Update values
+            if quat is not None:
+                trk.quat = quat
+            if euler is not None:
+                trk.euler = euler
+            if accel is not None:
+                trk.accel = accel
+            if battery_pct is not None:
+                trk.battery_pct = battery_pct
+            if battery_volt is not None:
+                trk.battery_volt = battery_volt
+
+            if euler is not None:
+                trk.roll_history.append(euler[0])
+                trk.pitch_history.append(euler[1])
+                trk.yaw_history.append(euler[2])
+                trk.time_history.append(elapsed)
+
+            #we have to now record that data separately since we want to keep all battery data
+            if battery_pct is not None or battery_volt is not None:
+                trk.battery_time_history.append(elapsed)
+                trk.battery_history.append(trk.battery_pct)
+                trk.voltage_history.append(trk.battery_volt)
+
+            trk.samples += 1
 
-        elapsed = time.time() - viz_state.start_time
-
-        # Update values
-        if quat is not None:
-            viz_state.quat = quat
-        if euler is not None:
-            viz_state.euler = euler
-        if accel is not None:
-            viz_state.accel = accel
-        if battery_pct is not None:
-            viz_state.battery_pct = battery_pct
-        if battery_volt is not None:
-            viz_state.battery_volt = battery_volt
         if goal_deg is not None:
             viz_state.goal_deg = goal_deg
         if enc_deg is not None:
             viz_state.enc_deg = enc_deg
-
-        if euler is not None:
-            viz_state.roll_history.append(euler[0])
-            viz_state.pitch_history.append(euler[1])
-            viz_state.yaw_history.append(euler[2])
-            viz_state.time_history.append(elapsed)
-
-        #we have to now record that data separately since we want to keep all battery data
-        if battery_pct is not None or battery_volt is not None:
-            viz_state.battery_time_history.append(elapsed)
-            viz_state.battery_history.append(viz_state.battery_pct)
-            viz_state.voltage_history.append(viz_state.battery_volt)
+        if goal_deg is not None or enc_deg is not None:
+            _gimbal_snapshot = (tuple(viz_state.enc_deg), tuple(viz_state.goal_deg))
 
         if enc_deg is not None:
             err = sum(err_short(g, e) ** 2 for g, e in zip(viz_state.goal_deg, viz_state.enc_deg)) ** 0.5
@@ -240,29 +349,68 @@ def update_viz_state(
 
         viz_state.samples += 1
 
-def get_viz_state() -> dict:
-    """Thread-safe read of visualizer state."""
+def get_gimbal_state() -> Tuple[Tuple[float, float, float], Tuple[float, float, float]]:
+    """Latest (enc_deg, goal_deg) for the ingest path, no lock and no history copies."""
+    return _gimbal_snapshot
+
+def get_viz_state(mac: Optional[str] = None, window_seconds: float = GRAPH_WINDOW_SECONDS) -> dict:
+    """Thread-safe copy of visualizer state for the renderer only.
+
+    Tracker fields come from `mac`, or the first known tracker if it is
+    unknown. Orientation histories are cut to the last window_seconds, each
+    series is copied exactly once (ring buffer view -> list) under the lock.
+    """
     with _viz_lock:
-        return {
-            'quat': viz_state.quat,
-            'euler': viz_state.euler,
-            'accel': viz_state.accel,
-            'battery_pct': viz_state.battery_pct,
-            'battery_volt': viz_state.battery_volt,
+        state = {
             'goal_deg': viz_state.goal_deg,
             'enc_deg': viz_state.enc_deg,
             'start_time': viz_state.start_time,
             'samples': viz_state.samples,
-            'time_history': list(viz_state.time_history),
-            'battery_time_history': list(viz_state.battery_time_history),
-            'battery_history': list(viz_state.battery_history),
-            'voltage_history': list(viz_state.voltage_history),
-            'roll_history': list(viz_state.roll_history),
-            'pitch_history': list(viz_state.pitch_history),
-            'yaw_history': list(viz_state.yaw_history),
-            'err_history': list(viz_state.err_history),
+            'err': viz_state.err_history.last(),
+            'trackers': list(viz_state.trackers),
         }
-
+        trk = viz_state.trackers.get(mac) if mac else None
+        if trk is None and viz_state.trackers:
+            trk = next(iter(viz_state.trackers.values()))
+        if trk is None:
+            state.update({
+                'mac': None,
+                'quat': (0.0, 0.0, 0.0, 1.0),
+                'euler': (0.0, 0.0, 0.0),
+                'accel': (0.0, 0.0, 0.0),
+                'battery_pct': 100.0,
+                'battery_volt': 4.2,
+                'tracker_samples': 0,
+                'time_history': [],
+                'battery_time_history': [],
+                'battery_history': [],
+                'voltage_history': [],
+                'roll_history': [],
+                'pitch_history': [],
+                'yaw_history': [],
+            })
+            return state
+
+        t = trk.time_history.view()
+        start = int(np.searchsorted(t, max(0.0, t[-1] - window_seconds))) if len(t) else 0
+        n = len(t) - start
+        state.update({
+            'mac': trk.mac,
+            'quat': trk.quat,
+            'euler': trk.euler,
+            'accel': trk.accel,
+            'battery_pct': trk.battery_pct,
+            'battery_volt': trk.battery_volt,
+            'tracker_samples': trk.samples,
+            'time_history': t[start:].tolist(),
+            'battery_time_history': trk.battery_time_history.view().tolist(),
+            'battery_history': trk.battery_history.view().tolist(),
+            'voltage_history': trk.voltage_history.view().tolist(),
+            'roll_history': trk.roll_history.view(n).tolist(),
+            'pitch_history': trk.pitch_history.view(n).tolist(),
+            'yaw_history': trk.yaw_history.view(n).tolist(),
+        })
+        return state
 
 def cid(nid: int, cmd: int) -> int:
     return (nid << 5) | cmd
@@ -270,54 +418,6 @@ def cid(nid: int, cmd: int) -> int:
 def err_short(goal: float, cur: float) -> float:
     return ((goal - cur + 540) % 360) - 180
 
-def validate_quaternion(qx: float, qy: float, qz: float, qw: float) -> bool:
-    if any(not (-10.0 < v < 10.0) or v != v for v in [qx, qy, qz, qw]):
-        return False
-    magnitude = (qx*qx + qy*qy + qz*qz + qw*qw) ** 0.5
-    return 0.1 < magnitude < 2.0
-
-def _q_mul(a, b):
-    aw, ax, ay, az = a
-    bw, bx, by, bz = b
-    return (
-        aw*bw - ax*bx - ay*by - az*bz,
-        aw*bx + ax*bw + ay*bz - az*by,
-        aw*by - ax*bz + ay*bw + az*bx,
-        aw*bz + ax*by - ay*bx + az*bw,
-    )
-
-def _q_normalize(q):
-    w, x, y, z = q
-    n = math.sqrt(w*w + x*x + y*y + z*z)
-    if n == 0:
-        return (1.0, 0.0, 0.0, 0.0)
-    return (w/n, x/n, y/n, z/n)
-
-def _q_to_euler_xyz_deg(q):
-    w, x, y, z = q
-    sinr_cosp = 2 * (w * x + y * z)
-    cosr_cosp = 1 - 2 * (x * x + y * y)
-    roll = math.degrees(math.atan2(sinr_cosp, cosr_cosp))
-    sinp = 2 * (w * y - z * x)
-    if abs(sinp) >= 1:
-        pitch = math.degrees(math.copysign(math.pi / 2, sinp))
-    else:
-        pitch = math.degrees(math.asin(sinp))
-    siny_cosp = 2 * (w * z + x * y)
-    cosy_cosp = 1 - 2 * (y * y + z * z)
-    yaw = math.degrees(math.atan2(siny_cosp, cosy_cosp))
-    return (roll, pitch, yaw)
-
-def _q_axis(axis: str, deg: float):
-    r = math.radians(deg) * 0.5
-    s, c = math.sin(r), math.cos(r)
-    if axis == "X":
-        return (c, s, 0.0, 0.0)
-    if axis == "Y":
-        return (c, 0.0, s, 0.0)
-    return (c, 0.0, 0.0, s)
-
-
 @dataclass
 class Tracker:
     mac: str
@@ -332,80 +432,124 @@ class Tracker:
     def update_seen(self) -> None:
         self.last_seen = time.time()
 
-def _get_parent_name(mocap: Bvh, joint: str) -> Optional[str]:
-    try:
-        node = mocap.get_joint(joint)
-        if getattr(node, "parent", None):
-            return node.parent.name
-    except Exception:
-        pass
-    try:
-        return mocap.joint_parent(joint)
-    except Exception:
-        return None
-
-def _build_chain_root_to_joint(mocap: Bvh, joint: str) -> List[str]:
-    chain = []
-    cur = joint
-    seen = set()
-    while cur and cur not in seen:
-        seen.add(cur)
-        chain.append(cur)
-        cur = _get_parent_name(mocap, cur)
-    chain.reverse()
-    return chain
-
-def _joint_rot_channels(mocap: Bvh, joint: str) -> List[str]:
-    return [c for c in mocap.joint_channels(joint) if c.endswith("rotation")]
-
-def _local_quat_from_channels(mocap: Bvh, frame_idx: int, joint: str) -> Tuple[float, float, float, float]:
-    chans = _joint_rot_channels(mocap, joint)
-    q = (1.0, 0.0, 0.0, 0.0)
-    if not chans:
-        return q
-    vals = mocap.frame_joint_channels(frame_idx, joint, chans)
-    if len(vals) != len(chans):
-        raise RuntimeError(f"Channel/value mismatch for {joint}")
-    for ch_name, val in zip(chans, vals):
-        axis = ch_name[0].upper()
-        q = _q_mul(q, _q_axis(axis, float(val)))
-    return _q_normalize(q)
-
 @dataclass
 class BVHSource:
-    frames: List[Tuple[float, float, float]]
+    frames: np.ndarray  # (frames x 3) gimbal Euler degrees, see bvh_motion.chain_euler
     frame_time: float
+    loader: Optional[ProgressiveLoad] = None  # set while bvh_stream is still filling frames, see current()
+
+    @staticmethod
+    def _cache_key(fingerprint: str, joint: str) -> str:
+        return cache_key(fingerprint, joint=joint, to_gimbal_q=BVH_TO_GIMBAL_Q, remap=AXIS_REMAP, sign=AXIS_SIGN)
 
     @classmethod
     def load(cls, path: str, joint: str) -> "BVHSource":
-        with open(path, "r") as f:
-            mocap = Bvh(f.read())
-
-        chain = _build_chain_root_to_joint(mocap, joint)
-        if not chain:
-            raise RuntimeError(f"Joint '{joint}' not found in BVH")
-
-        n = len(mocap.frames)
-        seq: List[Tuple[float, float, float]] = []
-
-        for i in range(n):
-            qg = (1.0, 0.0, 0.0, 0.0)
-            for jn in chain:
-                qloc = _local_quat_from_channels(mocap, i, jn)
-                qg = _q_mul(qg, qloc)
-            qg = _q_normalize(qg)
-            qg = _q_mul(BVH_TO_GIMBAL_Q, qg)
-            qg = _q_normalize(qg)
-            x_deg, y_deg, z_deg = _q_to_euler_xyz_deg(qg)
-            seq.append((x_deg, y_deg, z_deg))
-
-        ft = float(getattr(mocap, "frame_time", 1.0/60.0))
-        if not (1e-4 < ft < 1.0):
-            ft = 1.0/60.0
-        return cls(frames=seq, frame_time=ft)
+        """Returns once the first block of frames is in, the rest streams in behind playback."""
+        cache = key = None
+        if BVH_CACHE_DIR:
+            cache = TrajectoryCache(BVH_CACHE_DIR, BVH_CACHE_MAX_MB << 20)
+            key = cls._cache_key(file_fingerprint(path), joint)
+            hit = cache.get(key)
+            if hit is not None:
+                print(f"[BVH] cache hit {key}")
+                return cls(frames=hit[0], frame_time=hit[1])
+
+        def store(load: ProgressiveLoad) -> None:
+            try:
+                cache.put(key, load.angles, load.header.frame_time, {"path": os.path.abspath(path), "joint": joint})
+            except OSError as e:
+                print(f"[WARN] BVH cache write failed: {e}")
+
+        loader = ProgressiveLoad(path, joint, BVH_TO_GIMBAL_Q, on_done=store if cache is not None else None)
+        loader.start()
+        loader.first.wait()
+        src = cls(frames=loader.angles, frame_time=loader.header.frame_time, loader=loader)
+        src.current()  # a small file may be done already, raises if the load failed
+        return src
+
+    def current(self) -> Tuple[np.ndarray, int]:
+        """(frames, rows valid so far), the second is len(frames) once the streaming load has finished."""
+        loader = self.loader
+        if loader is None:
+            return self.frames, len(self.frames)
+        loaded = loader.loaded  # before angles: rows below it are valid in whichever array that is
+        frames = loader.angles
+        if loader.done.is_set():
+            self.wait_loaded()
+            return self.frames, len(self.frames)
+        return frames, loaded
+
+    def wait_loaded(self) -> None:
+        if self.loader is not None:
+            self.frames = self.loader.result()
+            self.loader = None
+
+    def trajectory(self, period: float, speed: float = 1.0) -> GimbalTrajectory:
+        """Empty slerp-resampled gimbal trajectory for this capture, fill it with extend()."""
+        return GimbalTrajectory(self.frame_time, period, speed, AXIS_REMAP, AXIS_SIGN, SPEED_MIN_DEG, SPEED_MAX_DEG)
+
+@dataclass
+class StreamTrajectory:
+    """Gimbal setpoints for GIMBAL_MODE=stream, one row per output tick, one column per axis (NODE_IDS order).
+
+    pos is in turns, unwrapped so it never jumps a whole turn between
+    ticks, vel and acc are its derivatives in turns/s and turns/s^2 of
+    wall-clock time. The wrap_* rows lead from the last setpoint to the
+    first one of the next lap (relative to pos[-1], shortest way round) as
+    a minimum-jerk move no faster than wrap_vel_max, empty when the
+    capture ends close enough to where it starts.
+    """
+    pos: np.ndarray
+    vel: np.ndarray
+    acc: np.ndarray
+    start_deg: Tuple[float, float, float]  # first goal of each axis, 0..360
+    wrap_pos: np.ndarray
+    wrap_vel: np.ndarray
+    wrap_acc: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    @classmethod
+    def from_bvh(
+        cls, bvh: BVHSource, period: float, speed: float = 1.0, wrap_vel_max: float = STREAM_APPROACH_VEL,
+    ) -> "StreamTrajectory":
+        if not len(bvh.frames):
+            raise RuntimeError("BVH has no frames")
+        traj = bvh.trajectory(period, speed)
+        traj.extend(bvh.frames, len(bvh.frames), complete=True)
+        pos = traj.goal_deg / 360.0
+        n_ticks = len(pos)
+        if n_ticks > 1:
+            vel = np.gradient(pos, period, axis=0)
+            acc = np.gradient(vel, period, axis=0)
+        else:
+            vel = np.zeros_like(pos)
+            acc = np.zeros_like(pos)
+        start = tuple(float(d) % 360.0 for d in traj.goal_deg[0])
+        wrap_pos, wrap_vel, wrap_acc = cls._wrap_move(pos[-1], pos[0], period, wrap_vel_max)
+        return cls(pos=pos, vel=vel, acc=acc, start_deg=start,
+                   wrap_pos=wrap_pos, wrap_vel=wrap_vel, wrap_acc=wrap_acc)
+
+    @staticmethod
+    def _wrap_move(last: np.ndarray, first: np.ndarray, period: float, vel_max: float):
+        delta = (first - last + 0.5) % 1.0 - 0.5  # turns, shortest way round
+        span = float(np.abs(delta).max())
+        if span <= vel_max * period:
+            # one tick at no more than vel_max, the next lap can start straight away
+            empty = np.zeros((0, len(delta)))
+            return empty, empty, empty
+        # minimum jerk s(u) = 10u^3 - 15u^4 + 6u^5 peaks at 1.875x the mean speed
+        m = int(math.ceil(1.875 * span / (vel_max * period)))
+        dur = (m + 1) * period  # the next lap's first tick is u = 1
+        u = (np.arange(1, m + 1) / (m + 1))[:, None]
+        wrap_pos = delta * (10 * u**3 - 15 * u**4 + 6 * u**5)
+        wrap_vel = delta * (30 * u**2 - 60 * u**3 + 30 * u**4) / dur
+        wrap_acc = delta * (60 * u - 180 * u**2 + 120 * u**3) / dur**2
+        return wrap_pos, wrap_vel, wrap_acc
 
 class CSVLogger:
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, batched: bool = False):
         self._f = path.open("w", newline="")
         self._w = csv.writer(self._f)
         self._w.writerow(
@@ -419,20 +563,14 @@ class CSVLogger:
             ]
         )
         self._lock = threading.Lock()
+        # batched: rows are queued raw and formatted/written on a writer thread
+        self._writer = BatchedRowWriter(self._f, self._format_row) if batched else None
 
-    def log(
-        self,
-        mac: str,
-        battery_pct: float | None,
-        battery_volt: float | None,
-        quat: Tuple[float, float, float, float] | None,
-        accel: Tuple[float, float, float] | None = None,
-        enc_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
-        err_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
-        goal_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
-    ) -> None:
+    @staticmethod
+    def _format_row(raw: tuple) -> List[str]:
+        ts, mac, battery_pct, battery_volt, quat, accel, enc_deg, err_deg, goal_deg = raw
         row: List[str] = [
-            f"{time.time():.6f}",
+            f"{ts:.6f}",
             mac,
             f"{battery_pct:.2f}" if battery_pct is not None else "",
             f"{battery_volt:.3f}" if battery_volt is not None else "",
@@ -446,39 +584,40 @@ class CSVLogger:
         else:
             row.extend(["", "", ""])
         row.extend(f"{v:.3f}" for v in list(enc_deg) + list(err_deg) + list(goal_deg))
+        return row
+
+    def log(
+        self,
+        mac: str,
+        battery_pct: float | None,
+        battery_volt: float | None,
+        quat: Tuple[float, float, float, float] | None,
+        accel: Tuple[float, float, float] | None = None,
+        enc_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        err_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        goal_deg: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+    ) -> None:
+        raw = (time.time(), mac, battery_pct, battery_volt, quat, accel, enc_deg, err_deg, goal_deg)
+        if self._writer:
+            self._writer.push(raw)
+            return
+        row = self._format_row(raw)
         with self._lock:
             self._w.writerow(row)
             self._f.flush()
 
-def _send_rtr(bus: can.Bus, arbitration_id: int, dlc_try=(8, 0)) -> None:
-    last_err = None
-    for dlc in dlc_try:
-        try:
-            msg = can.Message(
-                arbitration_id=arbitration_id,
-                is_extended_id=False,
-                is_remote_frame=True,
-                dlc=dlc
-            )
-            bus.send(msg)
-            return
-        except TypeError as e:
-            last_err = e
-            try:
-                msg = can.Message(
-                    arbitration_id=arbitration_id,
-                    is_extended_id=False,
-                    remote=True,
-                    dlc=dlc
-                )
-                bus.send(msg)
-                return
-            except Exception as e2:
-                last_err = e2
-        except Exception as e:
-            last_err = e
-    if VERBOSE:
-        print(f"[CAN] RTR send failed for 0x{arbitration_id:X}: {last_err}")
+    def stats(self) -> Dict[str, int]:
+        return self._writer.stats() if self._writer else {}
+
+    def close(self) -> None:
+        if self._writer:
+            self._writer.close()
+            stats = self._writer.stats()
+            if stats["dropped"] and not stats["failed"]:  # a failed writer already said so in close()
+                print(f"[LOG] CSV writer dropped {stats['dropped']} rows (queue full or unformattable)")
+        else:
+            with self._lock:
+                self._f.close()
 
 class GimbalThread(threading.Thread):
     def __init__(self) -> None:
@@ -486,12 +625,21 @@ class GimbalThread(threading.Thread):
         self._stop_evt = threading.Event()
         self._last_turns: Dict[int, float] = {}
         self._last_limits: Dict[int, Tuple[float, float]] = {}
+        self._demux: Optional[CanDemux] = None  # owns bus.recv while run() has the bus open
+        self._tx: Optional[CanTxScheduler] = None  # owns bus.send while run() has the bus open
+        self._can_stats: Optional[CanStats] = None
+        self._stale_since: Dict[int, float] = {}
 
     def _flush(self, bus: can.Bus) -> None:
         while bus.recv(timeout=0):
             pass
 
     def _send(self, bus: can.Bus, nid: int, cmd: int, data: bytes = b"\x00") -> None:
+        if self._tx:
+            # queued, goes out with the next _flush_tx() burst
+            if not self._tx.submit(nid, cmd, data) and VERBOSE:
+                print(f"[WARN] TX queue full, dropping cmd=0x{cmd:02X} nid={nid}")
+            return
         msg = can.Message(arbitration_id=cid(nid, cmd), data=data, is_extended_id=False)
         delay = 0.0005
         for _ in range(TX_RETRIES):
@@ -499,6 +647,8 @@ class GimbalThread(threading.Thread):
                 bus.send(msg)
                 return
             except can.CanOperationError:
+                if self._can_stats:
+                    self._can_stats.on_retry(nid, cmd)
                 time.sleep(delay)
                 delay = min(delay * 2, 0.01)
         if VERBOSE:
@@ -506,60 +656,118 @@ class GimbalThread(threading.Thread):
 
     def _set_axis_state(self, bus: can.Bus, nid: int, state: int) -> None:
         try:
-            self._send(bus, nid, CMD_SET_AXIS_STATE, struct.pack("<I", state))
+            self._send(bus, nid, CMD_SET_AXIS_STATE, encode_set_axis_state(state))
         except can.CanOperationError:
             pass
 
-    def _set_controller_mode(self, bus: can.Bus, nid: int) -> None:
-        self._send(bus, nid, CMD_SET_CTRL_MODE, struct.pack("<II", CTRL_MODE_POS, INPUT_MODE_TRAP))
+    def _set_controller_mode(self, bus: can.Bus, nid: int, input_mode: int = INPUT_MODE_TRAP) -> None:
+        self._send(bus, nid, CMD_SET_CTRL_MODE, encode_set_controller_mode(CTRL_MODE_POS, input_mode))
 
     def _set_traj_limits(self, bus: can.Bus, nid: int, vel_rps: float, acc_rps2: float) -> None:
         last = self._last_limits.get(nid)
         if last and abs(last[0] - vel_rps) < VEL_EPS and abs(last[1] - acc_rps2) < ACC_EPS:
             return
-        self._send(bus, nid, CMD_TRAJ_VEL_LIM, struct.pack("<f", vel_rps))
-        self._send(bus, nid, CMD_TRAJ_ACCEL_LIM, struct.pack("<ff", acc_rps2, acc_rps2))
+        self._send(bus, nid, CMD_TRAJ_VEL_LIM, encode_set_traj_vel_limit(vel_rps))
+        self._send(bus, nid, CMD_TRAJ_ACCEL_LIM, encode_set_traj_accel_limits(acc_rps2, acc_rps2))
         self._last_limits[nid] = (vel_rps, acc_rps2)
 
-    def _set_input_pos(self, bus: can.Bus, nid: int, turns: float) -> None:
-        self._send(bus, nid, CMD_SET_INPUT_POS, struct.pack("<fhh", turns, 0, 0))
+    def _set_input_pos(self, bus: can.Bus, nid: int, turns: float, vel_ff: float = 0.0, torque_ff: float = 0.0) -> None:
+        self._send(bus, nid, CMD_SET_INPUT_POS, encode_set_input_pos(turns, vel_ff, torque_ff))
+
+    def _flush_tx(self) -> None:
+        if self._tx:
+            self._tx.flush()
+
+    def _start_can_threads(self, bus: can.Bus) -> None:
+        self._can_stats = CanStats(
+            CAN_BITRATE, Path(CAN_TRACE) if CAN_TRACE else None, rtr_rtt=ENCODER_MODE != "cyclic",
+        )
+        if CAN_TRACE:
+            print(f"[CAN] Tracing to {CAN_TRACE}")
+        self._demux = CanDemux(bus, observer=self._can_stats)
+        self._demux.start()
+        self._tx = CanTxScheduler(
+            bus,
+            coalesce=(CMD_SET_INPUT_POS, CMD_TRAJ_VEL_LIM, CMD_TRAJ_ACCEL_LIM),
+            bitrate=CAN_BITRATE,
+            demux=self._demux,
+            observer=self._can_stats,
+        )
+        self._tx.start()
+
+    def _stop_can_threads(self) -> None:
+        if self._tx:
+            self._tx.stop()
+            self._tx.join(timeout=1.0)
+            self._tx = None
+        if self._demux:
+            self._demux.stop()
+            self._demux.join(timeout=1.0)
+            self._demux = None
+        if self._can_stats:
+            self._can_stats.close()
+
+    def tx_stats(self) -> Dict[str, float]:
+        """CanTxScheduler.stats() (queue depth, merged/dropped frames, bus load %), empty while the bus is closed."""
+        tx = self._tx
+        return tx.stats() if tx else {}
 
     def _wait_cl(self, bus: can.Bus, timeout_s: float = 2.0) -> None:
-        pending = set(NODE_IDS)
-        deadline = time.time() + timeout_s
-        while pending and time.time() < deadline:
-            msg = bus.recv(timeout=0.1)
-            if not msg:
-                continue
-            if (msg.arbitration_id & 0x1F) != CMD_HEARTBEAT:
-                continue
-            nid = msg.arbitration_id >> 5
-            state = None
-            if len(msg.data) >= 7:
-                try:
-                    state = struct.unpack("<IBBB", msg.data[:7])[1]
-                except Exception:
-                    pass
-            if state == AXIS_CLOSED_LOOP and nid in pending:
-                pending.remove(nid)
+        closed = self._demux.wait_all(
+            NODE_IDS, CMD_HEARTBEAT, after={}, timeout=timeout_s,
+            predicate=lambda hb: hb.axis_state == AXIS_CLOSED_LOOP,
+        )
+        pending = set(NODE_IDS) - set(closed)
         if pending and VERBOSE:
             print(f"[WARN] CL not confirmed for nodes: {sorted(pending)} (continuing)")
 
-    def _read_turns(self, bus: can.Bus, nid: int, timeout: float = 0.03) -> float:
-        _send_rtr(bus, cid(nid, CMD_ENCODER_EST), dlc_try=(8, 0))
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            msg = bus.recv(timeout=max(0, deadline - time.time()))
-            if (
-                msg
-                and (msg.arbitration_id >> 5) == nid
-                and (msg.arbitration_id & 0x1F) == CMD_ENCODER_EST
-                and len(msg.data) >= 8
-            ):
-                pos_turns, vel = struct.unpack("<ff", msg.data[:8])
-                self._last_turns[nid] = pos_turns
-                return pos_turns
-        return self._last_turns.get(nid, 0.0)
+    def _read_all_turns(self, bus: can.Bus, timeout: float = 0.03) -> Dict[int, float]:
+        """Encoder position of every axis, requested together and collected against one deadline.
+
+        An axis that doesn't answer in time keeps its last known position.
+        """
+        after = self._demux.seqs(NODE_IDS, CMD_ENCODER_EST)
+        for nid in NODE_IDS:
+            if not self._tx.submit_rtr(nid, CMD_ENCODER_EST) and VERBOSE:
+                print(f"[WARN] TX queue full, dropping encoder RTR nid={nid}")
+        self._flush_tx()
+        for nid, est in self._demux.wait_all(NODE_IDS, CMD_ENCODER_EST, after, timeout).items():
+            self._last_turns[nid] = est.pos_estimate
+        return {nid: self._last_turns.get(nid, 0.0) for nid in NODE_IDS}
+
+    def _set_encoder_rate(self, bus: can.Bus, nid: int, rate_ms: int) -> None:
+        self._send(bus, nid, CMD_RX_SDO, encode_rx_sdo(SDO_OPCODE_WRITE, ENDPOINT_ENCODER_MSG_RATE_MS, 0, rate_ms))
+
+    def _latest_turns(self, bus: can.Bus) -> Tuple[Dict[int, float], List[int]]:
+        """Newest broadcast encoder position of every axis without waiting, plus the axes whose data is stale.
+
+        A stale axis reports its last known position.
+        """
+        now = time.monotonic()
+        turns: Dict[int, float] = {}
+        stale: List[int] = []
+        for nid in NODE_IDS:
+            latest = self._demux.latest(nid, CMD_ENCODER_EST)
+            if latest is not None and now - latest[1] <= ENCODER_STALE_S:
+                turns[nid] = self._last_turns[nid] = latest[0].pos_estimate
+            else:
+                stale.append(nid)
+                turns[nid] = self._last_turns.get(nid, 0.0)
+        self._watch_stale(bus, stale, now)
+        return turns, stale
+
+    def _watch_stale(self, bus: can.Bus, stale: List[int], now: float) -> None:
+        for nid in NODE_IDS:
+            if nid in stale:
+                since = self._stale_since.get(nid)
+                if since is None:
+                    self._stale_since[nid] = now
+                    print(f"[WARN] Encoder data from node {nid} is stale, holding its setpoint")
+                elif now - since > ENCODER_RECONFIG_S:
+                    self._set_encoder_rate(bus, nid, ENCODER_RATE_MS)
+                    self._stale_since[nid] = now
+            elif self._stale_since.pop(nid, None) is not None:
+                print(f"[INFO] Encoder data from node {nid} is live again")
 
     def _nearest_turns(self, cur_turns: float, target_deg: float) -> float:
         cur_deg = (cur_turns * 360.0) % 360.0
@@ -581,100 +789,303 @@ class BVHGimbalThread(GimbalThread):
         for nid in NODE_IDS:
             self._set_traj_limits(bus, nid, vel_rps=0.5, acc_rps2=1.0)
             self._set_input_pos(bus, nid, 0.0)
+        self._flush_tx()
         time.sleep(0.8)
         for turns in STEP_TEST_TURNS:
             for nid in NODE_IDS:
                 self._set_input_pos(bus, nid, turns)
+            self._flush_tx()
             print(f"[STEP] commanded {turns*360:.0f}°")
             time.sleep(0.8)
         print("[STEP] complete.")
 
+    def _start_sched(self) -> DeadlineScheduler:
+        if try_sched_fifo(GIMBAL_RT_PRIORITY):
+            print(f"[SCHED] Gimbal thread running SCHED_FIFO priority {GIMBAL_RT_PRIORITY}")
+        sched = DeadlineScheduler(OUTPUT_PERIOD, spin_s=SCHED_SPIN_S)
+        sched.start()
+        return sched
+
+    def _print_stats(self, sched: DeadlineScheduler) -> None:
+        st = self.tx_stats()
+        print(f"[CAN] {self._can_stats.summary()} | txq depth {st['depth']} merged {st['merged']}")
+        print(f"[SCHED] {sched.summary()}")
+
+    def _run_trap(self, bus: can.Bus) -> None:
+        """A trapezoidal move towards the resampled BVH pose every tick, speed limit precomputed per tick."""
+        traj = self._bvh.trajectory(OUTPUT_PERIOD, BVH_PLAYBACK_SPEED)
+        frames, loaded = self._bvh.current()
+        if not loaded:
+            raise RuntimeError("BVH has no frames")
+        traj.extend(frames, loaded, self._bvh.loader is None)
+        sched = self._start_sched()
+        next_stats = time.monotonic() + CAN_STATS_PERIOD_S
+
+        while not self._stop_evt.is_set():
+            # ticks skipped by an overrun skip their samples
+            tick, _ = sched.wait()
+            if not traj.complete:
+                frames, loaded = self._bvh.current()
+                traj.extend(frames, loaded, self._bvh.loader is None)
+            if tick >= traj.n_ticks and not self._loop_forever:
+                break
+            # holds the newest sample if playback ever catches up with a streaming load
+            sample = min(tick % traj.n_ticks, traj.ready - 1)
+            goal_deg = traj.goal_deg[sample].tolist()
+            spd_deg = float(traj.speed_deg[sample])
+            vel_rps = spd_deg / 360.0
+            acc_rps2 = vel_rps * ACCEL_FACTOR
+
+            cur_turns, stale = self._current_turns(bus)
+            cur_deg_now = {nid: (cur_turns[nid] * 360.0) % 360.0 for nid in NODE_IDS}
+
+            for axis_index, nid in enumerate(NODE_IDS):
+                if nid in stale:
+                    continue
+                tgt = goal_deg[axis_index]
+                if abs(err_short(tgt, cur_deg_now[nid])) > POS_EPS_DEG:
+                    tgt_turns = self._nearest_turns(cur_turns[nid], tgt)
+                    self._set_traj_limits(bus, nid, vel_rps, acc_rps2)
+                    self._set_input_pos(bus, nid, tgt_turns)
+            # all axes' frames go out back to back
+            self._flush_tx()
+
+            now = time.monotonic()
+            if (CAN_STATS or VERBOSE) and now >= next_stats:
+                self._print_stats(sched)
+                next_stats = now + CAN_STATS_PERIOD_S
+
+            if VERBOSE and tick < 30:
+                print(f"[BVH] sample={sample} goal={goal_deg} cur={[cur_deg_now[n] for n in NODE_IDS]} spd≈{spd_deg:.1f}°/s")
+
+            # Update visualizer state
+            update_viz_state(
+                goal_deg=tuple(g % 360.0 for g in goal_deg),
+                enc_deg=tuple(cur_deg_now[nid] for nid in NODE_IDS)
+            )
+
+        print(f"[SCHED] run: {sched.summary(whole_run=True)}")
+
+    def _current_turns(self, bus: can.Bus) -> Tuple[Dict[int, float], List[int]]:
+        if ENCODER_MODE == "cyclic":
+            return self._latest_turns(bus)
+        return self._read_all_turns(bus), []
+
+    def _approach(self, bus: can.Bus, target: Dict[int, float]) -> None:
+        """Trapezoidal move to target (turns per node), returns once every axis is within POS_EPS_DEG or on timeout."""
+        for nid in NODE_IDS:
+            self._set_traj_limits(bus, nid, STREAM_APPROACH_VEL, STREAM_APPROACH_VEL * ACCEL_FACTOR)
+            self._set_input_pos(bus, nid, target[nid])
+        self._flush_tx()
+        deadline = time.monotonic() + STREAM_APPROACH_TIMEOUT_S
+        while not self._stop_evt.is_set() and time.monotonic() < deadline:
+            cur_turns, _ = self._current_turns(bus)
+            if all(abs(cur_turns[nid] - target[nid]) * 360.0 <= POS_EPS_DEG for nid in NODE_IDS):
+                return
+            time.sleep(OUTPUT_PERIOD)
+        print("[WARN] Start pose not reached, streaming anyway")
+
+    def _run_stream(self, bus: can.Bus) -> None:
+        """Stream the precomputed trajectory: one SET_INPUT_POS per axis per tick with velocity/torque feed-forward.
+
+        The gimbal first moves to the first setpoint in trap mode, then
+        switches to STREAM_INPUT_MODE. The trajectory is unwrapped, so each
+        pass over the BVH is shifted by whole turns to start on the turn
+        the axis ended the previous one on. Between passes the precomputed
+        wrap move takes the axes from the last setpoint to the first one.
+        """
+        self._bvh.wait_loaded()  # the trajectory is precomputed over the whole file
+        traj = StreamTrajectory.from_bvh(self._bvh, OUTPUT_PERIOD, BVH_PLAYBACK_SPEED)
+        n = len(traj)
+        cur_turns, _ = self._current_turns(bus)
+        base = {nid: self._nearest_turns(cur_turns[nid], traj.start_deg[k]) - traj.pos[0, k]
+                for k, nid in enumerate(NODE_IDS)}
+        self._approach(bus, {nid: base[nid] + traj.pos[0, k] for k, nid in enumerate(NODE_IDS)})
+        for nid in NODE_IDS:
+            self._set_controller_mode(bus, nid, STREAM_INPUT_MODE)
+        self._flush_tx()
+        print(f"[STREAM] {n} setpoints/axis at {OUTPUT_HZ:.0f} Hz, input mode {STREAM_INPUT_MODE}")
+
+        sched = self._start_sched()
+        next_stats = time.monotonic() + CAN_STATS_PERIOD_S
+        err_sq = 0.0
+        err_n = 0
+        m = len(traj.wrap_pos)
+        lap_start = 0
+        while not self._stop_evt.is_set():
+            tick, _ = sched.wait()
+            i = tick - lap_start
+            if i >= n and not self._loop_forever:
+                break
+            while i >= n + m:
+                # the wrap move ended on the next lap's first setpoint, continue from there
+                base = {nid: self._nearest_turns(base[nid] + traj.pos[-1, k], traj.start_deg[k]) - traj.pos[0, k]
+                        for k, nid in enumerate(NODE_IDS)}
+                lap_start += n + m
+                i = tick - lap_start
+            if i < n:
+                pos, vel, acc = traj.pos[i], traj.vel[i], traj.acc[i]
+            else:
+                j = i - n
+                pos, vel, acc = traj.pos[-1] + traj.wrap_pos[j], traj.wrap_vel[j], traj.wrap_acc[j]
+
+            cur_turns, stale = self._current_turns(bus)
+            goal_deg = []
+            for k, nid in enumerate(NODE_IDS):
+                sp = base[nid] + pos[k]
+                goal_deg.append((sp * 360.0) % 360.0)
+                if nid in stale:
+                    continue
+                self._set_input_pos(bus, nid, sp, vel[k], GIMBAL_INERTIA * acc[k])
+                err = (sp - cur_turns[nid]) * 360.0
+                err_sq += err * err
+                err_n += 1
+            self._flush_tx()
+
+            now = time.monotonic()
+            if (CAN_STATS or VERBOSE) and now >= next_stats:
+                self._print_stats(sched)
+                if err_n:
+                    print(f"[STREAM] rms tracking error {math.sqrt(err_sq / err_n):.3f}°")
+                err_sq = 0.0
+                err_n = 0
+                next_stats = now + CAN_STATS_PERIOD_S
+
+            update_viz_state(
+                goal_deg=tuple(goal_deg),
+                enc_deg=tuple((cur_turns[nid] * 360.0) % 360.0 for nid in NODE_IDS)
+            )
+
+        print(f"[SCHED] run: {sched.summary(whole_run=True)}")
+
     def run(self) -> None:
         try:
-            with can.interface.Bus(channel=BUS_CH, interface=CAN_INTERFACE) as bus:
+            with open_bus(BUS_CH, interface=CAN_INTERFACE) as bus:
                 self._flush(bus)
-                for nid in NODE_IDS:
-                    self._send(bus, nid, CMD_CLR_ERR)
-                    self._set_controller_mode(bus, nid)
-                    self._set_axis_state(bus, nid, AXIS_CLOSED_LOOP)
-                self._wait_cl(bus)
-
-                if DO_STEP_TEST:
-                    try:
-                        self._do_step_test(bus)
-                    except Exception as e:
-                        print(f"[WARN] Step test error: {e}")
-
-                prev_goal_deg: Optional[List[float]] = None
-                next_tick = time.monotonic()
-
-                while not self._stop_evt.is_set():
-                    for frame_idx, (x_b, y_b, z_b) in enumerate(self._bvh.frames):
-                        if self._stop_evt.is_set():
-                            break
-                        if (frame_idx % FRAME_DECIMATE) != 0:
-                            continue
-
-                        e = [x_b, y_b, z_b]
-                        goal_deg = [AXIS_SIGN[k] * e[AXIS_REMAP[k]] for k in range(3)]
-
-                        if prev_goal_deg is None:
-                            prev_goal_deg = goal_deg[:]
-                        dt = max(self._bvh.frame_time * FRAME_DECIMATE, OUTPUT_PERIOD)
-                        degps = [
-                            min(max(abs(err_short(c, p)) / dt, SPEED_MIN_DEG), SPEED_MAX_DEG)
-                            for p, c in zip(prev_goal_deg, goal_deg)
-                        ]
-                        spd_deg = max(degps) if degps else SPEED_MIN_DEG
-                        vel_rps = spd_deg / 360.0
-                        acc_rps2 = vel_rps * ACCEL_FACTOR
-
-                        now = time.monotonic()
-                        if now < next_tick:
-                            time.sleep(next_tick - now)
-                        next_tick = time.monotonic() + OUTPUT_PERIOD
-
-                        cur_turns = {nid: self._read_turns(bus, nid) for nid in NODE_IDS}
-                        cur_deg_now = {nid: (cur_turns[nid] * 360.0) % 360.0 for nid in NODE_IDS}
-
-                        for axis_index, nid in enumerate(NODE_IDS):
-                            tgt = goal_deg[axis_index]
-                            if abs(err_short(tgt, cur_deg_now[nid])) > POS_EPS_DEG:
-                                tgt_turns = self._nearest_turns(cur_turns[nid], tgt)
-                                self._set_traj_limits(bus, nid, vel_rps, acc_rps2)
-                                self._set_input_pos(bus, nid, tgt_turns)
-
-                        if VERBOSE and frame_idx < 30:
-                            print(f"[BVH] frame={frame_idx} goal={goal_deg} cur={[cur_deg_now[n] for n in NODE_IDS]} spd≈{spd_deg:.1f}°/s")
-
-                        # Update visualizer state
-                        update_viz_state(
-                            goal_deg=tuple(goal_deg),
-                            enc_deg=tuple(cur_deg_now[nid] for nid in NODE_IDS)
-                        )
-
-                        prev_goal_deg = goal_deg[:]
-
-                    if not self._loop_forever:
-                        break
+                self._start_can_threads(bus)
+                try:
+                    for nid in NODE_IDS:
+                        self._send(bus, nid, CMD_CLR_ERR)
+                        self._set_controller_mode(bus, nid)
+                        self._set_axis_state(bus, nid, AXIS_CLOSED_LOOP)
+                        if ENCODER_MODE == "cyclic":
+                            self._set_encoder_rate(bus, nid, ENCODER_RATE_MS)
+                    self._flush_tx()
+                    self._wait_cl(bus)
+                    if ENCODER_MODE == "cyclic":
+                        self._demux.wait_all(NODE_IDS, CMD_ENCODER_EST, after={}, timeout=0.5)
+
+                    if DO_STEP_TEST:
+                        try:
+                            self._do_step_test(bus)
+                        except Exception as e:
+                            print(f"[WARN] Step test error: {e}")
+
+                    if GIMBAL_MODE == "stream":
+                        self._run_stream(bus)
+                    else:
+                        self._run_trap(bus)
+                finally:
+                    self._stop_can_threads()
 
         except Exception as e:
             print(f"[FATAL] BVHGimbalThread crashed: {e}")
         finally:
             try:
-                with can.interface.Bus(channel=BUS_CH, interface="socketcan") as bus:
+                with open_bus(BUS_CH, interface=CAN_INTERFACE) as bus:
                     for nid in NODE_IDS:
                         self._set_axis_state(bus, nid, AXIS_IDLE)
             except Exception:
                 pass
 
+class TrackerSink:
+    """Applies decoded tracker packets to the tracker, the visualizer and the log.
+
+    Shared by SlimeVRProtocol (decoding on the asyncio thread) and
+    WorkerIngest (packets decoded by SO_REUSEPORT worker processes).
+    """
+
+    def __init__(self, logger: CSVLogger) -> None:
+        self._logger = logger
+
+    def _log(self, tracker: Tracker) -> None:
+        enc_deg, goal_deg = get_gimbal_state()
+        self._logger.log(
+            tracker.mac, tracker.battery, tracker.battery_volt,
+            tracker.quat, tracker.accel,
+            enc_deg, (0, 0, 0), goal_deg
+        )
+
+    def battery(self, tracker: Tracker, batt: Tuple[float, float]) -> None:
+        vol, pct = batt
+        tracker.battery = pct
+        tracker.battery_volt = vol
+
+        update_viz_state(tracker.mac, battery_pct=pct, battery_volt=vol)
+        self._log(tracker)
+
+    def rotation(self, tracker: Tracker, quat: Tuple[float, float, float, float]) -> None:
+        qx, qy, qz, qw = quat
+        if validate_quaternion(qx, qy, qz, qw):
+            tracker.quat = quat
+            euler = q_to_euler_xyz_deg((qw, qx, qy, qz))
+
+            # Update visualizer
+            update_viz_state(tracker.mac, quat=tracker.quat, euler=euler)
+
+            # Log to CSV
+            self._log(tracker)
+
+    def acceleration(self, tracker: Tracker, accel: Tuple[float, float, float]) -> None:
+        if accel_in_range(accel, 1000.0):
+            tracker.accel = accel
+
+            update_viz_state(tracker.mac, accel=tracker.accel)
+            self._log(tracker)
+
+    def rotation_and_accel(self, tracker: Tracker, decoded) -> None:
+        quat, accel = decoded
+        if validate_quaternion(*quat):
+            tracker.quat = quat
+        if accel_in_range(accel, 100.0):
+            tracker.accel = accel
+
+        if tracker.quat:
+            euler = q_to_euler_xyz_deg((tracker.quat[3], tracker.quat[0], tracker.quat[1], tracker.quat[2]))
+            update_viz_state(tracker.mac, quat=tracker.quat, euler=euler, accel=tracker.accel)
+
+        self._log(tracker)
+
+    def collapsed(self, tracker: Tracker, quat, euler, accel, batt) -> None:
+        """One udp_ingest update: the newest already validated values, None where nothing new came in."""
+        if batt is not None:
+            tracker.battery_volt, tracker.battery = batt
+        if quat is not None:
+            tracker.quat = quat
+        if accel is not None:
+            tracker.accel = accel
+        if batt is None and quat is None and accel is None:
+            return
+        update_viz_state(
+            tracker.mac, quat=quat, euler=euler, accel=accel,
+            battery_pct=batt[1] if batt else None, battery_volt=batt[0] if batt else None,
+        )
+        self._log(tracker)
+
+
 class SlimeVRProtocol(asyncio.DatagramProtocol):
-    def __init__(self, stop_cb, tracker_registry: Dict[str, Tracker], logger: CSVLogger) -> None:
+    def __init__(self, stop_cb, tracker_registry: TrackerRegistry[Tracker], logger: CSVLogger) -> None:
         self.transport: asyncio.DatagramTransport | None = None
         self.trackers = tracker_registry
-        self.addr_to_mac: Dict[Tuple[str, int], str] = {}
         self._stop_cb = stop_cb
-        self._logger = logger
+        self._sink = TrackerSink(logger)
+        self._dispatch = PacketDispatcher({
+            PACKET_HANDSHAKE: self._handshake,
+            PACKET_BATTERY: self._battery,
+            PACKET_ROTATION: self._rotation,
+            PACKET_ROTATION_AND_ACCELERATION: self._rotation_and_accel,
+            PACKET_ACCELERATION: self._acceleration,
+        })
 
     def connection_made(self, transport) -> None:
         self.transport = transport
@@ -683,170 +1094,52 @@ class SlimeVRProtocol(asyncio.DatagramProtocol):
 
     def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
         try:
-            if data.startswith(HEADER_MAGIC) and len(data) > 3:
-                pkt_type = data[3]
-                if pkt_type == PACKET_HANDSHAKE:
-                    self._handshake(data, addr)
-                    return
-            if data[:1] == bytes([PACKET_HANDSHAKE]):
-                return
-            if not data.startswith(HEADER_MAGIC) or len(data) < HEADER_SIZE + 1:
-                return
-
-            pkt_type = data[3]
-            if pkt_type == PACKET_BATTERY:
-                self._battery(data, addr)
-            elif pkt_type == PACKET_ROTATION:
-                self._rotation(data, addr)
-            elif pkt_type == PACKET_ROTATION_AND_ACCELERATION:
-                self._rotation_and_accel(data, addr)
-            elif pkt_type == PACKET_ACCELERATION:
-                self._acceleration(data, addr)
-
-            tracker = self._get(addr)
-            if tracker:
-                tracker.update_seen()
-
+            pkt_type = self._dispatch(data, addr)
+            #any data packet, even ones we don't decode, keeps the tracker alive
+            if pkt_type >= 0 and pkt_type != PACKET_HANDSHAKE and len(data) > HEADER_SIZE:
+                tracker = self._get(addr)
+                if tracker:
+                    tracker.update_seen()
         except Exception as e:
             print(f"[UDP] Error from {addr}: {e}")
 
-    def _handshake(self, data: bytes, addr: Tuple[str, int]) -> None:
-        try:
-            off = HEADER_SIZE + 24
-            if off >= len(data):
-                return
-            fw_len = data[off]
-            off += 1 + fw_len
-            if off + 6 > len(data):
-                return
-            mac_bytes = data[off: off + 6]
-            mac = ":".join(f"{b:02x}" for b in mac_bytes)
-            if mac == "00:00:00:00:00:00":
-                mac = f"ip-{addr[0].replace('.', '-')}"
-            tracker = self.trackers.get(mac) or Tracker(mac=mac, addr=addr)
-            tracker.addr = addr
-            tracker.update_seen()
-            self.trackers[mac] = tracker
-            self.addr_to_mac[addr] = mac
-            self._send(HANDSHAKE_RESPONSE, addr)
-            print(f"[UDP] Handshake complete: {tracker.mac} from {addr[0]}:{addr[1]}")
-        except Exception as e:
-            print(f"[UDP] Handshake error from {addr}: {e}")
-
-    def _battery(self, data: bytes, addr: Tuple[str, int]) -> None:
-        tracker = self._get(addr)
-        if not tracker or len(data) < HEADER_SIZE + 8:
+    def _handshake(self, data: memoryview, addr: Tuple[str, int]) -> None:
+        mac = decode_handshake_mac(data)
+        if mac is None:
             return
-        try:
-            vol, pct = struct.unpack_from(">ff", data, HEADER_SIZE)
-            if pct <= 1.0:
-                pct *= 100.0
-            tracker.battery = pct
-            tracker.battery_volt = vol
-
-            update_viz_state(battery_pct=pct, battery_volt=vol)
-
-            state = get_viz_state()
-            self._logger.log(
-                tracker.mac, tracker.battery, tracker.battery_volt,
-                tracker.quat, tracker.accel,
-                state['enc_deg'], (0, 0, 0), state['goal_deg']
-            )
-        except Exception as e:
-            print(f"[UDP] Battery parse error: {e}")
+        mac = tracker_key(mac, addr)
+        tracker = self.trackers.get(mac) or Tracker(mac=mac, addr=addr)
+        tracker.update_seen()
+        self.trackers.bind(tracker, addr)
+        self._send(HANDSHAKE_RESPONSE, addr)
+        print(f"[UDP] Handshake complete: {tracker.mac} from {addr[0]}:{addr[1]}")
 
-    def _rotation(self, data: bytes, addr: Tuple[str, int]) -> None:
+    def _battery(self, data: memoryview, addr: Tuple[str, int]) -> None:
         tracker = self._get(addr)
-        if not tracker:
-            return
-        try:
-            if len(data) >= HEADER_SIZE + 2 + 16:
-                offset = HEADER_SIZE + 2
-                qx, qy, qz, qw = struct.unpack_from(">ffff", data, offset)
-            elif len(data) >= HEADER_SIZE + 1 + 16:
-                offset = HEADER_SIZE + 1
-                qx, qy, qz, qw = struct.unpack_from(">ffff", data, offset)
-            elif len(data) >= HEADER_SIZE + 16:
-                qx, qy, qz, qw = struct.unpack_from(">ffff", data, HEADER_SIZE)
-            else:
-                return
-            if validate_quaternion(qx, qy, qz, qw):
-                tracker.quat = (qx, qy, qz, qw)
-                euler = _q_to_euler_xyz_deg((qw, qx, qy, qz))
-
-                # Update visualizer
-                update_viz_state(quat=tracker.quat, euler=euler)
-
-                # Log to CSV
-                state = get_viz_state()
-                self._logger.log(
-                    tracker.mac, tracker.battery, tracker.battery_volt,
-                    tracker.quat, tracker.accel,
-                    state['enc_deg'], (0, 0, 0), state['goal_deg']
-                )
-        except Exception as e:
-            print(f"[UDP] Rotation parse error: {e}")
+        batt = decode_battery(data) if tracker else None
+        if batt:
+            self._sink.battery(tracker, batt)
 
-    def _acceleration(self, data: bytes, addr: Tuple[str, int]) -> None:
+    def _rotation(self, data: memoryview, addr: Tuple[str, int]) -> None:
         tracker = self._get(addr)
-        if not tracker:
-            return
-        try:
-            if len(data) >= HEADER_SIZE + 13:
-                ax, ay, az = struct.unpack_from(">fff", data, HEADER_SIZE)
-            elif len(data) >= HEADER_SIZE + 12:
-                ax, ay, az = struct.unpack_from(">fff", data, HEADER_SIZE)
-            else:
-                return
-            if all(-1000.0 < v < 1000.0 and v == v for v in [ax, ay, az]):
-                tracker.accel = (ax, ay, az)
-
-                update_viz_state(accel=tracker.accel)
+        quat = decode_rotation(data) if tracker else None
+        if quat:
+            self._sink.rotation(tracker, quat)
 
-                state = get_viz_state()
-                self._logger.log(
-                    tracker.mac, tracker.battery, tracker.battery_volt,
-                    tracker.quat, tracker.accel,
-                    state['enc_deg'], (0, 0, 0), state['goal_deg']
-                )
-        except Exception as e:
-            print(f"[UDP] Accel parse error: {e}")
+    def _acceleration(self, data: memoryview, addr: Tuple[str, int]) -> None:
+        tracker = self._get(addr)
+        accel = decode_acceleration(data) if tracker else None
+        if accel:
+            self._sink.acceleration(tracker, accel)
 
-    def _rotation_and_accel(self, data: bytes, addr: Tuple[str, int]) -> None:
+    def _rotation_and_accel(self, data: memoryview, addr: Tuple[str, int]) -> None:
         tracker = self._get(addr)
-        if not tracker or len(data) < HEADER_SIZE + 1 + 14:
-            return
-        try:
-            raw = struct.unpack_from(">7h", data, HEADER_SIZE + 1)
-            scale_r = 1.0 / 32768.0
-            qx, qy, qz, qw = [v * scale_r for v in raw[:4]]
-            mag = (qx*qx + qy*qy + qz*qz + qw*qw) ** 0.5
-            if mag > 0.1:
-                qx, qy, qz, qw = qx/mag, qy/mag, qz/mag, qw/mag
-            scale_a = 1.0 / 128.0
-            ax, ay, az = [v * scale_a for v in raw[4:7]]
-            if validate_quaternion(qx, qy, qz, qw):
-                tracker.quat = (qx, qy, qz, qw)
-                euler = _q_to_euler_xyz_deg((qw, qx, qy, qz))
-            if all(-100.0 < v < 100.0 and v == v for v in [ax, ay, az]):
-                tracker.accel = (ax, ay, az)
-
-            if tracker.quat:
-                euler = _q_to_euler_xyz_deg((tracker.quat[3], tracker.quat[0], tracker.quat[1], tracker.quat[2]))
-                update_viz_state(quat=tracker.quat, euler=euler, accel=tracker.accel)
-
-            state = get_viz_state()
-            self._logger.log(
-                tracker.mac, tracker.battery, tracker.battery_volt,
-                tracker.quat, tracker.accel,
-                state['enc_deg'], (0, 0, 0), state['goal_deg']
-            )
-        except Exception as e:
-            print(f"[UDP] Rot+Accel parse error: {e}")
+        decoded = decode_rotation_and_accel(data) if tracker else None
+        if decoded:
+            self._sink.rotation_and_accel(tracker, decoded)
 
     def _get(self, addr: Tuple[str, int]) -> Tracker | None:
-        mac = self.addr_to_mac.get(addr)
-        return self.trackers.get(mac) if mac else None
+        return self.trackers.get_by_addr(addr)
 
     def _send(self, payload: bytes, addr: Tuple[str, int]) -> None:
         if self.transport:
@@ -855,16 +1148,62 @@ class SlimeVRProtocol(asyncio.DatagramProtocol):
     async def _gc(self) -> None:
         while True:
             await asyncio.sleep(1)
+            for tracker in self.trackers.expire(time.time()):
+                print(f"[UDP] Tracker {tracker.mac} disconnected (timeout)")
+
+
+class WorkerIngest(threading.Thread):
+    """Applies update batches from udp_ingest worker processes, replaces SlimeVRProtocol when INGEST_WORKERS > 0.
+
+    Workers already answered handshakes, validated the payloads and kept
+    the newest values per tracker, this thread applies one row per tracker
+    per batch to the registry, the visualizer and the log.
+    """
+
+    def __init__(self, pool: IngestPool, tracker_registry: TrackerRegistry[Tracker], logger: CSVLogger) -> None:
+        super().__init__(daemon=True)
+        self._pool = pool
+        self.trackers = tracker_registry
+        self._sink = TrackerSink(logger)
+        self._stop_evt = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+
+    def _apply(self, mac: str, addr: Tuple[str, int], handshake: bool, quat, euler, accel, batt) -> None:
+        tracker = self.trackers.get(mac)
+        if tracker is None or tracker.addr != addr:
+            # handshake, or the first update since this process dropped the tracker
+            tracker = tracker or Tracker(mac=mac, addr=addr)
+            self.trackers.bind(tracker, addr)
+            if handshake:
+                print(f"[UDP] Handshake complete: {tracker.mac} from {addr[0]}:{addr[1]}")
+        tracker.update_seen()
+        self._sink.collapsed(tracker, quat, euler, accel, batt)
+
+    def run(self) -> None:
+        next_gc = time.time() + 1.0
+        while not self._stop_evt.is_set():
+            try:
+                for batch in self._pool.batches(timeout=0.1):
+                    for update in batch:
+                        try:
+                            self._apply(*update)
+                        except Exception as e:
+                            print(f"[UDP] Error from {update[1]}: {e}")
+            except RuntimeError as e:
+                print(f"[ERROR] UDP ingest stopped: {e}")
+                error_logger.error(f"UDP ingest stopped: {e}")
+                return
             now = time.time()
-            to_remove = [mac for mac, trk in self.trackers.items() if now - trk.last_seen > DISCONNECT_SECONDS]
-            for mac in to_remove:
-                tracker = self.trackers.pop(mac)
-                self.addr_to_mac.pop(tracker.addr, None)
-                print(f"[UDP] Tracker {mac} disconnected (timeout)")
+            if now >= next_gc:
+                for tracker in self.trackers.expire(now):
+                    print(f"[UDP] Tracker {tracker.mac} disconnected (timeout)")
+                next_gc = now + 1.0
 
 
 class HIDDongleReader:
-    def __init__(self, tracker_registry: Dict[str, Tracker], logger: CSVLogger) -> None:
+    def __init__(self, tracker_registry: TrackerRegistry[Tracker], logger: CSVLogger) -> None:
         self.trackers = tracker_registry
         self.device = None
         self.tracker_addrs: Dict[int, str] = {}
@@ -900,7 +1239,7 @@ class HIDDongleReader:
         tracker = self.trackers.get(mac)
         if tracker is None:
             tracker = Tracker(mac=mac, source="hid")
-            self.trackers[mac] = tracker
+            self.trackers.add(tracker)
             print(f"[HID] Tracker {mac} connected via HID dongle")
 
         tracker.update_seen()
@@ -911,33 +1250,33 @@ class HIDDongleReader:
                 batt_v = data[3]
                 tracker.battery = int(batt_pct) & 127 if batt_pct != 128 else 1
                 tracker.battery_volt = (float(batt_v) + 245.0) / 100.0
-                update_viz_state(battery_pct=tracker.battery, battery_volt=tracker.battery_volt)
+                update_viz_state(mac, battery_pct=tracker.battery, battery_volt=tracker.battery_volt)
         elif pkt_type == 1:
             if len(data) >= 16:
                 q0, q1, q2, q3, a0, a1, a2 = struct.unpack_from("<7h", data, 2)
                 tracker.quat = (q0 / 32768.0, q1 / 32768.0, q2 / 32768.0, q3 / 32768.0)
                 tracker.accel = (a0 / 32768.0, a1 / 32768.0, a2 / 32768.0)
-                euler = _q_to_euler_xyz_deg((tracker.quat[3], tracker.quat[0], tracker.quat[1], tracker.quat[2]))
-                update_viz_state(quat=tracker.quat, euler=euler, accel=tracker.accel)
+                euler = q_to_euler_xyz_deg((tracker.quat[3], tracker.quat[0], tracker.quat[1], tracker.quat[2]))
+                update_viz_state(tracker.mac, quat=tracker.quat, euler=euler, accel=tracker.accel)
         elif pkt_type == 2:
             if len(data) >= 5:
                 batt_pct = data[2]
                 batt_v = data[3]
                 tracker.battery = int(batt_pct) & 127 if batt_pct != 128 else 1
                 tracker.battery_volt = (float(batt_v) + 245.0) / 100.0
-                update_viz_state(battery_pct=tracker.battery, battery_volt=tracker.battery_volt)
+                update_viz_state(mac, battery_pct=tracker.battery, battery_volt=tracker.battery_volt)
         elif pkt_type == 4:
             if len(data) >= 16:
                 q0, q1, q2, q3, m0, m1, m2 = struct.unpack_from("<7h", data, 2)
                 tracker.quat = (q0 / 32768.0, q1 / 32768.0, q2 / 32768.0, q3 / 32768.0)
-                euler = _q_to_euler_xyz_deg((tracker.quat[3], tracker.quat[0], tracker.quat[1], tracker.quat[2]))
-                update_viz_state(quat=tracker.quat, euler=euler)
+                euler = q_to_euler_xyz_deg((tracker.quat[3], tracker.quat[0], tracker.quat[1], tracker.quat[2]))
+                update_viz_state(tracker.mac, quat=tracker.quat, euler=euler)
 
-        state = get_viz_state()
+        enc_deg, goal_deg = get_gimbal_state()
         self._logger.log(
             mac, tracker.battery, tracker.battery_volt,
             tracker.quat, tracker.accel,
-            state['enc_deg'], (0, 0, 0), state['goal_deg']
+            enc_deg, (0, 0, 0), goal_deg
         )
 
     async def run(self) -> None:
@@ -992,6 +1331,12 @@ class RealtimeVisualizer:
         self.title = title
         self.running = False
         self._thread: Optional[threading.Thread] = None
+        self._selected_mac: Optional[str] = None
+        self._tracker_items: List[str] = []
+
+    def _on_tracker_select(self, sender, app_data):
+        # histories for every tracker are always kept, switching only changes what get_viz_state reads
+        self._selected_mac = app_data
 
     def _setup_theme(self):
         with dpg.theme() as self.global_theme:
@@ -1079,6 +1424,9 @@ class RealtimeVisualizer:
                 dpg.add_text("00:00:00", tag="elapsed_time", color=(100, 200, 255, 255))
                 dpg.add_spacer(width=50)
                 dpg.add_text("Samples: 0", tag="sample_count", color=(150, 150, 200, 255))
+                dpg.add_spacer(width=50)
+                dpg.add_text("Tracker:", color=(150, 150, 200, 255))
+                dpg.add_combo([], tag="tracker_select", width=220, callback=self._on_tracker_select)
 
             dpg.add_separator()
             dpg.add_spacer(height=10)
@@ -1190,7 +1538,14 @@ class RealtimeVisualizer:
             self._last_ui_update = now
 
         if now - self._last_ui_update > 0.033:
-            state = get_viz_state()
+            state = get_viz_state(self._selected_mac)
+
+            if state['trackers'] != self._tracker_items:
+                self._tracker_items = state['trackers']
+                dpg.configure_item("tracker_select", items=self._tracker_items)
+            if state['mac'] != self._selected_mac:
+                self._selected_mac = state['mac']
+                dpg.set_value("tracker_select", state['mac'] or "")
 
             if state['start_time']:
                 elapsed = now - state['start_time']
@@ -1199,7 +1554,7 @@ class RealtimeVisualizer:
                 secs = int(elapsed % 60)
                 dpg.set_value("elapsed_time", f"{hrs:02d}:{mins:02d}:{secs:02d}")
 
-            dpg.set_value("sample_count", f"Samples: {state['samples']:,}")
+            dpg.set_value("sample_count", f"Samples: {state['samples']:,} ({len(state['trackers'])} trackers)")
 
             self._update_battery_gauge(state['battery_pct'], state['battery_volt'])
 
@@ -1221,33 +1576,22 @@ class RealtimeVisualizer:
             dpg.set_value("goal_display", f"Goal: ({goal[0]:+6.1f}°, {goal[1]:+6.1f}°, {goal[2]:+6.1f}°)")
             dpg.set_value("enc_display", f"Enc:  ({enc[0]:+6.1f}°, {enc[1]:+6.1f}°, {enc[2]:+6.1f}°)")
 
-            if state['err_history']:
-                err = state['err_history'][-1]
+            if state['err'] is not None:
+                err = state['err']
                 dpg.set_value("error_bar", min(err / 10.0, 1.0))
                 dpg.set_value("error_text", f"{err:.2f}°")
 
-            time_hist = state['time_history']
-            if time_hist and len(time_hist) > 0:
-                current_time = time_hist[-1]
+            # already cut to the visible window by get_viz_state
+            time_visible = state['time_history']
+            if time_visible:
+                current_time = time_visible[-1]
                 window_start = max(0, current_time - GRAPH_WINDOW_SECONDS)
 
-                start_idx = 0
-                for i, t in enumerate(time_hist):
-                    if t >= window_start:
-                        start_idx = i
-                        break
-
-                # Get only the visible portion of the data
-                time_visible = list(time_hist)[start_idx:]
-                roll_visible = list(state['roll_history'])[start_idx:]
-                pitch_visible = list(state['pitch_history'])[start_idx:]
-                yaw_visible = list(state['yaw_history'])[start_idx:]
-
-                dpg.set_value("roll_series", [time_visible, roll_visible])
-                dpg.set_value("pitch_series", [time_visible, pitch_visible])
-                dpg.set_value("yaw_series", [time_visible, yaw_visible])
+                dpg.set_value("roll_series", [time_visible, state['roll_history']])
+                dpg.set_value("pitch_series", [time_visible, state['pitch_history']])
+                dpg.set_value("yaw_series", [time_visible, state['yaw_history']])
 
-                if len(time_hist) > 1:
+                if len(time_visible) > 1:
                     dpg.set_axis_limits("euler_x_axis", window_start, current_time + 1)
                     dpg.set_axis_limits("batt_x_axis", window_start, current_time + 1)
 
@@ -1298,45 +1642,67 @@ def main() -> None:
 
     print(f"[LOG] Error logging to {log_file}")
 
-    # Initialize CSV logger
-    logger = CSVLogger(Path("integrated_tracker_log.csv"))
-    print(f"[LOG] Logging to integrated_tracker_log.csv")
+    # fork the ingest workers before any other thread exists
+    ingest_pool = None
+    if INGEST_WORKERS > 0:
+        try:
+            ingest_pool = IngestPool(INGEST_WORKERS, SERVER_PORT)
+            ingest_pool.start()
+            print(f"[UDP] {INGEST_WORKERS} ingest workers started on port {SERVER_PORT}")
+        except Exception as e:
+            print(f"[WARN] Ingest workers failed, falling back to single socket: {e}")
+            ingest_pool = None
+
+    # Initialize tracker logger
+    if LOG_FORMAT == "bin":
+        logger = BinaryLogger(Path("integrated_tracker_log.bin"))
+        print(f"[LOG] Logging to integrated_tracker_log.bin")
+    else:
+        logger = CSVLogger(Path("integrated_tracker_log.csv"), batched=CSV_BATCHED)
+        print(f"[LOG] Logging to integrated_tracker_log.csv")
 
     # Initialize tracker registry
-    tracker_registry: Dict[str, Tracker] = {}
+    tracker_registry: TrackerRegistry[Tracker] = TrackerRegistry(DISCONNECT_SECONDS)
 
     # Start BVH gimbal control thread (if BVH is available)
     gimbal_thread = None
-    if BVH_AVAILABLE and os.path.exists(BVH_PATH):
+    if os.path.exists(BVH_PATH):
         try:
             bvh_src = BVHSource.load(BVH_PATH, BVH_JOINT)
-            print(f"[BVH] Loaded {len(bvh_src.frames)} frames from {BVH_PATH}")
+            frames, loaded = bvh_src.current()
+            print(f"[BVH] Loaded {loaded}/{len(frames)} frames from {BVH_PATH}"
+                  + (", rest loading in the background" if loaded < len(frames) else ""))
             gimbal_thread = BVHGimbalThread(bvh_src, loop_forever=LOOP_BVH)
             gimbal_thread.start()
             print("[BVH] Gimbal control thread started")
         except Exception as e:
             print(f"[WARN] Failed to load BVH: {e}")
     else:
-        print("[INFO] BVH gimbal control disabled (no BVH file or library)")
+        print("[INFO] BVH gimbal control disabled (no BVH file)")
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
     transport = None
-    try:
-        transport, _ = loop.run_until_complete(
-            loop.create_datagram_endpoint(
-                lambda: SlimeVRProtocol(
-                    lambda: loop.call_soon_threadsafe(loop.stop),
-                    tracker_registry,
-                    logger
-                ),
-                local_addr=("0.0.0.0", SERVER_PORT),
+    worker_ingest = None
+    if ingest_pool:
+        worker_ingest = WorkerIngest(ingest_pool, tracker_registry, logger)
+        worker_ingest.start()
+    else:
+        try:
+            transport, _ = loop.run_until_complete(
+                loop.create_datagram_endpoint(
+                    lambda: SlimeVRProtocol(
+                        lambda: loop.call_soon_threadsafe(loop.stop),
+                        tracker_registry,
+                        logger
+                    ),
+                    local_addr=("0.0.0.0", SERVER_PORT),
+                )
             )
-        )
-        print(f"[UDP] SlimeVR server started on port {SERVER_PORT}")
-    except Exception as e:
-        print(f"[WARN] UDP bind failed: {e}")
+            print(f"[UDP] SlimeVR server started on port {SERVER_PORT}")
+        except Exception as e:
+            print(f"[WARN] UDP bind failed: {e}")
 
     hid_reader = None
     if HID_AVAILABLE:
@@ -1379,6 +1745,11 @@ def main() -> None:
     if transport:
         transport.close()
 
+    if worker_ingest:
+        worker_ingest.stop()
+        worker_ingest.join(timeout=2.0)
+        ingest_pool.stop()
+
     try:
         loop.call_soon_threadsafe(loop.stop)
         async_thread.join(timeout=2.0)
@@ -1386,6 +1757,8 @@ def main() -> None:
     except Exception:
         pass
 
+    logger.close()
+
     print("[SHUTDOWN] Complete")
 
 if __name__ == "__main__":
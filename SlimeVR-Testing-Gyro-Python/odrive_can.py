@@ -0,0 +1,742 @@
+"""ODrive CAN Simple message codecs, generated by dbc_codegen.py.
+
+Source: ../apps/gyro-server/odrive-protocol.dbc, DBC version 0.6.10. Do not edit, regenerate with:
+    python dbc_codegen.py ../apps/gyro-server/odrive-protocol.dbc -o odrive_can.py
+
+One struct.Struct, NamedTuple, decode_<msg>() and encode_<msg>() per
+command, decoders return None for a short payload. DECODERS and
+ENCODERS map command id -> function, MESSAGES command id -> NamedTuple
+and STRUCTS command id -> struct.Struct for raw unscaled tuples.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Any, Callable, Dict, NamedTuple, Optional, Type
+
+
+_new = tuple.__new__
+
+
+def _clamp(v: int, lo: int, hi: int) -> int:
+    return lo if v < lo else hi if v > hi else v
+
+
+# Get_Version, sent by ODrive_Axis0
+CMD_GET_VERSION = 0x00
+GET_VERSION = struct.Struct("<BBBBBBBB")
+
+
+class GetVersion(NamedTuple):
+    protocol_version: int
+    hw_version_major: int
+    hw_version_minor: int
+    hw_version_variant: int
+    fw_version_major: int
+    fw_version_minor: int
+    fw_version_revision: int
+    fw_version_unreleased: int
+
+
+def decode_get_version(data, _unpack=GET_VERSION.unpack_from) -> Optional[GetVersion]:
+    try:
+        return _new(GetVersion, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_version(
+    protocol_version: int = 0,
+    hw_version_major: int = 0,
+    hw_version_minor: int = 0,
+    hw_version_variant: int = 0,
+    fw_version_major: int = 0,
+    fw_version_minor: int = 0,
+    fw_version_revision: int = 0,
+    fw_version_unreleased: int = 0,
+) -> bytes:
+    return GET_VERSION.pack(
+        protocol_version,
+        hw_version_major,
+        hw_version_minor,
+        hw_version_variant,
+        fw_version_major,
+        fw_version_minor,
+        fw_version_revision,
+        fw_version_unreleased,
+    )
+
+
+# Heartbeat, sent by ODrive_Axis0
+CMD_HEARTBEAT = 0x01
+HEARTBEAT = struct.Struct("<IBBB")
+
+
+class Heartbeat(NamedTuple):
+    axis_error: int
+    axis_state: int
+    procedure_result: int
+    trajectory_done_flag: int
+
+
+def decode_heartbeat(data, _unpack=HEARTBEAT.unpack_from) -> Optional[Heartbeat]:
+    try:
+        return _new(Heartbeat, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_heartbeat(
+    axis_error: int = 0,
+    axis_state: int = 0,
+    procedure_result: int = 0,
+    trajectory_done_flag: int = 0,
+) -> bytes:
+    return HEARTBEAT.pack(axis_error, axis_state, procedure_result, trajectory_done_flag)
+
+
+# Estop, sent by Master
+CMD_ESTOP = 0x02
+ESTOP = struct.Struct("<")
+
+
+class Estop(NamedTuple):
+    pass
+
+
+def decode_estop(data, _unpack=ESTOP.unpack_from) -> Optional[Estop]:
+    try:
+        return _new(Estop, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_estop() -> bytes:
+    return ESTOP.pack()
+
+
+# Get_Error, sent by ODrive_Axis0
+CMD_GET_ERROR = 0x03
+GET_ERROR = struct.Struct("<II")
+
+
+class GetError(NamedTuple):
+    active_errors: int
+    disarm_reason: int
+
+
+def decode_get_error(data, _unpack=GET_ERROR.unpack_from) -> Optional[GetError]:
+    try:
+        return _new(GetError, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_error(active_errors: int = 0, disarm_reason: int = 0) -> bytes:
+    return GET_ERROR.pack(active_errors, disarm_reason)
+
+
+# Rx_Sdo, sent by Master
+CMD_RX_SDO = 0x04
+RX_SDO = struct.Struct("<BHBI")
+
+
+class RxSdo(NamedTuple):
+    opcode: int
+    endpoint_id: int
+    reserved: int
+    value: int
+
+
+def decode_rx_sdo(data, _unpack=RX_SDO.unpack_from) -> Optional[RxSdo]:
+    try:
+        return _new(RxSdo, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_rx_sdo(opcode: int = 0, endpoint_id: int = 0, reserved: int = 0, value: int = 0) -> bytes:
+    return RX_SDO.pack(opcode, endpoint_id, reserved, value)
+
+
+# Tx_Sdo, sent by ODrive_Axis0
+CMD_TX_SDO = 0x05
+TX_SDO = struct.Struct("<BHBI")
+
+
+class TxSdo(NamedTuple):
+    reserved0: int
+    endpoint_id: int
+    reserved1: int
+    value: int
+
+
+def decode_tx_sdo(data, _unpack=TX_SDO.unpack_from) -> Optional[TxSdo]:
+    try:
+        return _new(TxSdo, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_tx_sdo(reserved0: int = 0, endpoint_id: int = 0, reserved1: int = 0, value: int = 0) -> bytes:
+    return TX_SDO.pack(reserved0, endpoint_id, reserved1, value)
+
+
+# Set_Axis_State, sent by Master
+CMD_SET_AXIS_STATE = 0x07
+SET_AXIS_STATE = struct.Struct("<I")
+
+
+class SetAxisState(NamedTuple):
+    axis_requested_state: int
+
+
+def decode_set_axis_state(data, _unpack=SET_AXIS_STATE.unpack_from) -> Optional[SetAxisState]:
+    try:
+        return _new(SetAxisState, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_axis_state(axis_requested_state: int = 0) -> bytes:
+    return SET_AXIS_STATE.pack(axis_requested_state)
+
+
+# Get_Encoder_Estimates, sent by ODrive_Axis0
+CMD_GET_ENCODER_ESTIMATES = 0x09
+GET_ENCODER_ESTIMATES = struct.Struct("<ff")
+
+
+class GetEncoderEstimates(NamedTuple):
+    pos_estimate: float  # rev
+    vel_estimate: float  # rev/s
+
+
+def decode_get_encoder_estimates(data, _unpack=GET_ENCODER_ESTIMATES.unpack_from) -> Optional[GetEncoderEstimates]:
+    try:
+        return _new(GetEncoderEstimates, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_encoder_estimates(pos_estimate: float = 0.0, vel_estimate: float = 0.0) -> bytes:
+    return GET_ENCODER_ESTIMATES.pack(pos_estimate, vel_estimate)
+
+
+# Set_Controller_Mode, sent by Master
+CMD_SET_CONTROLLER_MODE = 0x0B
+SET_CONTROLLER_MODE = struct.Struct("<II")
+
+
+class SetControllerMode(NamedTuple):
+    control_mode: int
+    input_mode: int
+
+
+def decode_set_controller_mode(data, _unpack=SET_CONTROLLER_MODE.unpack_from) -> Optional[SetControllerMode]:
+    try:
+        return _new(SetControllerMode, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_controller_mode(control_mode: int = 0, input_mode: int = 0) -> bytes:
+    return SET_CONTROLLER_MODE.pack(control_mode, input_mode)
+
+
+# Set_Input_Pos, sent by Master
+CMD_SET_INPUT_POS = 0x0C
+SET_INPUT_POS = struct.Struct("<fhh")
+
+
+class SetInputPos(NamedTuple):
+    input_pos: float  # rev
+    vel_ff: float  # rev/s (default)
+    torque_ff: float  # Nm (default)
+
+
+def decode_set_input_pos(data, _unpack=SET_INPUT_POS.unpack_from) -> Optional[SetInputPos]:
+    try:
+        input_pos, vel_ff, torque_ff = _unpack(data)
+        return _new(SetInputPos, (input_pos, vel_ff / 1000, torque_ff / 1000))
+    except struct.error:
+        return None
+
+
+def encode_set_input_pos(input_pos: float = 0.0, vel_ff: float = 0.0, torque_ff: float = 0.0) -> bytes:
+    return SET_INPUT_POS.pack(
+        input_pos,
+        _clamp(round(vel_ff * 1000), -32768, 32767),
+        _clamp(round(torque_ff * 1000), -32768, 32767),
+    )
+
+
+# Set_Input_Vel, sent by Master
+CMD_SET_INPUT_VEL = 0x0D
+SET_INPUT_VEL = struct.Struct("<ff")
+
+
+class SetInputVel(NamedTuple):
+    input_vel: float  # rev/s
+    input_torque_ff: float  # Nm
+
+
+def decode_set_input_vel(data, _unpack=SET_INPUT_VEL.unpack_from) -> Optional[SetInputVel]:
+    try:
+        return _new(SetInputVel, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_input_vel(input_vel: float = 0.0, input_torque_ff: float = 0.0) -> bytes:
+    return SET_INPUT_VEL.pack(input_vel, input_torque_ff)
+
+
+# Set_Input_Torque, sent by Master
+CMD_SET_INPUT_TORQUE = 0x0E
+SET_INPUT_TORQUE = struct.Struct("<f")
+
+
+class SetInputTorque(NamedTuple):
+    input_torque: float  # Nm
+
+
+def decode_set_input_torque(data, _unpack=SET_INPUT_TORQUE.unpack_from) -> Optional[SetInputTorque]:
+    try:
+        return _new(SetInputTorque, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_input_torque(input_torque: float = 0.0) -> bytes:
+    return SET_INPUT_TORQUE.pack(input_torque)
+
+
+# Set_Limits, sent by Master
+CMD_SET_LIMITS = 0x0F
+SET_LIMITS = struct.Struct("<ff")
+
+
+class SetLimits(NamedTuple):
+    velocity_limit: float  # rev/s
+    current_limit: float  # A
+
+
+def decode_set_limits(data, _unpack=SET_LIMITS.unpack_from) -> Optional[SetLimits]:
+    try:
+        return _new(SetLimits, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_limits(velocity_limit: float = 0.0, current_limit: float = 0.0) -> bytes:
+    return SET_LIMITS.pack(velocity_limit, current_limit)
+
+
+# Set_Traj_Vel_Limit, sent by Master
+CMD_SET_TRAJ_VEL_LIMIT = 0x11
+SET_TRAJ_VEL_LIMIT = struct.Struct("<f")
+
+
+class SetTrajVelLimit(NamedTuple):
+    traj_vel_limit: float  # rev/s
+
+
+def decode_set_traj_vel_limit(data, _unpack=SET_TRAJ_VEL_LIMIT.unpack_from) -> Optional[SetTrajVelLimit]:
+    try:
+        return _new(SetTrajVelLimit, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_traj_vel_limit(traj_vel_limit: float = 0.0) -> bytes:
+    return SET_TRAJ_VEL_LIMIT.pack(traj_vel_limit)
+
+
+# Set_Traj_Accel_Limits, sent by Master
+CMD_SET_TRAJ_ACCEL_LIMITS = 0x12
+SET_TRAJ_ACCEL_LIMITS = struct.Struct("<ff")
+
+
+class SetTrajAccelLimits(NamedTuple):
+    traj_accel_limit: float  # rev/s^2
+    traj_decel_limit: float  # rev/s^2
+
+
+def decode_set_traj_accel_limits(data, _unpack=SET_TRAJ_ACCEL_LIMITS.unpack_from) -> Optional[SetTrajAccelLimits]:
+    try:
+        return _new(SetTrajAccelLimits, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_traj_accel_limits(traj_accel_limit: float = 0.0, traj_decel_limit: float = 0.0) -> bytes:
+    return SET_TRAJ_ACCEL_LIMITS.pack(traj_accel_limit, traj_decel_limit)
+
+
+# Set_Traj_Inertia, sent by Master
+CMD_SET_TRAJ_INERTIA = 0x13
+SET_TRAJ_INERTIA = struct.Struct("<f")
+
+
+class SetTrajInertia(NamedTuple):
+    traj_inertia: float  # Nm/(rev/s^2)
+
+
+def decode_set_traj_inertia(data, _unpack=SET_TRAJ_INERTIA.unpack_from) -> Optional[SetTrajInertia]:
+    try:
+        return _new(SetTrajInertia, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_traj_inertia(traj_inertia: float = 0.0) -> bytes:
+    return SET_TRAJ_INERTIA.pack(traj_inertia)
+
+
+# Get_Iq, sent by ODrive_Axis0
+CMD_GET_IQ = 0x14
+GET_IQ = struct.Struct("<ff")
+
+
+class GetIq(NamedTuple):
+    iq_setpoint: float  # A
+    iq_measured: float  # A
+
+
+def decode_get_iq(data, _unpack=GET_IQ.unpack_from) -> Optional[GetIq]:
+    try:
+        return _new(GetIq, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_iq(iq_setpoint: float = 0.0, iq_measured: float = 0.0) -> bytes:
+    return GET_IQ.pack(iq_setpoint, iq_measured)
+
+
+# Get_Temperature, sent by ODrive_Axis0
+CMD_GET_TEMPERATURE = 0x15
+GET_TEMPERATURE = struct.Struct("<ff")
+
+
+class GetTemperature(NamedTuple):
+    fet_temperature: float  # deg C
+    motor_temperature: float  # deg C
+
+
+def decode_get_temperature(data, _unpack=GET_TEMPERATURE.unpack_from) -> Optional[GetTemperature]:
+    try:
+        return _new(GetTemperature, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_temperature(fet_temperature: float = 0.0, motor_temperature: float = 0.0) -> bytes:
+    return GET_TEMPERATURE.pack(fet_temperature, motor_temperature)
+
+
+# Reboot, sent by Master
+CMD_REBOOT = 0x16
+REBOOT = struct.Struct("<B")
+
+
+class Reboot(NamedTuple):
+    action: int
+
+
+def decode_reboot(data, _unpack=REBOOT.unpack_from) -> Optional[Reboot]:
+    try:
+        return _new(Reboot, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_reboot(action: int = 0) -> bytes:
+    return REBOOT.pack(action)
+
+
+# Get_Bus_Voltage_Current, sent by ODrive_Axis0
+CMD_GET_BUS_VOLTAGE_CURRENT = 0x17
+GET_BUS_VOLTAGE_CURRENT = struct.Struct("<ff")
+
+
+class GetBusVoltageCurrent(NamedTuple):
+    bus_voltage: float  # V
+    bus_current: float  # A
+
+
+def decode_get_bus_voltage_current(data, _unpack=GET_BUS_VOLTAGE_CURRENT.unpack_from) -> Optional[GetBusVoltageCurrent]:
+    try:
+        return _new(GetBusVoltageCurrent, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_bus_voltage_current(bus_voltage: float = 0.0, bus_current: float = 0.0) -> bytes:
+    return GET_BUS_VOLTAGE_CURRENT.pack(bus_voltage, bus_current)
+
+
+# Clear_Errors, sent by Master
+CMD_CLEAR_ERRORS = 0x18
+CLEAR_ERRORS = struct.Struct("<B")
+
+
+class ClearErrors(NamedTuple):
+    identify: int
+
+
+def decode_clear_errors(data, _unpack=CLEAR_ERRORS.unpack_from) -> Optional[ClearErrors]:
+    try:
+        return _new(ClearErrors, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_clear_errors(identify: int = 0) -> bytes:
+    return CLEAR_ERRORS.pack(identify)
+
+
+# Set_Absolute_Position, sent by Master
+CMD_SET_ABSOLUTE_POSITION = 0x19
+SET_ABSOLUTE_POSITION = struct.Struct("<f")
+
+
+class SetAbsolutePosition(NamedTuple):
+    position: float  # rev
+
+
+def decode_set_absolute_position(data, _unpack=SET_ABSOLUTE_POSITION.unpack_from) -> Optional[SetAbsolutePosition]:
+    try:
+        return _new(SetAbsolutePosition, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_absolute_position(position: float = 0.0) -> bytes:
+    return SET_ABSOLUTE_POSITION.pack(position)
+
+
+# Set_Pos_Gain, sent by Master
+CMD_SET_POS_GAIN = 0x1A
+SET_POS_GAIN = struct.Struct("<f")
+
+
+class SetPosGain(NamedTuple):
+    pos_gain: float  # (rev/s) / rev
+
+
+def decode_set_pos_gain(data, _unpack=SET_POS_GAIN.unpack_from) -> Optional[SetPosGain]:
+    try:
+        return _new(SetPosGain, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_pos_gain(pos_gain: float = 0.0) -> bytes:
+    return SET_POS_GAIN.pack(pos_gain)
+
+
+# Set_Vel_Gains, sent by Master
+CMD_SET_VEL_GAINS = 0x1B
+SET_VEL_GAINS = struct.Struct("<ff")
+
+
+class SetVelGains(NamedTuple):
+    vel_gain: float  # Nm / (rev/s)
+    vel_integrator_gain: float  # Nm / rev
+
+
+def decode_set_vel_gains(data, _unpack=SET_VEL_GAINS.unpack_from) -> Optional[SetVelGains]:
+    try:
+        return _new(SetVelGains, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_set_vel_gains(vel_gain: float = 0.0, vel_integrator_gain: float = 0.0) -> bytes:
+    return SET_VEL_GAINS.pack(vel_gain, vel_integrator_gain)
+
+
+# Get_Torques, sent by ODrive_Axis0
+CMD_GET_TORQUES = 0x1C
+GET_TORQUES = struct.Struct("<ff")
+
+
+class GetTorques(NamedTuple):
+    torque_target: float  # Nm
+    torque_estimate: float  # Nm
+
+
+def decode_get_torques(data, _unpack=GET_TORQUES.unpack_from) -> Optional[GetTorques]:
+    try:
+        return _new(GetTorques, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_torques(torque_target: float = 0.0, torque_estimate: float = 0.0) -> bytes:
+    return GET_TORQUES.pack(torque_target, torque_estimate)
+
+
+# Get_Powers, sent by ODrive_Axis0
+CMD_GET_POWERS = 0x1D
+GET_POWERS = struct.Struct("<ff")
+
+
+class GetPowers(NamedTuple):
+    electrical_power: float  # W
+    mechanical_power: float  # W
+
+
+def decode_get_powers(data, _unpack=GET_POWERS.unpack_from) -> Optional[GetPowers]:
+    try:
+        return _new(GetPowers, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_get_powers(electrical_power: float = 0.0, mechanical_power: float = 0.0) -> bytes:
+    return GET_POWERS.pack(electrical_power, mechanical_power)
+
+
+# Enter_DFU_Mode, sent by Master
+CMD_ENTER_DFU_MODE = 0x1F
+ENTER_DFU_MODE = struct.Struct("<")
+
+
+class EnterDFUMode(NamedTuple):
+    pass
+
+
+def decode_enter_dfu_mode(data, _unpack=ENTER_DFU_MODE.unpack_from) -> Optional[EnterDFUMode]:
+    try:
+        return _new(EnterDFUMode, _unpack(data))
+    except struct.error:
+        return None
+
+
+def encode_enter_dfu_mode() -> bytes:
+    return ENTER_DFU_MODE.pack()
+
+
+# Address (0x06) not generated: Serial_Number is 48 bits wide
+
+DECODERS: Dict[int, Callable[[Any], Any]] = {
+    CMD_GET_VERSION: decode_get_version,
+    CMD_HEARTBEAT: decode_heartbeat,
+    CMD_ESTOP: decode_estop,
+    CMD_GET_ERROR: decode_get_error,
+    CMD_RX_SDO: decode_rx_sdo,
+    CMD_TX_SDO: decode_tx_sdo,
+    CMD_SET_AXIS_STATE: decode_set_axis_state,
+    CMD_GET_ENCODER_ESTIMATES: decode_get_encoder_estimates,
+    CMD_SET_CONTROLLER_MODE: decode_set_controller_mode,
+    CMD_SET_INPUT_POS: decode_set_input_pos,
+    CMD_SET_INPUT_VEL: decode_set_input_vel,
+    CMD_SET_INPUT_TORQUE: decode_set_input_torque,
+    CMD_SET_LIMITS: decode_set_limits,
+    CMD_SET_TRAJ_VEL_LIMIT: decode_set_traj_vel_limit,
+    CMD_SET_TRAJ_ACCEL_LIMITS: decode_set_traj_accel_limits,
+    CMD_SET_TRAJ_INERTIA: decode_set_traj_inertia,
+    CMD_GET_IQ: decode_get_iq,
+    CMD_GET_TEMPERATURE: decode_get_temperature,
+    CMD_REBOOT: decode_reboot,
+    CMD_GET_BUS_VOLTAGE_CURRENT: decode_get_bus_voltage_current,
+    CMD_CLEAR_ERRORS: decode_clear_errors,
+    CMD_SET_ABSOLUTE_POSITION: decode_set_absolute_position,
+    CMD_SET_POS_GAIN: decode_set_pos_gain,
+    CMD_SET_VEL_GAINS: decode_set_vel_gains,
+    CMD_GET_TORQUES: decode_get_torques,
+    CMD_GET_POWERS: decode_get_powers,
+    CMD_ENTER_DFU_MODE: decode_enter_dfu_mode,
+}
+
+ENCODERS: Dict[int, Callable[..., bytes]] = {
+    CMD_GET_VERSION: encode_get_version,
+    CMD_HEARTBEAT: encode_heartbeat,
+    CMD_ESTOP: encode_estop,
+    CMD_GET_ERROR: encode_get_error,
+    CMD_RX_SDO: encode_rx_sdo,
+    CMD_TX_SDO: encode_tx_sdo,
+    CMD_SET_AXIS_STATE: encode_set_axis_state,
+    CMD_GET_ENCODER_ESTIMATES: encode_get_encoder_estimates,
+    CMD_SET_CONTROLLER_MODE: encode_set_controller_mode,
+    CMD_SET_INPUT_POS: encode_set_input_pos,
+    CMD_SET_INPUT_VEL: encode_set_input_vel,
+    CMD_SET_INPUT_TORQUE: encode_set_input_torque,
+    CMD_SET_LIMITS: encode_set_limits,
+    CMD_SET_TRAJ_VEL_LIMIT: encode_set_traj_vel_limit,
+    CMD_SET_TRAJ_ACCEL_LIMITS: encode_set_traj_accel_limits,
+    CMD_SET_TRAJ_INERTIA: encode_set_traj_inertia,
+    CMD_GET_IQ: encode_get_iq,
+    CMD_GET_TEMPERATURE: encode_get_temperature,
+    CMD_REBOOT: encode_reboot,
+    CMD_GET_BUS_VOLTAGE_CURRENT: encode_get_bus_voltage_current,
+    CMD_CLEAR_ERRORS: encode_clear_errors,
+    CMD_SET_ABSOLUTE_POSITION: encode_set_absolute_position,
+    CMD_SET_POS_GAIN: encode_set_pos_gain,
+    CMD_SET_VEL_GAINS: encode_set_vel_gains,
+    CMD_GET_TORQUES: encode_get_torques,
+    CMD_GET_POWERS: encode_get_powers,
+    CMD_ENTER_DFU_MODE: encode_enter_dfu_mode,
+}
+
+MESSAGES: Dict[int, Type[tuple]] = {
+    CMD_GET_VERSION: GetVersion,
+    CMD_HEARTBEAT: Heartbeat,
+    CMD_ESTOP: Estop,
+    CMD_GET_ERROR: GetError,
+    CMD_RX_SDO: RxSdo,
+    CMD_TX_SDO: TxSdo,
+    CMD_SET_AXIS_STATE: SetAxisState,
+    CMD_GET_ENCODER_ESTIMATES: GetEncoderEstimates,
+    CMD_SET_CONTROLLER_MODE: SetControllerMode,
+    CMD_SET_INPUT_POS: SetInputPos,
+    CMD_SET_INPUT_VEL: SetInputVel,
+    CMD_SET_INPUT_TORQUE: SetInputTorque,
+    CMD_SET_LIMITS: SetLimits,
+    CMD_SET_TRAJ_VEL_LIMIT: SetTrajVelLimit,
+    CMD_SET_TRAJ_ACCEL_LIMITS: SetTrajAccelLimits,
+    CMD_SET_TRAJ_INERTIA: SetTrajInertia,
+    CMD_GET_IQ: GetIq,
+    CMD_GET_TEMPERATURE: GetTemperature,
+    CMD_REBOOT: Reboot,
+    CMD_GET_BUS_VOLTAGE_CURRENT: GetBusVoltageCurrent,
+    CMD_CLEAR_ERRORS: ClearErrors,
+    CMD_SET_ABSOLUTE_POSITION: SetAbsolutePosition,
+    CMD_SET_POS_GAIN: SetPosGain,
+    CMD_SET_VEL_GAINS: SetVelGains,
+    CMD_GET_TORQUES: GetTorques,
+    CMD_GET_POWERS: GetPowers,
+    CMD_ENTER_DFU_MODE: EnterDFUMode,
+}
+
+STRUCTS: Dict[int, struct.Struct] = {
+    CMD_GET_VERSION: GET_VERSION,
+    CMD_HEARTBEAT: HEARTBEAT,
+    CMD_ESTOP: ESTOP,
+    CMD_GET_ERROR: GET_ERROR,
+    CMD_RX_SDO: RX_SDO,
+    CMD_TX_SDO: TX_SDO,
+    CMD_SET_AXIS_STATE: SET_AXIS_STATE,
+    CMD_GET_ENCODER_ESTIMATES: GET_ENCODER_ESTIMATES,
+    CMD_SET_CONTROLLER_MODE: SET_CONTROLLER_MODE,
+    CMD_SET_INPUT_POS: SET_INPUT_POS,
+    CMD_SET_INPUT_VEL: SET_INPUT_VEL,
+    CMD_SET_INPUT_TORQUE: SET_INPUT_TORQUE,
+    CMD_SET_LIMITS: SET_LIMITS,
+    CMD_SET_TRAJ_VEL_LIMIT: SET_TRAJ_VEL_LIMIT,
+    CMD_SET_TRAJ_ACCEL_LIMITS: SET_TRAJ_ACCEL_LIMITS,
+    CMD_SET_TRAJ_INERTIA: SET_TRAJ_INERTIA,
+    CMD_GET_IQ: GET_IQ,
+    CMD_GET_TEMPERATURE: GET_TEMPERATURE,
+    CMD_REBOOT: REBOOT,
+    CMD_GET_BUS_VOLTAGE_CURRENT: GET_BUS_VOLTAGE_CURRENT,
+    CMD_CLEAR_ERRORS: CLEAR_ERRORS,
+    CMD_SET_ABSOLUTE_POSITION: SET_ABSOLUTE_POSITION,
+    CMD_SET_POS_GAIN: SET_POS_GAIN,
+    CMD_SET_VEL_GAINS: SET_VEL_GAINS,
+    CMD_GET_TORQUES: GET_TORQUES,
+    CMD_GET_POWERS: GET_POWERS,
+    CMD_ENTER_DFU_MODE: ENTER_DFU_MODE,
+}
@@ -0,0 +1,360 @@
+"""Pipelined ODrive SDO client (RxSdo 0x04 / TxSdo 0x05), endpoint names from apps/gyro-server/flat_endpoints.json.
+
+Requests to a node are sent back to back with up to `window` of them
+unanswered at a time, replies are matched by (node, endpoint id) in
+whatever order they come back and unanswered reads are resent after
+`timeout`. All nodes are served in parallel, so dumping the ~260 config
+endpoints of three axes is a few hundred milliseconds of bus time instead
+of one blocking round trip per value.
+
+Writes are not acknowledged by the ODrive. After every `window` writes to
+a node the last written endpoint is read back before more frames go out,
+which bounds the node's RX backlog the same way reads do, and
+write_many(verify=True) reads everything back at the end.
+
+    python odrive_sdo.py dump --nodes 1,2,3 -o backup.json
+    python odrive_sdo.py restore backup.json --save
+    python odrive_sdo.py restore ../apps/gyro-server/config.json --nodes 1,2,3
+    python odrive_sdo.py get axis0.config.can.encoder_msg_rate_ms --nodes 1,2,3
+    python odrive_sdo.py set axis0.controller.config.vel_limit 4 --nodes 1
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import json
+import os
+import queue
+import struct
+import sys
+import time
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import can
+
+from can_daemon import open_bus
+from can_demux import CanDemux
+from odrive_can import CMD_RX_SDO, CMD_TX_SDO, encode_rx_sdo
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS_PATH = os.environ.get(
+    "ODRIVE_ENDPOINTS", os.path.join(HERE, "..", "apps", "gyro-server", "flat_endpoints.json"))
+CONFIG_PATH = os.path.join(HERE, "..", "apps", "gyro-server", "config.json")
+
+SDO_READ = 0
+SDO_WRITE = 1
+
+WINDOW = 8  # unanswered requests per node
+REPLY_TIMEOUT_S = 0.1  # resend a read after this long without its TxSdo
+RETRIES = 3  # resends before an endpoint is given up
+
+# endpoint type -> layout in the 4 byte SDO value field, other types (uint64, endpoint_ref, function) don't fit
+TYPES: Dict[str, struct.Struct] = {
+    "float": struct.Struct("<f"),
+    "bool": struct.Struct("<?"),
+    "uint8": struct.Struct("<B"),
+    "uint16": struct.Struct("<H"),
+    "uint32": struct.Struct("<I"),
+    "int8": struct.Struct("<b"),
+    "int16": struct.Struct("<h"),
+    "int32": struct.Struct("<i"),
+}
+_U32 = struct.Struct("<I")
+
+
+class Endpoint(NamedTuple):
+    name: str
+    id: int
+    type: str
+
+
+def load_endpoints(path: str = ENDPOINTS_PATH) -> Dict[str, Endpoint]:
+    with open(path) as f:
+        doc = json.load(f)
+    return {name: Endpoint(name, ep["id"], ep["type"]) for name, ep in doc["endpoints"].items()}
+
+
+def to_raw(ep: Endpoint, value: Any) -> int:
+    """value as the uint32 the SDO frame carries."""
+    return _U32.unpack(TYPES[ep.type].pack(value).ljust(4, b"\x00"))[0]
+
+
+def from_raw(ep: Endpoint, raw: int) -> Any:
+    return TYPES[ep.type].unpack_from(_U32.pack(raw))[0]
+
+
+class _Op:
+    __slots__ = ("ep", "opcode", "raw")
+
+    def __init__(self, ep: Endpoint, opcode: int, raw: int = 0) -> None:
+        self.ep = ep
+        self.opcode = opcode
+        self.raw = raw
+
+
+class _Node:
+    __slots__ = ("ops", "inflight", "unfenced", "fence")
+
+    def __init__(self, ops: Iterable[_Op]) -> None:
+        self.ops: Deque[_Op] = collections.deque(ops)
+        self.inflight: Dict[int, List[Any]] = {}  # endpoint id -> [endpoint, deadline, tries]
+        self.unfenced = 0  # writes sent since the last read-back
+        self.fence: Optional[int] = None  # endpoint id of the read-back the node is held on
+
+
+class SdoClient:
+    """Windowed RxSdo reads/writes on several nodes at once, TxSdo replies come in through demux.tap()."""
+
+    def __init__(
+        self,
+        bus: can.BusABC,
+        demux: CanDemux,
+        endpoints: Optional[Dict[str, Endpoint]] = None,
+        window: int = WINDOW,
+        timeout: float = REPLY_TIMEOUT_S,
+        retries: int = RETRIES,
+    ) -> None:
+        self._bus = bus
+        self._demux = demux
+        self.endpoints = load_endpoints() if endpoints is None else endpoints
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.retries = retries
+        self._replies: "queue.Queue[Tuple[int, int, int]]" = queue.Queue()
+        demux.tap(CMD_TX_SDO, self._on_reply)
+        self.sent = 0
+        self.resent = 0
+        self.tx_errors = 0
+
+    def close(self) -> None:
+        self._demux.untap(CMD_TX_SDO, self._on_reply)
+
+    def _on_reply(self, nid: int, reply: Any, stamp: float) -> None:
+        self._replies.put((nid, reply.endpoint_id, reply.value))
+
+    def endpoint(self, name: str) -> Endpoint:
+        ep = self.endpoints.get(name)
+        if ep is None:
+            raise KeyError(f"unknown endpoint {name!r}")
+        return ep
+
+    def _send(self, nid: int, opcode: int, ep_id: int, raw: int = 0) -> None:
+        try:
+            self._bus.send(can.Message(
+                arbitration_id=(nid << 5) | CMD_RX_SDO,
+                data=encode_rx_sdo(opcode, ep_id, 0, raw),
+                is_extended_id=False,
+            ))
+            self.sent += 1
+        except can.CanError:
+            # a lost read is resent on timeout, a lost write shows up in the read-back
+            self.tx_errors += 1
+
+    # pipeline
+
+    def _run(self, jobs: Dict[int, List[_Op]]) -> Dict[int, Dict[int, int]]:
+        """Send every op, returns the raw value of every read that was answered, by node and endpoint id."""
+        nodes = {nid: _Node(ops) for nid, ops in jobs.items() if ops}
+        while not self._replies.empty():
+            self._replies.get_nowait()  # late answers to the previous run
+        results: Dict[int, Dict[int, int]] = {nid: {} for nid in jobs}
+        while any(node.ops or node.inflight for node in nodes.values()):
+            now = time.monotonic()
+            for nid, node in nodes.items():
+                self._expire(nid, node, now)
+                self._fill(nid, node, now)
+            deadlines = [slot[1] for node in nodes.values() for slot in node.inflight.values()]
+            if not deadlines:
+                continue
+            try:
+                reply = self._replies.get(timeout=max(0.0, min(deadlines) - time.monotonic()))
+            except queue.Empty:
+                continue
+            while reply is not None:
+                nid, ep_id, raw = reply
+                node = nodes.get(nid)
+                # replies nobody waits for any more (answer to a resent read, other clients) are dropped
+                if node is not None and node.inflight.pop(ep_id, None) is not None:
+                    if node.fence == ep_id:
+                        node.fence = None
+                    else:
+                        results[nid][ep_id] = raw
+                try:
+                    reply = self._replies.get_nowait()
+                except queue.Empty:
+                    reply = None
+        return results
+
+    def _expire(self, nid: int, node: _Node, now: float) -> None:
+        for ep_id, slot in list(node.inflight.items()):
+            if slot[1] > now:
+                continue
+            if slot[2] >= self.retries:
+                del node.inflight[ep_id]
+                if node.fence == ep_id:
+                    node.fence = None
+                continue
+            slot[1] = now + self.timeout
+            slot[2] += 1
+            self.resent += 1
+            self._send(nid, SDO_READ, ep_id)
+
+    def _fill(self, nid: int, node: _Node, now: float) -> None:
+        while node.ops and node.fence is None and len(node.inflight) + node.unfenced < self.window:
+            op = node.ops.popleft()
+            ep = op.ep
+            if op.opcode == SDO_WRITE:
+                self._send(nid, SDO_WRITE, ep.id, op.raw)
+                node.unfenced += 1
+                if node.unfenced + len(node.inflight) >= self.window:
+                    # the reply means the node has worked through every frame sent before it
+                    node.inflight[ep.id] = [ep, now + self.timeout, 0]
+                    node.fence = ep.id
+                    node.unfenced = 0
+                    self._send(nid, SDO_READ, ep.id)
+            elif ep.id not in node.inflight:
+                node.inflight[ep.id] = [ep, now + self.timeout, 0]
+                self._send(nid, SDO_READ, ep.id)
+        if not node.ops:
+            node.unfenced = 0
+
+    # callers
+
+    def read_many(self, nids: Iterable[int], names: Iterable[str]) -> Dict[int, Dict[str, Any]]:
+        """Read names on every node, endpoints that never answered are missing from the result."""
+        eps = [self.endpoint(name) for name in names]
+        raws = self._run({nid: [_Op(ep, SDO_READ) for ep in eps] for nid in nids})
+        return {
+            nid: {ep.name: from_raw(ep, got[ep.id]) for ep in eps if ep.id in got}
+            for nid, got in raws.items()
+        }
+
+    def write_many(self, values: Dict[int, Dict[str, Any]], verify: bool = True) -> Dict[int, List[str]]:
+        """Write {node: {name: value}}, returns the names per node whose read-back differs or never came."""
+        jobs: Dict[int, List[_Op]] = {}
+        for nid, named in values.items():
+            jobs[nid] = [_Op(ep, SDO_WRITE, to_raw(ep, v)) for ep, v in
+                         ((self.endpoint(name), v) for name, v in named.items())]
+        self._run(jobs)
+        if not verify:
+            return {nid: [] for nid in jobs}
+        got = self._run({nid: [_Op(op.ep, SDO_READ) for op in ops] for nid, ops in jobs.items()})
+        return {nid: [op.ep.name for op in ops if got[nid].get(op.ep.id) != op.raw] for nid, ops in jobs.items()}
+
+    def read(self, nid: int, name: str) -> Any:
+        """One endpoint, None if it didn't answer."""
+        return self.read_many([nid], [name])[nid].get(name)
+
+    def write(self, nid: int, name: str, value: Any) -> None:
+        ep = self.endpoint(name)
+        self._send(nid, SDO_WRITE, ep.id, to_raw(ep, value))
+
+    def call(self, nid: int, name: str) -> None:
+        """Call a function endpoint without arguments, e.g. save_configuration."""
+        ep = self.endpoint(name)
+        if ep.type != "function":
+            raise ValueError(f"{name} is a {ep.type}, not a function")
+        self._send(nid, SDO_WRITE, ep.id)
+
+
+def transferable(endpoints: Dict[str, Endpoint], names: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Split names into the ones that fit an SDO value and the ones that don't (64 bit, endpoint refs, unknown)."""
+    ok: List[str] = []
+    skipped: List[str] = []
+    for name in names:
+        ep = endpoints.get(name)
+        (ok if ep is not None and ep.type in TYPES else skipped).append(name)
+    return ok, skipped
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Read/write ODrive endpoints over CAN SDO")
+    ap.add_argument("--channel", default=os.environ.get("CAN_CHANNEL", "can0"))
+    ap.add_argument("--interface", default="socketcan")
+    ap.add_argument("--nodes", default="1,2,3", help="comma separated node ids")
+    ap.add_argument("--endpoints", default=ENDPOINTS_PATH)
+    ap.add_argument("--window", type=int, default=WINDOW, help="unanswered requests per node")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("dump", help="read the config endpoints of every node")
+    p.add_argument("--keys", default=CONFIG_PATH, help="config json whose keys are read")
+    p.add_argument("-o", "--out", default="-")
+    p = sub.add_parser("restore", help="write a dump (per node) or a flat config (to every node)")
+    p.add_argument("file")
+    p.add_argument("--no-verify", action="store_true")
+    p.add_argument("--save", action="store_true", help="call save_configuration afterwards")
+    p = sub.add_parser("get")
+    p.add_argument("names", nargs="+")
+    p = sub.add_parser("set")
+    p.add_argument("name")
+    p.add_argument("value", type=json.loads)
+    args = ap.parse_args()
+
+    nids = [int(n) for n in args.nodes.split(",") if n.strip()]
+    endpoints = load_endpoints(args.endpoints)
+    bus = open_bus(args.channel, interface=args.interface)
+    demux = CanDemux(bus)
+    demux.start()
+    sdo = SdoClient(bus, demux, endpoints, window=args.window)
+    t0 = time.perf_counter()
+    try:
+        if args.cmd in ("dump", "get"):
+            if args.cmd == "dump":
+                with open(args.keys) as f:
+                    names, skipped = transferable(endpoints, json.load(f))
+            else:
+                names, skipped = transferable(endpoints, args.names)
+            if skipped:
+                print(f"[sdo] skipping {len(skipped)} endpoints that don't fit an SDO value: {', '.join(skipped)}",
+                      file=sys.stderr)
+            values = sdo.read_many(nids, names)
+            dt = time.perf_counter() - t0
+            for nid in nids:
+                missing = len(names) - len(values[nid])
+                print(f"[sdo] node {nid}: {len(values[nid])}/{len(names)} read"
+                      + (f", {missing} unanswered" if missing else ""), file=sys.stderr)
+            out = json.dumps({str(nid): values[nid] for nid in nids}, indent=2)
+            if args.cmd == "get" or args.out == "-":
+                print(out)
+            else:
+                with open(args.out, "w") as f:
+                    f.write(out + "\n")
+        else:
+            if args.cmd == "set":
+                doc: Dict[str, Any] = {args.name: args.value}
+            else:
+                with open(args.file) as f:
+                    doc = json.load(f)
+            # a dump is keyed by node id, a gyro-server config.json is one flat node
+            if doc and all(k.isdigit() for k in doc):
+                values = {int(nid): named for nid, named in doc.items()}
+            else:
+                values = {nid: doc for nid in nids}
+            skipped_all = set()
+            for nid in values:
+                names, skipped = transferable(endpoints, values[nid])
+                skipped_all.update(skipped)
+                values[nid] = {name: values[nid][name] for name in names if values[nid][name] is not None}
+            if skipped_all:
+                print(f"[sdo] skipping {len(skipped_all)} endpoints that don't fit an SDO value: "
+                      f"{', '.join(sorted(skipped_all))}", file=sys.stderr)
+            verify = args.cmd == "set" or not args.no_verify
+            bad = sdo.write_many(values, verify=verify)
+            dt = time.perf_counter() - t0
+            for nid in values:
+                print(f"[sdo] node {nid}: {len(values[nid])} written"
+                      + (f", read-back differs for {', '.join(bad[nid])}" if bad[nid] else
+                         (", verified" if verify else "")), file=sys.stderr)
+            if args.cmd == "restore" and args.save:
+                for nid in values:
+                    sdo.call(nid, "save_configuration")
+                print("[sdo] save_configuration sent", file=sys.stderr)
+        print(f"[sdo] {sdo.sent} frames in {dt:.2f} s, {sdo.resent} resent, {sdo.tx_errors} tx errors", file=sys.stderr)
+    finally:
+        sdo.close()
+        demux.stop()
+        demux.join(timeout=1.0)
+        bus.shutdown()
+
+
+if __name__ == "__main__":
+    main()
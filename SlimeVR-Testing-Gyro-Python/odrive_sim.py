@@ -0,0 +1,358 @@
+"""Simulated ODrive axes on a (v)can interface, so the gimbal scripts run without hardware.
+
+    sudo ip link add dev vcan0 type vcan && sudo ip link set up vcan0
+    python odrive_sim.py --channel vcan0 --nodes 1,2,3 --lag-ms 2
+    CAN_CHANNEL=vcan0 python integrated_all2.py
+
+Speaks the CAN Simple commands the scripts here use: heartbeat (0x01),
+set axis state (0x07), encoder estimate (0x09, cyclic and on RTR),
+controller mode (0x0B), input pos (0x0C), input vel (0x0D), trajectory
+limits (0x11/0x12), clear errors (0x18) and RxSdo read/write (0x04,
+answered with TxSdo 0x05). Position moves follow a trapezoidal profile
+in INPUT_MODE_TRAP and a first-order lag otherwise. Every received
+command takes effect --lag-ms later, RTR replies included.
+
+Every --report seconds it prints the command rates it sees per node,
+which is the control rate the script under test actually achieves.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import math
+import struct
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import can
+
+from can_demux import CMD_ENCODER_EST, CMD_HEARTBEAT
+from odrive_can import (
+    CMD_CLEAR_ERRORS,
+    CMD_RX_SDO,
+    CMD_SET_AXIS_STATE,
+    CMD_SET_CONTROLLER_MODE,
+    CMD_SET_INPUT_POS,
+    CMD_SET_INPUT_VEL,
+    CMD_SET_TRAJ_ACCEL_LIMITS,
+    CMD_SET_TRAJ_VEL_LIMIT,
+    CMD_TX_SDO,
+    RX_SDO,
+    decode_rx_sdo,
+    decode_set_axis_state,
+    decode_set_controller_mode,
+    decode_set_input_pos,
+    decode_set_input_vel,
+    decode_set_traj_accel_limits,
+    decode_set_traj_vel_limit,
+    encode_get_encoder_estimates,
+    encode_heartbeat,
+    encode_tx_sdo,
+)
+
+AXIS_IDLE = 1
+AXIS_FULL_CALIBRATION = 3
+AXIS_CLOSED_LOOP = 8
+CTRL_MODE_VEL = 2
+CTRL_MODE_POS = 3
+INPUT_MODE_TRAP = 5
+
+SDO_READ = 0
+SDO_WRITE = 1
+
+# endpoints the model backs, ids from apps/gyro-server/flat_endpoints.json, others are plain storage
+EP_ACTIVE_ERRORS = 175
+EP_CURRENT_STATE = 180
+EP_POS_ESTIMATE = 182
+EP_VEL_ESTIMATE = 183
+EP_HEARTBEAT_RATE_MS = 231
+EP_ENCODER_RATE_MS = 232
+EP_INPUT_POS = 367
+EP_CONTROL_MODE = 382
+EP_INPUT_MODE = 383
+EP_TRAJ_VEL_LIMIT = 416
+EP_TRAJ_ACCEL_LIMIT = 417
+EP_TRAJ_DECEL_LIMIT = 418
+EP_CLEAR_ERRORS = 629
+
+TICK_S = 0.001
+CALIBRATION_S = 1.0  # FULL_CALIBRATION_SEQUENCE just idles this long
+PASSTHROUGH_TAU_S = 0.005  # position lag outside INPUT_MODE_TRAP
+
+_F32 = struct.Struct("<f")
+_U32 = struct.Struct("<I")
+
+
+class SimAxis:
+    def __init__(self, nid: int, encoder_ms: int, heartbeat_ms: int) -> None:
+        self.nid = nid
+        self.state = AXIS_IDLE
+        self.error = 0
+        self.control_mode = CTRL_MODE_POS
+        self.input_mode = INPUT_MODE_TRAP
+        self.pos = 0.0
+        self.vel = 0.0
+        self.input_pos = 0.0
+        self.input_vel = 0.0
+        self.vel_ff = 0.0
+        self.vel_limit = 2.0
+        self.accel_limit = 20.0
+        self.decel_limit = 20.0
+        self.encoder_ms = encoder_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.calibration_done = 0.0
+        self.raw: Dict[int, int] = {}  # endpoints without a model, stored as raw 32-bit values
+        self.counts: Dict[int, int] = {}  # commands received, by cmd
+
+    @property
+    def traj_done(self) -> bool:
+        if self.state != AXIS_CLOSED_LOOP or self.control_mode != CTRL_MODE_POS:
+            return True
+        return abs(self.input_pos - self.pos) < 1e-4 and abs(self.vel) < 1e-3
+
+    def step(self, now: float, dt: float) -> None:
+        if self.state == AXIS_FULL_CALIBRATION and now >= self.calibration_done:
+            self.state = AXIS_IDLE
+        if self.state != AXIS_CLOSED_LOOP:
+            self.vel = 0.0
+            return
+        if self.control_mode == CTRL_MODE_VEL:
+            dv = self.input_vel - self.vel
+            lim = self.accel_limit * dt
+            self.vel += max(-lim, min(lim, dv))
+        elif self.control_mode != CTRL_MODE_POS:
+            self.vel = 0.0  # torque control isn't modelled, hold position
+        elif self.input_mode == INPUT_MODE_TRAP:
+            self._trap_step(dt)
+            return
+        else:
+            k = min(1.0, dt / PASSTHROUGH_TAU_S)
+            self.vel = (self.input_pos - self.pos) * k / dt + self.vel_ff
+        self.pos += self.vel * dt
+
+    def _trap_step(self, dt: float) -> None:
+        err = self.input_pos - self.pos
+        v = self.vel
+        direction = 1.0 if err >= 0.0 else -1.0
+        stop_dist = v * v / (2.0 * self.decel_limit)
+        if v * direction < 0.0 or stop_dist >= abs(err):
+            # moving away or inside the braking distance: decelerate towards 0
+            dv = self.decel_limit * dt
+            v = v - dv if v > 0.0 else v + dv
+            if abs(v) < dv:
+                v = 0.0
+        else:
+            v += direction * self.accel_limit * dt
+            v = max(-self.vel_limit, min(self.vel_limit, v))
+        self.pos += v * dt
+        self.vel = v
+        if abs(self.input_pos - self.pos) <= max(1e-5, abs(v) * dt) and abs(v) <= self.decel_limit * dt * 2.0:
+            self.pos = self.input_pos
+            self.vel = 0.0
+
+    def heartbeat(self) -> bytes:
+        return encode_heartbeat(self.error, self.state, 0, int(self.traj_done)) + b"\x00"
+
+    def encoder(self) -> bytes:
+        return encode_get_encoder_estimates(self.pos, self.vel)
+
+    # SDO
+
+    def sdo_read(self, endpoint: int) -> int:
+        floats = {
+            EP_POS_ESTIMATE: self.pos, EP_VEL_ESTIMATE: self.vel, EP_INPUT_POS: self.input_pos,
+            EP_TRAJ_VEL_LIMIT: self.vel_limit, EP_TRAJ_ACCEL_LIMIT: self.accel_limit,
+            EP_TRAJ_DECEL_LIMIT: self.decel_limit,
+        }
+        if endpoint in floats:
+            return _U32.unpack(_F32.pack(floats[endpoint]))[0]
+        ints = {
+            EP_ACTIVE_ERRORS: self.error, EP_CURRENT_STATE: self.state,
+            EP_HEARTBEAT_RATE_MS: self.heartbeat_ms, EP_ENCODER_RATE_MS: self.encoder_ms,
+            EP_CONTROL_MODE: self.control_mode, EP_INPUT_MODE: self.input_mode,
+        }
+        if endpoint in ints:
+            return ints[endpoint]
+        return self.raw.get(endpoint, 0)
+
+    def sdo_write(self, endpoint: int, value: int) -> None:
+        f = _F32.unpack(_U32.pack(value))[0]
+        if endpoint == EP_ENCODER_RATE_MS:
+            self.encoder_ms = value
+        elif endpoint == EP_HEARTBEAT_RATE_MS:
+            self.heartbeat_ms = value
+        elif endpoint == EP_CONTROL_MODE:
+            self.control_mode = value & 0xFF
+        elif endpoint == EP_INPUT_MODE:
+            self.input_mode = value & 0xFF
+        elif endpoint == EP_INPUT_POS:
+            self.input_pos = f
+        elif endpoint == EP_TRAJ_VEL_LIMIT:
+            self.vel_limit = f
+        elif endpoint == EP_TRAJ_ACCEL_LIMIT:
+            self.accel_limit = f
+        elif endpoint == EP_TRAJ_DECEL_LIMIT:
+            self.decel_limit = f
+        elif endpoint == EP_CLEAR_ERRORS:
+            self.error = 0
+        else:
+            self.raw[endpoint] = value
+
+
+class OdriveSim:
+    """All simulated axes behind one bus, run() until stop_evt is set."""
+
+    def __init__(self, bus: can.BusABC, nodes: List[int], lag_s: float = 0.0,
+                 encoder_ms: int = 0, heartbeat_ms: int = 100) -> None:
+        self._bus = bus
+        self.axes: Dict[int, SimAxis] = {nid: SimAxis(nid, encoder_ms, heartbeat_ms) for nid in nodes}
+        self._lag = lag_s
+        self._due: List[Tuple[float, int, int, int, bytes, bool]] = []  # due, seq, nid, cmd, data, rtr
+        self._seq = 0
+        self._next_cyclic: Dict[Tuple[int, int], float] = {}
+        self.rx_frames = 0
+        self.tx_frames = 0
+        self.tx_errors = 0
+
+    def _send(self, nid: int, cmd: int, data: bytes) -> None:
+        try:
+            self._bus.send(can.Message(arbitration_id=(nid << 5) | cmd, data=data, is_extended_id=False))
+            self.tx_frames += 1
+        except can.CanError:
+            self.tx_errors += 1
+
+    def _receive(self, msg: can.Message, now: float) -> None:
+        if msg.is_error_frame or msg.is_extended_id:
+            return
+        nid = msg.arbitration_id >> 5
+        if nid not in self.axes:
+            return
+        self.rx_frames += 1
+        self._seq += 1
+        heapq.heappush(self._due, (now + self._lag, self._seq, nid, msg.arbitration_id & 0x1F,
+                                   bytes(msg.data), msg.is_remote_frame))
+
+    def _apply(self, nid: int, cmd: int, data: bytes, rtr: bool, now: float) -> None:
+        axis = self.axes[nid]
+        axis.counts[cmd] = axis.counts.get(cmd, 0) + 1
+        if rtr:
+            if cmd == CMD_ENCODER_EST:
+                self._send(nid, cmd, axis.encoder())
+            elif cmd == CMD_HEARTBEAT:
+                self._send(nid, cmd, axis.heartbeat())
+            return
+        if cmd == CMD_SET_AXIS_STATE and len(data) >= 4:
+            state = decode_set_axis_state(data).axis_requested_state
+            if state == AXIS_FULL_CALIBRATION:
+                axis.calibration_done = now + CALIBRATION_S
+            if state == AXIS_CLOSED_LOOP:
+                axis.input_pos = axis.pos  # the ODrive holds where it is on entry
+            axis.state = state
+        elif cmd == CMD_SET_CONTROLLER_MODE and len(data) >= 8:
+            axis.control_mode, axis.input_mode = decode_set_controller_mode(data)
+        elif cmd == CMD_SET_INPUT_POS and len(data) >= 8:
+            msg = decode_set_input_pos(data)
+            axis.input_pos = msg.input_pos
+            axis.vel_ff = msg.vel_ff
+        elif cmd == CMD_SET_INPUT_VEL and len(data) >= 8:
+            axis.input_vel = decode_set_input_vel(data).input_vel
+        elif cmd == CMD_SET_TRAJ_VEL_LIMIT and len(data) >= 4:
+            axis.vel_limit = abs(decode_set_traj_vel_limit(data).traj_vel_limit) or axis.vel_limit
+        elif cmd == CMD_SET_TRAJ_ACCEL_LIMITS and len(data) >= 8:
+            acc, dec = decode_set_traj_accel_limits(data)
+            axis.accel_limit = abs(acc) or axis.accel_limit
+            axis.decel_limit = abs(dec) or axis.decel_limit
+        elif cmd == CMD_CLEAR_ERRORS:
+            axis.error = 0
+        elif cmd == CMD_RX_SDO and len(data) >= 3:
+            opcode, endpoint, _, value = decode_rx_sdo(data.ljust(RX_SDO.size, b"\x00"))
+            if opcode == SDO_READ:
+                self._send(nid, CMD_TX_SDO, encode_tx_sdo(0, endpoint, 0, axis.sdo_read(endpoint)))
+            elif opcode == SDO_WRITE:
+                axis.sdo_write(endpoint, value)
+
+    def _cyclic(self, now: float) -> None:
+        for nid, axis in self.axes.items():
+            for cmd, period_ms, payload in (
+                (CMD_HEARTBEAT, axis.heartbeat_ms, axis.heartbeat),
+                (CMD_ENCODER_EST, axis.encoder_ms, axis.encoder),
+            ):
+                if period_ms <= 0:
+                    continue
+                key = (nid, cmd)
+                due = self._next_cyclic.get(key, now)
+                if now >= due:
+                    self._send(nid, cmd, payload())
+                    # schedule from the previous slot so the rate doesn't drift, unless we fell behind
+                    nxt = due + period_ms / 1000.0
+                    self._next_cyclic[key] = nxt if nxt > now else now + period_ms / 1000.0
+
+    def run(self, stop_evt: threading.Event, report_s: float = 0.0) -> None:
+        now = time.monotonic()
+        next_tick = now
+        next_report = now + report_s if report_s > 0 else math.inf
+        last_counts: Dict[int, Dict[int, int]] = {nid: {} for nid in self.axes}
+        last_report = now
+        while not stop_evt.is_set():
+            wake = next_tick
+            if self._due:
+                wake = min(wake, self._due[0][0])
+            msg = self._bus.recv(timeout=max(0.0, wake - time.monotonic()))
+            now = time.monotonic()
+            if msg is not None:
+                self._receive(msg, now)
+            while self._due and self._due[0][0] <= now:
+                _, _, nid, cmd, data, rtr = heapq.heappop(self._due)
+                self._apply(nid, cmd, data, rtr, now)
+            if now >= next_tick:
+                # catch up in whole ticks so the motion model keeps real time under load
+                ticks = int((now - next_tick) / TICK_S) + 1
+                for axis in self.axes.values():
+                    for _ in range(min(ticks, 100)):
+                        axis.step(now, TICK_S)
+                next_tick += ticks * TICK_S
+                self._cyclic(now)
+            if now >= next_report:
+                self._report(now - last_report, last_counts)
+                last_report = now
+                next_report = now + report_s
+
+    def _report(self, dt: float, last_counts: Dict[int, Dict[int, int]]) -> None:
+        parts = []
+        for nid, axis in self.axes.items():
+            prev = last_counts[nid]
+            rates = {cmd: (n - prev.get(cmd, 0)) / dt for cmd, n in axis.counts.items()}
+            last_counts[nid] = dict(axis.counts)
+            parts.append(
+                f"n{nid} st={axis.state} pos={axis.pos:+.3f}/{axis.input_pos:+.3f} "
+                f"pos_cmd={rates.get(CMD_SET_INPUT_POS, 0.0):.1f}/s rtr={rates.get(CMD_ENCODER_EST, 0.0):.1f}/s"
+            )
+        print("[sim] " + " | ".join(parts))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Simulate ODrive axes on a (v)can interface")
+    ap.add_argument("--channel", default="vcan0")
+    ap.add_argument("--interface", default="socketcan")
+    ap.add_argument("--nodes", default="1,2,3", help="comma separated node ids")
+    ap.add_argument("--lag-ms", type=float, default=2.0, help="delay before a received command takes effect")
+    ap.add_argument("--encoder-ms", type=int, default=0, help="cyclic encoder estimate period, 0 = off until configured over SDO")
+    ap.add_argument("--heartbeat-ms", type=int, default=100)
+    ap.add_argument("--report", type=float, default=2.0, help="print rates every N seconds, 0 = never")
+    args = ap.parse_args()
+
+    nodes = [int(n) for n in args.nodes.split(",") if n.strip()]
+    stop_evt = threading.Event()
+    with can.Bus(channel=args.channel, interface=args.interface) as bus:
+        sim = OdriveSim(bus, nodes, args.lag_ms / 1000.0, args.encoder_ms, args.heartbeat_ms)
+        print(f"[sim] {len(nodes)} axes {nodes} on {args.channel}, lag {args.lag_ms:.1f} ms")
+        try:
+            sim.run(stop_evt, args.report)
+        except KeyboardInterrupt:
+            pass
+    print(f"[sim] rx {sim.rx_frames} frames, tx {sim.tx_frames} frames, tx errors {sim.tx_errors}")
+
+
+if __name__ == "__main__":
+    main()
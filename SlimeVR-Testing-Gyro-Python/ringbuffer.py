@@ -0,0 +1,62 @@
+"""Preallocated NumPy ring buffer for the per-sample histories in integrated_all2.VisualizerState."""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity history with O(1) append and zero-copy windows.
+
+    Every sample is written twice, at slot i and i + capacity, so the most
+    recent n samples are always one contiguous slice of the backing array
+    and view() never has to stitch the wrap-around together. Memory is
+    fixed at 2 * capacity * itemsize bytes.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = np.zeros(2 * capacity, dtype=dtype)
+        self._head = 0  # next slot to write, in [0, capacity)
+        self._count = 0
+
+    def append(self, value: float) -> None:
+        i = self._head
+        buf = self._buf
+        buf[i] = value
+        buf[i + self.capacity] = value
+        i += 1
+        self._head = i if i < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def last(self, default: Optional[float] = None) -> Optional[float]:
+        if not self._count:
+            return default
+        return float(self._buf[self._head + self.capacity - 1])
+
+    def view(self, n: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the newest n samples (all of them by default), oldest first.
+
+        The view aliases the buffer, copy it before releasing whatever lock
+        guards the appends if it has to stay consistent.
+        """
+        count = self._count if n is None else max(0, min(n, self._count))
+        end = self._head + self.capacity
+        v = self._buf[end - count:end]
+        v.flags.writeable = False
+        return v
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._buf.nbytes
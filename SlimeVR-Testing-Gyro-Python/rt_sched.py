@@ -0,0 +1,106 @@
+"""Absolute-deadline tick scheduler for the gimbal control loop (integrated_all2.BVHGimbalThread).
+
+Tick k is due at t0 + k * period, so lateness in one tick never shifts
+the next one. Each wait sleeps until spin_s before the deadline and then
+busy-waits the rest, which takes the OS timer slack out of the jitter.
+When a tick is more than one period late the ticks in between are
+skipped, not run back to back: wait() returns the newest due tick and how
+many were dropped, so a caller that maps ticks onto a timeline (BVH frame
+= tick * period / frame_time) skips frames the same way every time.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, Tuple
+
+from histogram import Histogram
+
+SPIN_S = 0.0005  # busy-wait this much of every wait
+
+
+def try_sched_fifo(priority: int) -> bool:
+    """Move the calling thread to SCHED_FIFO at priority, False if the platform or permissions don't allow it."""
+    if priority <= 0 or not hasattr(os, "sched_setscheduler"):
+        return False
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+class DeadlineScheduler:
+    def __init__(self, period: float, spin_s: float = SPIN_S) -> None:
+        self.period = period
+        self.spin_s = spin_s
+        self._t0 = 0.0
+        self._tick = -1
+        self.jitter = Histogram()  # wake time - deadline, over the last stats window
+        self.jitter_run = Histogram()  # the same since start()
+        self.overruns = 0  # waits that found the deadline already missed by a whole period
+        self.skipped = 0  # ticks dropped by those overruns
+        self.ticks = 0
+
+    def start(self, t0: float | None = None) -> None:
+        """Tick 0 is due at t0 (default: now)."""
+        self._t0 = time.perf_counter() if t0 is None else t0
+        self._tick = -1
+        self.jitter = Histogram()
+        self.jitter_run = Histogram()
+
+    def elapsed(self, tick: int) -> float:
+        """Timeline position of tick in seconds."""
+        return tick * self.period
+
+    def wait(self) -> Tuple[int, int]:
+        """Block until the next tick is due, returns (tick, ticks skipped before it)."""
+        period = self.period
+        tick = self._tick + 1
+        deadline = self._t0 + tick * period
+        now = time.perf_counter()
+        skipped = 0
+        if now - deadline >= period:
+            # behind by at least a whole period: jump to the newest due tick
+            newest = int((now - self._t0) / period)
+            skipped = newest - tick
+            tick = newest
+            deadline = self._t0 + tick * period
+            self.overruns += 1
+            self.skipped += skipped
+        else:
+            remaining = deadline - now - self.spin_s
+            if remaining > 0:
+                time.sleep(remaining)
+            while time.perf_counter() < deadline:
+                pass
+            now = time.perf_counter()
+        late = max(0.0, now - deadline)
+        self.jitter.add(late)
+        self.jitter_run.add(late)
+        self._tick = tick
+        self.ticks += 1
+        return tick, skipped
+
+    def stats(self, whole_run: bool = False) -> Dict[str, float]:
+        """Jitter percentiles over the window since the last windowed call (or the whole run), plus running overrun counts."""
+        if whole_run:
+            j = self.jitter_run
+        else:
+            j = self.jitter
+            self.jitter = Histogram()
+        return {
+            "hz": 1.0 / self.period,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter_p50": j.percentile(50),
+            "jitter_p99": j.percentile(99),
+            "jitter_max": j.max,
+        }
+
+    def summary(self, whole_run: bool = False) -> str:
+        st = self.stats(whole_run)
+        return (f"{st['hz']:.0f} Hz ticks {st['ticks']} overruns {st['overruns']} skipped {st['skipped']} "
+                f"jitter p50 {st['jitter_p50'] * 1e3:.3f} p99 {st['jitter_p99'] * 1e3:.3f} "
+                f"max {st['jitter_max'] * 1e3:.3f} ms")
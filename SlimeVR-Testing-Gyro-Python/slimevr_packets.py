@@ -0,0 +1,196 @@
+"""SlimeVR tracker UDP packet layouts, shared by slimevr.py, alllogs.py and integrated_all2.py.
+
+Every format is compiled once into a struct.Struct and read with unpack_from
+straight out of the datagram (through a memoryview), so decoding never
+re-slices or copies the receive buffer.
+"""
+from __future__ import annotations
+
+import math
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+SERVER_PORT = 6969
+HANDSHAKE_RESPONSE = bytes([3]) + b"Hey OVR =D 5"
+
+#all regular packets start with the 3 padding NULs followed by one byte for the packet type.
+HEADER_MAGIC = b"\x00\x00\x00"
+PACKET_HANDSHAKE = 3
+PACKET_ACCELERATION = 4
+PACKET_BATTERY = 12
+PACKET_ROTATION = 17
+PACKET_ROTATION_AND_ACCELERATION = 23
+
+#after the 4-byte header comes an 8-byte packet counter we do not care about.
+HEADER_SIZE = 12
+
+#the handshake carries board/imu/fw ids before the firmware string, the MAC follows it.
+HANDSHAKE_FW_OFFSET = HEADER_SIZE + 24
+
+HEADER = struct.Struct(">3sBQ")  # magic, type, packet counter
+BATTERY = struct.Struct(">ff")  # voltage, percent (0..1 or 0..100 depending on firmware)
+ROTATION = struct.Struct(">BBffff")  # sensor id, data type, x, y, z, w
+ROTATION_NO_TYPE = struct.Struct(">Bffff")  # older firmwares skip the data type byte
+QUAT = struct.Struct(">ffff")
+ACCEL = struct.Struct(">fff")
+ROTATION_AND_ACCEL = struct.Struct(">B7h")  # sensor id, q x/y/z/w * 2^15, accel x/y/z * 2^7
+
+_BATTERY_END = HEADER_SIZE + BATTERY.size
+_ROTATION_END = HEADER_SIZE + ROTATION.size
+_ROTATION_NO_TYPE_END = HEADER_SIZE + ROTATION_NO_TYPE.size
+_QUAT_END = HEADER_SIZE + QUAT.size
+_ACCEL_END = HEADER_SIZE + ACCEL.size
+_ROTATION_AND_ACCEL_END = HEADER_SIZE + ROTATION_AND_ACCEL.size
+
+_Q15 = 1.0 / 32768.0
+_Q7 = 1.0 / 128.0
+
+Quat = Tuple[float, float, float, float]
+Vec3 = Tuple[float, float, float]
+Addr = Tuple[str, int]
+Handler = Callable[[memoryview, Addr], None]
+
+
+def decode_handshake_mac(buf) -> Optional[str]:
+    off = HANDSHAKE_FW_OFFSET
+    if off >= len(buf):
+        return None
+    off += 1 + buf[off]  #skip firmware string
+    if off + 6 > len(buf):
+        return None
+    return bytes(buf[off:off + 6]).hex(":")
+
+
+def tracker_key(mac: str, addr: Addr) -> str:
+    """Registry key for a handshake, trackers without a burned-in MAC send all zeros so key those by IP."""
+    if mac == "00:00:00:00:00:00":
+        return f"ip-{addr[0].replace('.', '-')}"
+    return mac
+
+
+def decode_battery(buf) -> Optional[Tuple[float, float]]:
+    """(voltage, percent) with percent always scaled to 0..100."""
+    if len(buf) < _BATTERY_END:
+        return None
+    volt, pct = BATTERY.unpack_from(buf, HEADER_SIZE)
+    if pct <= 1.0:
+        pct *= 100.0  #some firmwares do this for some reason lol
+    return volt, pct
+
+
+def decode_rotation(buf) -> Optional[Quat]:
+    """(x, y, z, w), accepting the shorter layouts some firmwares send."""
+    n = len(buf)
+    if n >= _ROTATION_END:
+        return ROTATION.unpack_from(buf, HEADER_SIZE)[2:]
+    if n >= _ROTATION_NO_TYPE_END:
+        return ROTATION_NO_TYPE.unpack_from(buf, HEADER_SIZE)[1:]
+    if n >= _QUAT_END:
+        return QUAT.unpack_from(buf, HEADER_SIZE)
+    return None
+
+
+def decode_acceleration(buf) -> Optional[Vec3]:
+    if len(buf) < _ACCEL_END:
+        return None
+    return ACCEL.unpack_from(buf, HEADER_SIZE)
+
+
+def decode_rotation_and_accel(buf) -> Optional[Tuple[Quat, Vec3]]:
+    """Fixed-point quat (renormalised) and accel from a packet 23."""
+    if len(buf) < _ROTATION_AND_ACCEL_END:
+        return None
+    _, rx, ry, rz, rw, ax, ay, az = ROTATION_AND_ACCEL.unpack_from(buf, HEADER_SIZE)
+    qx, qy, qz, qw = rx * _Q15, ry * _Q15, rz * _Q15, rw * _Q15
+    mag = (qx*qx + qy*qy + qz*qz + qw*qw) ** 0.5
+    if mag > 0.1:
+        qx, qy, qz, qw = qx/mag, qy/mag, qz/mag, qw/mag
+    return (qx, qy, qz, qw), (ax * _Q7, ay * _Q7, az * _Q7)
+
+
+#sanity checks and conversion on decoded values, shared by the servers and the udp_ingest workers
+
+def validate_quaternion(qx: float, qy: float, qz: float, qw: float) -> bool:
+    if any(not (-10.0 < v < 10.0) or v != v for v in [qx, qy, qz, qw]):
+        return False
+    magnitude = (qx*qx + qy*qy + qz*qz + qw*qw) ** 0.5
+    return 0.1 < magnitude < 2.0
+
+
+def accel_in_range(accel: Vec3, limit: float) -> bool:
+    return all(-limit < v < limit and v == v for v in accel)
+
+
+def q_to_euler_xyz_deg(q) -> Vec3:
+    """(roll, pitch, yaw) degrees of a (w, x, y, z) quaternion."""
+    w, x, y, z = q
+    sinr_cosp = 2 * (w * x + y * z)
+    cosr_cosp = 1 - 2 * (x * x + y * y)
+    roll = math.degrees(math.atan2(sinr_cosp, cosr_cosp))
+    sinp = 2 * (w * y - z * x)
+    if abs(sinp) >= 1:
+        pitch = math.degrees(math.copysign(math.pi / 2, sinp))
+    else:
+        pitch = math.degrees(math.asin(sinp))
+    siny_cosp = 2 * (w * z + x * y)
+    cosy_cosp = 1 - 2 * (y * y + z * z)
+    yaw = math.degrees(math.atan2(siny_cosp, cosy_cosp))
+    return (roll, pitch, yaw)
+
+
+class PacketDispatcher:
+    """Packet type -> handler lookup table.
+
+    Handlers receive a memoryview over the datagram, so they can hand it
+    to the decode_* functions without copying.
+    """
+
+    def __init__(self, handlers: Dict[int, Handler]) -> None:
+        self._table: List[Optional[Handler]] = [None] * 256
+        for pkt_type, handler in handlers.items():
+            self._table[pkt_type] = handler
+
+    def __call__(self, data: bytes, addr: Addr) -> int:
+        """Route one datagram and return its packet type, or -1 if it is not a tracker packet.
+
+        Anything without the NUL magic (e.g. an echo of our own 13-byte
+        handshake) is dropped here, types nobody registered are returned
+        but not handled.
+        """
+        if len(data) < 4 or data[0] or data[1] or data[2]:
+            return -1
+        pkt_type = data[3]
+        handler = self._table[pkt_type]
+        if handler is not None:
+            handler(memoryview(data), addr)
+        return pkt_type
+
+
+#packet builders, used by the benchmark and for simulating trackers
+
+def build_header(pkt_type: int, counter: int = 0) -> bytes:
+    return HEADER.pack(HEADER_MAGIC, pkt_type, counter)
+
+
+def build_handshake(mac: bytes, firmware: bytes = b"SlimeVR-sim", counter: int = 0) -> bytes:
+    #board, imu, mcu, imu info x3, build number: 24 bytes of ids we never read
+    return build_header(PACKET_HANDSHAKE, counter) + bytes(24) + bytes([len(firmware)]) + firmware + mac
+
+
+def build_battery(volt: float, pct: float, counter: int = 0) -> bytes:
+    return build_header(PACKET_BATTERY, counter) + BATTERY.pack(volt, pct)
+
+
+def build_rotation(quat: Quat, counter: int = 0, sensor_id: int = 0) -> bytes:
+    #trailing byte is the calibration accuracy
+    return build_header(PACKET_ROTATION, counter) + ROTATION.pack(sensor_id, 1, *quat) + b"\x00"
+
+
+def build_acceleration(accel: Vec3, counter: int = 0) -> bytes:
+    return build_header(PACKET_ACCELERATION, counter) + ACCEL.pack(*accel) + b"\x00"
+
+
+def build_rotation_and_accel(quat: Quat, accel: Vec3, counter: int = 0, sensor_id: int = 0) -> bytes:
+    q = [max(-32768, min(32767, round(v * 32768.0))) for v in quat]
+    a = [max(-32768, min(32767, round(v * 128.0))) for v in accel]
+    return build_header(PACKET_ROTATION_AND_ACCELERATION, counter) + ROTATION_AND_ACCEL.pack(sensor_id, *q, *a)
@@ -0,0 +1,129 @@
+"""Coalescing console status for the SlimeVR servers (slimevr.py, alllogs.py).
+
+Packet handlers only hand the reporter their latest tracker state, a
+background thread redraws one line per tracker at a fixed rate. Whatever
+arrives between two redraws is coalesced to the newest value, so console
+output costs the same at 1 Hz or 1000 Hz per tracker and a slow stdout pipe
+only ever stalls the reporter thread, never the event loop.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Generic, List, Optional, TextIO, TypeVar
+
+STATUS_HZ = 5.0
+EVENT_BACKLOG = 64  # one-off lines (connects, disconnects) kept between redraws
+TTY_EVENTS = 8  # events kept on screen when redrawing in place
+RATE_SMOOTHING = 0.3  # EWMA weight of the newest redraw interval
+
+T = TypeVar("T")
+
+_CLEAR = "\x1b[H\x1b[J"  # cursor home + clear screen
+
+
+class _Row(Generic[T]):
+    __slots__ = ("item", "count", "drawn", "rate")
+
+    def __init__(self, item: T) -> None:
+        self.item = item
+        self.count = 0  # packets since the tracker appeared
+        self.drawn = 0  # count at the last redraw
+        self.rate = 0.0
+
+
+class StatusReporter(threading.Thread, Generic[T]):
+    """Latest value per key plus a packet rate, redrawn as a table every 1/hz seconds.
+
+    format_row turns the stored item into its line, it runs on the reporter
+    thread at redraw time so the packet path never formats anything. On a
+    terminal the table is redrawn in place, otherwise each redraw is appended.
+    """
+
+    def __init__(
+        self,
+        format_row: Callable[[T], str],
+        hz: float = STATUS_HZ,
+        stream: Optional[TextIO] = None,
+        title: str = "",
+    ) -> None:
+        super().__init__(daemon=True)
+        self._format_row = format_row
+        self._period = 1.0 / hz
+        self._stream = stream or sys.stdout
+        self._tty = self._stream.isatty()
+        self._title = title
+        self._rows: Dict[str, _Row[T]] = {}
+        self._events: Deque[str] = deque(maxlen=EVENT_BACKLOG)
+        self._recent: Deque[str] = deque(maxlen=TTY_EVENTS)
+        self._lock = threading.Lock()
+        self._stop_evt = threading.Event()
+
+    # packet path, no I/O and no formatting
+
+    def update(self, key: str, item: T) -> None:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = _Row(item)
+            row.item = item
+            row.count += 1
+
+    def event(self, message: str) -> None:
+        """One-off line shown above the table on the next redraw (oldest dropped past EVENT_BACKLOG)."""
+        self._events.append(message)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._rows.pop(key, None)
+
+    # reporter thread
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop_evt.wait(self._period):
+            now = time.perf_counter()
+            self._draw(now - last)
+            last = now
+        self._draw(0.0)
+
+    def _draw(self, dt: float) -> None:
+        events: List[str] = []
+        while self._events:
+            events.append(self._events.popleft())
+        with self._lock:
+            snapshot = []
+            for key, row in sorted(self._rows.items()):
+                if dt > 0.0:
+                    inst = (row.count - row.drawn) / dt
+                    # first interval seeds the average, a new tracker would otherwise ramp up from 0
+                    row.rate = inst if row.drawn == 0 else row.rate + RATE_SMOOTHING * (inst - row.rate)
+                    row.drawn = row.count
+                snapshot.append((row.rate, row.item))
+
+        if self._tty:
+            # the screen is cleared every redraw, keep the last few events on it
+            self._recent.extend(events)
+            events = list(self._recent)
+        elif not snapshot and not events:
+            return  # piped output: don't repeat an empty table
+        lines: List[str] = []
+        if self._title:
+            lines.append(self._title)
+        lines.extend(events)
+        total = 0.0
+        for rate, item in snapshot:
+            total += rate
+            lines.append(f"{rate:7.1f}/s  {self._format_row(item)}")
+        lines.append(f"{len(snapshot)} trackers, {total:.1f} pkt/s")
+        text = "\n".join(lines) + "\n"
+        try:
+            self._stream.write(_CLEAR + text if self._tty else text)
+            self._stream.flush()
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,96 @@
+"""Tracker bookkeeping shared by the SlimeVR servers (slimevr.py, alllogs.py, integrated_all2.py)."""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Generic, Iterator, List, Optional, Set, Tuple, TypeVar
+
+Addr = Tuple[str, int]
+
+# anything with .mac, .addr and .last_seen (the Tracker dataclasses in each script)
+T = TypeVar("T")
+
+
+class TrackerRegistry(Generic[T]):
+    """Trackers by MAC and by source address, with a deadline heap for timeouts.
+
+    Each MAC has at most one heap entry keyed on last_seen + timeout. Packets
+    only bump tracker.last_seen, the heap is fixed up lazily in expire(): an
+    entry that comes due for a tracker that has been seen since is pushed
+    back with its new deadline. Eviction costs O(expired * log n) instead of
+    a scan over every tracker.
+
+    addr -> MAC only ever holds a tracker's current address, rebinding a
+    tracker (re-handshake from a new port) drops the old address.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._by_mac: Dict[str, T] = {}
+        self._by_addr: Dict[Addr, str] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._queued: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._by_mac)
+
+    def __contains__(self, mac: object) -> bool:
+        return mac in self._by_mac
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_mac)
+
+    def get(self, mac: str) -> Optional[T]:
+        return self._by_mac.get(mac)
+
+    def get_by_addr(self, addr: Addr) -> Optional[T]:
+        mac = self._by_addr.get(addr)
+        return self._by_mac.get(mac) if mac else None
+
+    def values(self):
+        return self._by_mac.values()
+
+    def items(self):
+        return self._by_mac.items()
+
+    def add(self, tracker: T) -> None:
+        mac = tracker.mac
+        self._by_mac[mac] = tracker
+        if mac not in self._queued:
+            self._queued.add(mac)
+            heapq.heappush(self._deadlines, (tracker.last_seen + self.timeout, mac))
+
+    def bind(self, tracker: T, addr: Addr) -> None:
+        """Register tracker (if new) and make addr its only source address."""
+        mac = tracker.mac
+        old = tracker.addr
+        if old is not None and old != addr and self._by_addr.get(old) == mac:
+            del self._by_addr[old]
+        self._by_addr[addr] = mac
+        tracker.addr = addr
+        self.add(tracker)
+
+    def remove(self, mac: str) -> Optional[T]:
+        # a leftover heap entry is discarded when it comes due
+        tracker = self._by_mac.pop(mac, None)
+        if tracker is not None and tracker.addr is not None and self._by_addr.get(tracker.addr) == mac:
+            del self._by_addr[tracker.addr]
+        return tracker
+
+    def expire(self, now: float) -> List[T]:
+        """Remove and return every tracker not seen for longer than timeout."""
+        evicted: List[T] = []
+        heap = self._deadlines
+        while heap and heap[0][0] < now:
+            _, mac = heapq.heappop(heap)
+            tracker = self._by_mac.get(mac)
+            if tracker is None:
+                self._queued.discard(mac)
+                continue
+            deadline = tracker.last_seen + self.timeout
+            if deadline >= now:
+                heapq.heappush(heap, (deadline, mac))
+                continue
+            self._queued.discard(mac)
+            self.remove(mac)
+            evicted.append(tracker)
+        return evicted
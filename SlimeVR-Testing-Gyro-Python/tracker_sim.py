@@ -0,0 +1,369 @@
+"""Simulated SlimeVR tracker fleet, for load testing slimevr.py / alllogs.py / integrated_all2.py.
+
+Every virtual tracker owns a UDP socket, does the handshake the servers expect
+(firmware string + MAC at HEADER_SIZE + 24) and then streams packets 17, 23, 4
+at --rate Hz plus a battery packet (12) at 1 Hz.
+
+    python tracker_sim.py -n 50                          # 50 trackers @ 120 Hz against localhost
+    python tracker_sim.py -n 2000 --procs 8 --duration 60
+    python tracker_sim.py -n 20 --types 23,12 --host 192.168.1.10
+
+What is reported every --report seconds:
+  sent           packets/s the simulator put on the wire
+  server rx est  sent - kernel drops per second, local server only. An estimate: it counts
+                 what reached the socket, not what the server got round to handling
+  drops          receive-buffer drops on the server socket, read from /proc/net/udp
+  rxq            bytes waiting in the server's receive queue, grows when the server falls behind
+  rtt            end-to-end latency: a re-handshake is sent as a probe and the server's
+                 reply has to wait behind every packet queued before it
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import multiprocessing as mp
+import queue
+import time
+from typing import Dict, List, Optional, Tuple
+
+from slimevr_packets import (
+    ACCEL,
+    BATTERY,
+    HEADER,
+    HEADER_MAGIC,
+    PACKET_ACCELERATION,
+    PACKET_BATTERY,
+    PACKET_HANDSHAKE,
+    PACKET_ROTATION,
+    PACKET_ROTATION_AND_ACCELERATION,
+    ROTATION,
+    ROTATION_AND_ACCEL,
+    SERVER_PORT,
+    build_handshake,
+)
+
+BATTERY_HZ = 1.0
+HANDSHAKE_RETRY_S = 0.5
+HANDSHAKE_TIMEOUT_S = 10.0
+PROBE_TIMEOUT_S = 1.0
+STREAM_TYPES = (PACKET_ROTATION, PACKET_ROTATION_AND_ACCELERATION, PACKET_ACCELERATION)
+
+
+class WorkerStats:
+    def __init__(self) -> None:
+        self.sent = 0
+        self.connected = 0
+        self.late_ticks = 0
+        self.probes = 0
+        self.probe_lost = 0
+        self.send_errors = 0
+        self.rtts: List[float] = []
+
+    def take(self) -> Dict[str, object]:
+        """Interval counters, reset after reading (connected is a level, not a counter)."""
+        out = {
+            "sent": self.sent,
+            "connected": self.connected,
+            "late_ticks": self.late_ticks,
+            "probes": self.probes,
+            "probe_lost": self.probe_lost,
+            "send_errors": self.send_errors,
+            "rtts": self.rtts,
+        }
+        self.sent = self.late_ticks = self.probes = self.probe_lost = self.send_errors = 0
+        self.rtts = []
+        return out
+
+
+class SimTracker(asyncio.DatagramProtocol):
+    def __init__(self, mac: bytes, stats: WorkerStats) -> None:
+        self.mac = mac
+        self.stats = stats
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.connected = False
+        self.counter = 0
+        self.probe_sent: Optional[float] = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        #the only thing the servers ever send is the 13-byte handshake reply
+        if data[:1] != bytes([PACKET_HANDSHAKE]):
+            return
+        if not self.connected:
+            self.connected = True
+            self.stats.connected += 1
+        elif self.probe_sent is not None:
+            self.stats.rtts.append(time.perf_counter() - self.probe_sent)
+            self.probe_sent = None
+
+    def error_received(self, exc: Exception) -> None:
+        #ICMP port unreachable while the server is down, keep going
+        self.stats.send_errors += 1
+
+    def handshake(self) -> None:
+        self.counter += 1
+        self.transport.sendto(build_handshake(self.mac, counter=self.counter))
+
+    def probe(self, now: float) -> None:
+        if self.probe_sent is not None:
+            self.stats.probe_lost += 1
+        self.probe_sent = now
+        self.stats.probes += 1
+        self.handshake()
+
+
+def _mac(idx: int) -> bytes:
+    #locally administered, unique per tracker index
+    return bytes([0x02, 0x5E]) + idx.to_bytes(4, "big")
+
+
+def _raise_fd_limit() -> None:
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _payloads(t: float) -> Dict[int, bytes]:
+    """Packet bodies for one tick, shared by all trackers: a slow spin about Z."""
+    half = 0.5 * t
+    qz, qw = math.sin(half), math.cos(half)
+    acc = (0.1 * math.sin(t), 0.1 * math.cos(t), 9.81)
+    return {
+        PACKET_ROTATION: ROTATION.pack(0, 1, 0.0, 0.0, qz, qw) + b"\x00",
+        PACKET_ROTATION_AND_ACCELERATION: ROTATION_AND_ACCEL.pack(
+            0, 0, 0, round(qz * 32767), round(qw * 32767),
+            round(acc[0] * 128), round(acc[1] * 128), round(acc[2] * 128),
+        ),
+        PACKET_ACCELERATION: ACCEL.pack(*acc) + b"\x00",
+        PACKET_BATTERY: BATTERY.pack(3.9, 0.8),
+    }
+
+
+async def _run_worker(
+    worker: int, host: str, port: int, first: int, count: int, rate: float,
+    types: Tuple[int, ...], duration: float, report_s: float, probe_hz: float, out: "mp.Queue",
+) -> None:
+    loop = asyncio.get_running_loop()
+    stats = WorkerStats()
+    trackers: List[SimTracker] = []
+    for idx in range(first, first + count):
+        mac = _mac(idx)
+        _, trk = await loop.create_datagram_endpoint(lambda: SimTracker(mac, stats), remote_addr=(host, port))
+        trackers.append(trk)
+
+    deadline = time.monotonic() + HANDSHAKE_TIMEOUT_S
+    while stats.connected < count and time.monotonic() < deadline:
+        for trk in trackers:
+            if not trk.connected:
+                trk.handshake()
+        await asyncio.sleep(HANDSHAKE_RETRY_S)
+    live = [trk for trk in trackers if trk.connected]
+    stream = tuple(t for t in types if t in STREAM_TYPES)
+    battery_every = max(1, round(rate / BATTERY_HZ)) if PACKET_BATTERY in types else 0
+
+    period = 1.0 / rate
+    probe_period = 1.0 / probe_hz if probe_hz > 0 else math.inf
+    start = time.monotonic()
+    end = start + duration if duration > 0 else math.inf
+    next_tick = start
+    next_report = start + report_s
+    next_probe = start
+    probe_idx = 0
+    tick = 0
+    pack_header = HEADER.pack
+
+    while True:
+        now = time.monotonic()
+        if now >= end:
+            break
+        body = _payloads(now - start)
+        with_batt = battery_every and tick % battery_every == 0
+        sent = 0
+        for trk in live:
+            sendto = trk.transport.sendto
+            c = trk.counter
+            for pkt_type in stream:
+                c += 1
+                sendto(pack_header(HEADER_MAGIC, pkt_type, c) + body[pkt_type])
+            if with_batt:
+                c += 1
+                sendto(pack_header(HEADER_MAGIC, PACKET_BATTERY, c) + body[PACKET_BATTERY])
+            sent += c - trk.counter
+            trk.counter = c
+        stats.sent += sent
+        tick += 1
+
+        if live and now >= next_probe:
+            live[probe_idx % len(live)].probe(time.perf_counter())
+            probe_idx += 1
+            next_probe += probe_period
+        if now >= next_report:
+            out.put((worker, stats.take()))
+            next_report += report_s
+
+        #absolute deadlines, when we fall a whole tick behind skip ahead instead of bursting
+        next_tick += period
+        delay = next_tick - time.monotonic()
+        if delay < -period:
+            stats.late_ticks += 1
+            next_tick = time.monotonic()
+            delay = 0.0
+        await asyncio.sleep(max(0.0, delay))
+
+    await asyncio.sleep(PROBE_TIMEOUT_S)
+    out.put((worker, stats.take()))
+    out.put((worker, None))
+    for trk in trackers:
+        trk.transport.close()
+
+
+def _worker_main(*args) -> None:
+    _raise_fd_limit()
+    asyncio.run(_run_worker(*args))
+
+
+def read_udp_socket_stats(port: int) -> Optional[Tuple[int, int]]:
+    """(drops, rx_queue bytes) summed over every local socket bound to port, None if not visible."""
+    found = False
+    drops = rxq = 0
+    for table in ("/proc/net/udp", "/proc/net/udp6"):
+        try:
+            with open(table) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            cols = line.split()
+            if len(cols) < 13 or int(cols[1].rsplit(":", 1)[1], 16) != port:
+                continue
+            found = True
+            rxq += int(cols[4].split(":")[1], 16)
+            drops += int(cols[-1])
+    return (drops, rxq) if found else None
+
+
+def _positive(text: str) -> float:
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be > 0, got {text}")
+    return value
+
+
+def _pct(vals: List[float], p: float) -> float:
+    return vals[min(len(vals) - 1, int(len(vals) * p))] if vals else math.nan
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Simulated SlimeVR tracker fleet load generator")
+    ap.add_argument("-n", "--trackers", type=int, default=10)
+    ap.add_argument("--rate", type=_positive, default=120.0, help="packets/s per tracker per streamed type")
+    ap.add_argument("--types", default="17,23,4,12", help="packet types to send, 12 goes at 1 Hz")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=SERVER_PORT)
+    ap.add_argument("--procs", type=int, default=1, help="sender processes, trackers are split across them")
+    ap.add_argument("--duration", type=float, default=0.0, help="seconds, 0 runs until Ctrl+C")
+    ap.add_argument("--report", type=_positive, default=2.0, help="report interval in seconds")
+    ap.add_argument("--probe-hz", type=float, default=5.0, help="latency probes per second per process")
+    args = ap.parse_args()
+
+    types = tuple(int(t) for t in args.types.split(",") if t.strip())
+    procs = max(1, min(args.procs, args.trackers))
+    out: mp.Queue = mp.Queue()
+    workers = []
+    first = 0
+    for w in range(procs):
+        count = args.trackers // procs + (1 if w < args.trackers % procs else 0)
+        p = mp.Process(
+            target=_worker_main,
+            args=(w, args.host, args.port, first, count, args.rate, types,
+                  args.duration, args.report, args.probe_hz, out),
+            daemon=True,
+        )
+        p.start()
+        workers.append(p)
+        first += count
+
+    local = args.host in ("127.0.0.1", "localhost", "0.0.0.0")
+    base = read_udp_socket_stats(args.port) if local else None
+    if local and base is None:
+        print(f"[sim] no local socket on port {args.port} visible, server-side stats disabled")
+    prev = base
+    connected: Dict[int, int] = {}
+    totals = {"sent": 0, "probes": 0, "probe_lost": 0, "late_ticks": 0}
+    all_rtts: List[float] = []
+    running = set(range(procs))
+    t_start = time.monotonic()
+    t_last = t_start
+
+    print(f"[sim] {args.trackers} trackers, types {types} @ {args.rate:g} Hz, {procs} process(es) -> {args.host}:{args.port}")
+    try:
+        while running:
+            time.sleep(args.report)
+            interval = {"sent": 0, "probes": 0, "probe_lost": 0, "late_ticks": 0}
+            rtts: List[float] = []
+            while True:
+                try:
+                    w, rep = out.get_nowait()
+                except queue.Empty:
+                    break
+                if rep is None:
+                    running.discard(w)
+                    continue
+                connected[w] = rep["connected"]
+                for k in interval:
+                    interval[k] += rep[k]
+                rtts.extend(rep["rtts"])
+            now = time.monotonic()
+            dt = now - t_last
+            t_last = now
+            for k in totals:
+                totals[k] += interval[k]
+            all_rtts.extend(rtts)
+            rtts.sort()
+
+            line = (
+                f"[sim] t={now - t_start:6.0f}s trackers {sum(connected.values())}/{args.trackers} "
+                f"sent {interval['sent'] / dt:>10,.0f} pkt/s"
+            )
+            cur = read_udp_socket_stats(args.port) if base is not None else None
+            if cur is not None and prev is not None:
+                drops = cur[0] - prev[0]
+                loss = drops / interval["sent"] * 100.0 if interval["sent"] else 0.0
+                line += (
+                    f"  server rx est {(interval['sent'] - drops) / dt:>10,.0f} pkt/s"
+                    f"  drops {drops:,} ({loss:.2f}%)  rxq {cur[1] // 1024} KiB"
+                )
+                prev = cur
+            line += (
+                f"  rtt p50 {_pct(rtts, 0.5) * 1e3:6.2f} ms p99 {_pct(rtts, 0.99) * 1e3:6.2f} ms"
+                f"  probe loss {interval['probe_lost']}/{interval['probes']}"
+            )
+            if interval["late_ticks"]:
+                line += f"  sim late {interval['late_ticks']}"
+            print(line)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in workers:
+            p.terminate()
+
+    elapsed = time.monotonic() - t_start
+    all_rtts.sort()
+    print(f"[sim] total {totals['sent']:,} packets in {elapsed:.0f}s ({totals['sent'] / elapsed:,.0f} pkt/s)")
+    if base is not None and prev is not None:
+        drops = prev[0] - base[0]
+        pct = drops / totals["sent"] * 100.0 if totals["sent"] else 0.0
+        print(f"[sim] server drops {drops:,} ({pct:.2f}%)")
+    if all_rtts:
+        print(f"[sim] rtt p50 {_pct(all_rtts, 0.5) * 1e3:.2f} ms p99 {_pct(all_rtts, 0.99) * 1e3:.2f} ms max {all_rtts[-1] * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
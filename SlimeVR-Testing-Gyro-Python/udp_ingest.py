@@ -0,0 +1,258 @@
+"""Multi-process SlimeVR UDP ingest for integrated_all2.py (INGEST_WORKERS > 0).
+
+Each worker process binds the server port with SO_REUSEPORT, so the kernel
+hashes every tracker (by source ip:port) onto one worker. Workers answer
+handshakes, decode and validate packets, convert rotations to Euler angles
+and keep only the newest values per tracker. Every INGEST_FLUSH_S they send
+one update per tracker that sent anything over a pipe:
+
+    (mac, addr, handshake, quat, euler, accel, battery)
+
+Fields without a new valid value since the last flush are None, an update
+with all of them None only keeps the tracker alive. The main process
+applies one row per tracker per batch and never touches the socket, so its
+cost grows with the tracker count, not the packet rate.
+
+A worker's first message is its bind result, start() waits for all of them.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import socket
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from slimevr_packets import (
+    HANDSHAKE_RESPONSE,
+    HEADER_SIZE,
+    PACKET_ACCELERATION,
+    PACKET_BATTERY,
+    PACKET_HANDSHAKE,
+    PACKET_ROTATION,
+    PACKET_ROTATION_AND_ACCELERATION,
+    SERVER_PORT,
+    PacketDispatcher,
+    accel_in_range,
+    decode_acceleration,
+    decode_battery,
+    decode_handshake_mac,
+    decode_rotation,
+    decode_rotation_and_accel,
+    q_to_euler_xyz_deg,
+    tracker_key,
+    validate_quaternion,
+)
+from tracker_registry import TrackerRegistry
+
+INGEST_BATCH = 256  # trackers per pipe message
+INGEST_FLUSH_S = 0.005  # max time an update waits in a worker
+RECV_BUF_BYTES = 4 * 1024 * 1024
+PEER_TIMEOUT_S = 5.0
+BIND_TIMEOUT_S = 5.0  # how long start() waits for a worker's bind result
+
+Addr = Tuple[str, int]
+Quat = Tuple[float, float, float, float]
+Vec3 = Tuple[float, float, float]
+Update = Tuple[str, Addr, bool, Optional[Quat], Optional[Vec3], Optional[Vec3], Optional[Tuple[float, float]]]
+
+
+@dataclass
+class _Peer:
+    mac: str
+    addr: Optional[Addr]
+    last_seen: float
+
+
+class _Pending:
+    """Newest valid values of one tracker since the last flush."""
+
+    __slots__ = ("addr", "handshake", "quat", "euler", "accel", "battery")
+
+    def __init__(self, addr: Addr) -> None:
+        self.addr = addr
+        self.handshake = False
+        self.quat: Optional[Quat] = None
+        self.euler: Optional[Vec3] = None
+        self.accel: Optional[Vec3] = None
+        self.battery: Optional[Tuple[float, float]] = None
+
+    def set_quat(self, quat: Quat) -> None:
+        qx, qy, qz, qw = quat
+        self.quat = quat
+        self.euler = q_to_euler_xyz_deg((qw, qx, qy, qz))
+
+
+class _Worker:
+    def __init__(self, sock: socket.socket, conn: Connection) -> None:
+        self._sock = sock
+        self._conn = conn
+        self._peers: TrackerRegistry[_Peer] = TrackerRegistry(PEER_TIMEOUT_S)
+        self._pending: Dict[str, _Pending] = {}
+        self._now = time.monotonic()
+        self._dispatch = PacketDispatcher({
+            PACKET_HANDSHAKE: self._handshake,
+            PACKET_BATTERY: self._battery,
+            PACKET_ROTATION: self._rotation,
+            PACKET_ROTATION_AND_ACCELERATION: self._rotation_and_accel,
+            PACKET_ACCELERATION: self._acceleration,
+        })
+
+    def _entry(self, peer: _Peer, addr: Addr) -> _Pending:
+        entry = self._pending.get(peer.mac)
+        if entry is None:
+            entry = self._pending[peer.mac] = _Pending(addr)
+        else:
+            entry.addr = addr
+        return entry
+
+    def _handshake(self, data: memoryview, addr: Addr) -> None:
+        mac = decode_handshake_mac(data)
+        if mac is None:
+            return
+        mac = tracker_key(mac, addr)
+        peer = self._peers.get(mac) or _Peer(mac, addr, self._now)
+        peer.last_seen = self._now
+        self._peers.bind(peer, addr)
+        self._sock.sendto(HANDSHAKE_RESPONSE, addr)
+        self._entry(peer, addr).handshake = True
+
+    # same checks as integrated_all2.TrackerSink, invalid values are dropped here
+
+    def _battery(self, data: memoryview, addr: Addr) -> None:
+        peer = self._peers.get_by_addr(addr)
+        batt = decode_battery(data) if peer else None
+        if batt:
+            self._entry(peer, addr).battery = batt
+
+    def _rotation(self, data: memoryview, addr: Addr) -> None:
+        peer = self._peers.get_by_addr(addr)
+        quat = decode_rotation(data) if peer else None
+        if quat and validate_quaternion(*quat):
+            self._entry(peer, addr).set_quat(quat)
+
+    def _acceleration(self, data: memoryview, addr: Addr) -> None:
+        peer = self._peers.get_by_addr(addr)
+        accel = decode_acceleration(data) if peer else None
+        if accel and accel_in_range(accel, 1000.0):
+            self._entry(peer, addr).accel = accel
+
+    def _rotation_and_accel(self, data: memoryview, addr: Addr) -> None:
+        peer = self._peers.get_by_addr(addr)
+        decoded = decode_rotation_and_accel(data) if peer else None
+        if decoded:
+            quat, accel = decoded
+            entry = self._entry(peer, addr)
+            if validate_quaternion(*quat):
+                entry.set_quat(quat)
+            if accel_in_range(accel, 100.0):
+                entry.accel = accel
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        batch: List[Update] = [
+            (mac, e.addr, e.handshake, e.quat, e.euler, e.accel, e.battery) for mac, e in self._pending.items()
+        ]
+        self._pending.clear()
+        self._conn.send(batch)
+
+    def run(self) -> None:
+        sock = self._sock
+        sock.settimeout(INGEST_FLUSH_S)
+        buf = bytearray(2048)
+        view = memoryview(buf)
+        next_flush = time.monotonic() + INGEST_FLUSH_S
+        next_gc = next_flush + 1.0
+        while True:
+            try:
+                n, addr = sock.recvfrom_into(buf)
+            except socket.timeout:
+                n = 0
+            self._now = now = time.monotonic()
+            if n:
+                pkt_type = self._dispatch(view[:n], addr)
+                #any data packet, even ones we don't decode, keeps the tracker alive
+                if pkt_type >= 0 and pkt_type != PACKET_HANDSHAKE and n > HEADER_SIZE:
+                    peer = self._peers.get_by_addr(addr)
+                    if peer is not None:
+                        peer.last_seen = now
+                        self._entry(peer, addr)
+            if len(self._pending) >= INGEST_BATCH or now >= next_flush:
+                self._flush()
+                next_flush = now + INGEST_FLUSH_S
+                if now >= next_gc:
+                    self._peers.expire(now)
+                    next_gc = now + 1.0
+
+
+def _worker_main(port: int, conn: Connection) -> None:
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUF_BYTES)
+        sock.bind(("0.0.0.0", port))
+    except OSError as e:
+        conn.send(f"bind to port {port} failed: {e}")
+        return
+    conn.send(None)
+    try:
+        _Worker(sock, conn).run()
+    except (KeyboardInterrupt, BrokenPipeError, EOFError):
+        pass
+
+
+class IngestPool:
+    """N worker processes sharing the UDP port, read their update batches with batches()."""
+
+    def __init__(self, workers: int, port: int = SERVER_PORT) -> None:
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("SO_REUSEPORT not supported on this platform")
+        self.workers = workers
+        self.port = port
+        self._procs: List[mp.Process] = []
+        self._conns: List[Connection] = []
+
+    def start(self) -> None:
+        # fork: workers only run _worker_main, start the pool before other threads where possible
+        ctx = mp.get_context("fork")
+        for _ in range(self.workers):
+            rx, tx = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_worker_main, args=(self.port, tx), daemon=True)
+            proc.start()
+            tx.close()
+            self._procs.append(proc)
+            self._conns.append(rx)
+        try:
+            for rx in self._conns:
+                if not rx.poll(BIND_TIMEOUT_S):
+                    raise RuntimeError(f"ingest worker did not report its bind within {BIND_TIMEOUT_S:g} s")
+                err = rx.recv()
+                if err is not None:
+                    raise RuntimeError(err)
+        except (EOFError, RuntimeError) as e:
+            self.stop()
+            raise RuntimeError(str(e) or "ingest worker exited before binding") from None
+
+    def batches(self, timeout: float) -> Iterator[List[Update]]:
+        """Update batches that arrived within timeout, from any worker.
+
+        Raises RuntimeError once every worker has exited, nothing would arrive any more.
+        """
+        if not self._conns:
+            raise RuntimeError("all ingest workers exited")
+        for conn in wait(self._conns, timeout):
+            try:
+                yield conn.recv()
+            except EOFError:
+                self._conns.remove(conn)
+                print("[UDP] Ingest worker exited")
+
+    def stop(self) -> None:
+        for proc in self._procs:
+            proc.terminate()
+        for proc in self._procs:
+            proc.join(timeout=1.0)
+        for conn in self._conns:
+            conn.close()